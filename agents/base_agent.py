@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 
 class BaseAgent(ABC):
@@ -11,7 +11,8 @@ class BaseAgent(ABC):
         chat_id: str, 
         user_id: str, 
         user_input: str, 
-        user_metadata: Dict[str, Any]
+        user_metadata: Dict[str, Any],
+        update_id: Optional[int] = None
     ) -> str:
         """Get response from the agent"""
         pass
@@ -19,4 +20,12 @@ class BaseAgent(ABC):
     @abstractmethod
     def create_system_prompt(self, user_metadata: Dict[str, Any]) -> str:
         """Create system prompt for the agent"""
+        pass
+    
+    async def find_response(self, chat_id: str, update_id: int) -> Optional[str]:
+        """Return the reply already produced for this update by an interrupted turn, if any"""
+        return None
+    
+    async def close(self) -> None:
+        """Release resources held by the agent"""
         pass
\ No newline at end of file
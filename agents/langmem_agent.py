@@ -1,15 +1,23 @@
+import time
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from langchain.agents import create_agent
-from langgraph.checkpoint.mongodb import MongoDBSaver
-from langmem import create_manage_memory_tool, create_search_memory_tool
+from langchain_core.messages import AIMessage, HumanMessage
+from langmem import create_manage_memory_tool
 from agents.base_agent import BaseAgent
-from storage.mongodb_client import MongoDBClient
-from storage.stores import MemoryStore
+from agents.memory_tools import create_memory_search_tool, create_user_recall_tool
+from agents.response_cache import CachedResponse, ResponseCache, create_response_cache
+from storage.backends import DBClient, MemoryStoreType
+from storage.serde import create_checkpoint_serializer
+from storage.user_memory_index import UserMemoryIndex
 from config.settings import Settings
+from config.langfuse_client import LangfuseClient
 from llm.openai_client import OpenAIClient
+from llm.instrumentation import MetricsCallbackHandler
 from prompts.langmem_prompt import SystemPrompts
 from utils.logger import setup_logger
+from utils.metrics import metrics, timed, instrument_methods
+from utils.traffic import annotate_turn
 
 logger = setup_logger()
 
@@ -20,15 +28,21 @@ class LangMemAgent(BaseAgent):
     def __init__(
         self,
         settings: Settings,
-        db_client: MongoDBClient,
-        memory_store: MemoryStore,
+        db_client: DBClient,
+        memory_store: MemoryStoreType,
+        openai_client: Optional[OpenAIClient] = None,
+        user_memory_index: Optional[UserMemoryIndex] = None,
     ):
         self.settings = settings
         self.db_client = db_client
         self.memory_store = memory_store
-        self.openai_client = OpenAIClient(settings)
+        self.user_memory_index = user_memory_index
+        self.openai_client = openai_client or OpenAIClient(settings)
         self.llm = self.openai_client.llm
         self._checkpointer = None
+        self.response_cache: Optional[ResponseCache] = None
+        self._metrics_callback = MetricsCallbackHandler()
+        self.langfuse = LangfuseClient(settings)
         self._static_system_prompt = SystemPrompts.get_static_system_prompt()
         self._initialized = False
 
@@ -37,16 +51,42 @@ class LangMemAgent(BaseAgent):
         if self._initialized:
             return
         
-        # Initialize MongoDB checkpointer with sync client
-        self._checkpointer = MongoDBSaver(
-            client=self.db_client.sync_client,
-            db_name=self.settings.db_name,
-            checkpoint_collection_name="checkpoints",
+        # Initialize checkpointer for the configured storage backend
+        self._checkpointer = await self.db_client.create_checkpointer(
+            self.settings.db_name,
+            serde=create_checkpoint_serializer(self.settings),
+        )
+        instrument_methods(
+            self._checkpointer,
+            ("aget_tuple", "aput", "aput_writes"),
+            "checkpoint_operation_seconds",
+        )
+        self.response_cache = create_response_cache(
+            self.settings, self.openai_client.embeddings, self.memory_store.writes
         )
         
         self._initialized = True
         logger.info("✅ LangMemAgent initialized")
 
+    async def warm_up(self):
+        """Pay one-time costs before the first real message
+
+        Compiles the agent graph and tool schemas, loads a checkpoint (opening
+        a pooled database connection) and runs a memory search, which embeds
+        a query and so opens the keep-alive TLS connection to OpenAI. Nothing
+        is written.
+        """
+        namespace = ("chat___warmup__",)
+        config = {"configurable": {"thread_id": "telegram_chat___warmup__", "checkpoint_ns": ""}}
+        try:
+            with metrics.timer("agent_stage_seconds", stage="warmup"):
+                self._create_agent_with_tools(self._create_memory_tools(namespace))
+                await self.checkpointer.aget_tuple(config)
+                await self.memory_store.hybrid.search(namespace, "warm up", limit=1)
+            logger.info("✅ LangMemAgent warmed up")
+        except Exception as e:
+            logger.warning(f"Agent warm-up incomplete: {e}")
+
     @property
     def checkpointer(self):
         """Get checkpointer instance"""
@@ -54,18 +94,27 @@ class LangMemAgent(BaseAgent):
             raise RuntimeError("LangMemAgent not initialized. Call initialize() first.")
         return self._checkpointer
 
-    def _create_memory_tools(self, namespace: tuple) -> List[Any]:
-        """Create memory tools bound to a namespace"""
-        return [
+    def _create_memory_tools(self, namespace: tuple, user_metadata: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """Create memory tools bound to a namespace
+
+        Private chats also get cross-chat recall, scoped to the groups the
+        user is in; group chats only ever see their own memories.
+        """
+        tools = [
             create_manage_memory_tool(
                 store=self.memory_store.store,
                 namespace=namespace,
             ),
-            create_search_memory_tool(
-                store=self.memory_store.store,
-                namespace=namespace,
+            create_memory_search_tool(
+                self.memory_store,
+                namespace,
+                hybrid=self.settings.memory_search_mode == "hybrid",
+                scan_max=self.settings.memory_catalog_scan_max,
             ),
         ]
+        if self.user_memory_index and user_metadata and user_metadata.get("chat_type") == "private":
+            tools.append(create_user_recall_tool(self.user_memory_index, str(user_metadata.get("user_id"))))
+        return tools
 
     def _create_agent_with_tools(self, tools: List[Any]):
         """Create an agent configured with the given tools"""
@@ -81,7 +130,8 @@ class LangMemAgent(BaseAgent):
         self,
         user_input: str,
         user_metadata: Dict[str, Any],
-    ) -> List[Dict[str, str]]:
+        update_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
         """Build contextual user message including metadata"""
         current_datetime = datetime.now().strftime("%A, %B %d, %Y at %I:%M %p")
 
@@ -99,40 +149,56 @@ class LangMemAgent(BaseAgent):
             f"- Chat: {chat_title} (ID: {chat_id}, Type: {chat_type})\n\n"
         )
 
-        return [
-            {
-                "role": "user",
-                "content": contextual_header + user_input,
-            }
-        ]
+        message = {
+            "role": "user",
+            "content": contextual_header + user_input,
+        }
+        if update_id is not None:
+            # Checkpointed with the message, so a redelivered update finds its own turn
+            message["additional_kwargs"] = {"update_id": update_id}
+        return [message]
 
+    @timed("agent_response_seconds")
     async def get_response(
         self,
         chat_id: str,
         user_id: str,
         user_input: str,
         user_metadata: Dict[str, Any],
+        update_id: Optional[int] = None,
     ) -> str:
         """Generate a response using per-chat memory"""
         
         if not self._initialized:
             raise RuntimeError("LangMemAgent not initialized. Call initialize() first.")
         
+        # Head sampling: only sampled turns pay for full Langfuse callbacks
+        session_id = f"telegram_chat_{chat_id}"
+        sampled = self.langfuse.should_sample()
+        started = time.perf_counter()
+        
         try:
             # Prepare messages
-            messages = await self._prepare_messages(user_input, user_metadata)
+            messages = await self._prepare_messages(user_input, user_metadata, update_id)
 
             # Define per-chat namespace
             namespace = (f"chat_{chat_id}",)
 
-            # Build memory tools
-            memory_tools = self._create_memory_tools(namespace)
-
-            # Build agent
-            agent = self._create_agent_with_tools(memory_tools)
+            # Answer repeated questions from the response cache
+            cache = self.response_cache
+            question_vector = None
+            if cache and cache.cacheable(user_input):
+                with metrics.timer("agent_stage_seconds", stage="cache_lookup"):
+                    question_vector = await cache.embed(user_input)
+                    cached = cache.lookup(namespace, question_vector, user_id)
+                if cached:
+                    return await self._respond_from_cache(cached, namespace, messages, session_id, started)
+            generation = cache.generation(namespace) if cache else 0
 
-            # Session ID
-            session_id = f"telegram_chat_{chat_id}"
+            # Build memory tools and agent graph
+            with metrics.timer("agent_stage_seconds", stage="graph_build"):
+                memory_tools = self._create_memory_tools(namespace, user_metadata)
+                agent = self._create_agent_with_tools(memory_tools)
 
             # Config
             config = {
@@ -149,27 +215,103 @@ class LangMemAgent(BaseAgent):
                     "username": user_metadata.get("username"),
                     "full_name": user_metadata.get("full_name"),
                     "timestamp": datetime.now().isoformat(),
-                }
+                },
+                "callbacks": [self._metrics_callback],
             }
 
+            if sampled:
+                handler = self.langfuse.create_user_callback_handler(user_id, session_id, user_metadata)
+                if handler is not None:
+                    config["callbacks"].append(handler)
+                    config["metadata"].update(
+                        self.langfuse.trace_metadata(user_id, session_id, user_metadata)
+                    )
+                    self.langfuse.record_sampled()
+
             # Invoke agent
-            result = await agent.ainvoke(
-                {
-                    "messages": messages,
-                    "user_metadata": user_metadata,
-                },
-                config=config,
-            )
+            with metrics.timer("agent_stage_seconds", stage="invoke"):
+                result = await agent.ainvoke(
+                    {
+                        "messages": messages,
+                        "user_metadata": user_metadata,
+                    },
+                    config=config,
+                )
 
             response = result["messages"][-1].content
-            logger.debug(f"Response generated for user={user_id}, chat={chat_id}")
+            logger.debug("Response generated for user={}, chat={}", user_id, chat_id)
+
+            # Tail capture: unsampled turns are still traced when slow
+            duration_ms = (time.perf_counter() - started) * 1000
+            # Turns that wrote memories are not cached: the write already invalidated older answers
+            if question_vector is not None and response and cache.generation(namespace) == generation:
+                cache.store(namespace, user_input, question_vector, response, user_id, user_metadata, duration_ms / 1000)
+            annotate_turn(agent_ms=round(duration_ms, 3), response=response)
+            if not sampled and duration_ms >= self.settings.langfuse_slow_turn_ms:
+                self.langfuse.record_turn(user_id, session_id, user_input, duration_ms, user_metadata=user_metadata)
 
             return response
 
         except Exception as exc:
             logger.error(f"Agent failed for user={user_id}, chat={chat_id}: {exc}", exc_info=True)
+            duration_ms = (time.perf_counter() - started) * 1000
+            annotate_turn(agent_ms=round(duration_ms, 3), error=type(exc).__name__)
+            if not sampled:
+                self.langfuse.record_turn(
+                    user_id, session_id, user_input, duration_ms, error=exc, user_metadata=user_metadata
+                )
             raise RuntimeError("Failed to generate response") from exc
 
+    async def _respond_from_cache(
+        self,
+        cached: CachedResponse,
+        namespace: tuple,
+        messages: List[Dict[str, Any]],
+        session_id: str,
+        started: float,
+    ) -> str:
+        """Append a cached answer to the thread as if the agent had produced it"""
+        with metrics.timer("agent_stage_seconds", stage="cache_append"):
+            agent = self._create_agent_with_tools(self._create_memory_tools(namespace))
+            # As the model node: with no tool calls the graph routes to the end
+            await agent.aupdate_state(
+                {"configurable": {"thread_id": session_id}},
+                {"messages": messages + [AIMessage(content=cached.response)]},
+                as_node="model",
+            )
+        duration = time.perf_counter() - started
+        self.response_cache.record_hit(cached, duration)
+        annotate_turn(agent_ms=round(duration * 1000, 3), response=cached.response, cached=True)
+        return cached.response
+
+    async def find_response(self, chat_id: str, update_id: int) -> Optional[str]:
+        """Return the reply already checkpointed for this update by an interrupted turn, if any
+
+        A turn can crash after the graph saved its final answer but before
+        the reply was sent; re-running it would duplicate history and spend
+        another LLM call. The turn is matched by the update ID stored on its
+        message, not by text, so a repeated "ok" is never answered with the
+        previous turn's reply.
+        """
+        config = {"configurable": {"thread_id": f"telegram_chat_{chat_id}", "checkpoint_ns": ""}}
+        checkpoint_tuple = await self.checkpointer.aget_tuple(config)
+        if checkpoint_tuple is None:
+            return None
+
+        messages = checkpoint_tuple.checkpoint.get("channel_values", {}).get("messages", [])
+        if len(messages) < 2 or not isinstance(messages[-1], AIMessage) or messages[-1].tool_calls:
+            return None
+        for message in reversed(messages[:-1]):
+            if isinstance(message, HumanMessage):
+                if message.additional_kwargs.get("update_id") == update_id:
+                    return messages[-1].content
+                return None
+        return None
+
     def create_system_prompt(self, user_metadata: Dict[str, Any]) -> str:
         """Return the system prompt"""
         return self._static_system_prompt
+
+    async def close(self):
+        """Flush pending traces without blocking the event loop"""
+        await self.langfuse.ashutdown()
@@ -0,0 +1,114 @@
+import time
+from typing import List, Optional
+from langchain_core.tools import StructuredTool
+from langgraph.store.base import SearchItem
+from langmem import utils
+from storage.backends import MemoryStoreType
+from storage.hybrid_search import tokenize
+from storage.user_memory_index import UserMemoryIndex
+from utils.metrics import metrics
+
+
+def _keyword_order(query: str, items: List[SearchItem]) -> List[SearchItem]:
+    """Order a full namespace listing by query terms matched, then most recent"""
+    terms = set(tokenize(query))
+    by_recency = sorted(items, key=lambda item: item.updated_at, reverse=True)
+    return sorted(by_recency, key=lambda item: len(terms.intersection(tokenize(str(item.value.get("content", ""))))),
+                  reverse=True)
+
+
+async def _catalog_search(
+    memory_store: MemoryStoreType,
+    namespace: tuple,
+    query: str,
+    limit: int,
+    offset: int,
+    filter: Optional[dict],
+    scan_max: int,
+) -> Optional[List[SearchItem]]:
+    """Answer from the namespace catalog when the namespace is empty or tiny, else None"""
+    start = time.perf_counter()
+    stats = await memory_store.catalog.stats(namespace)
+    wanted = limit + offset
+    if stats.count == 0:
+        mode, memories = "catalog_empty", []
+    elif not filter and stats.count <= min(scan_max, wanted):
+        # Every memory is in the result anyway: list them instead of embedding the query
+        listed = await memory_store.store.asearch(namespace, limit=wanted + 1)
+        if len(listed) > wanted:
+            # Catalog is behind a write made elsewhere
+            return None
+        mode, memories = "catalog_scan", _keyword_order(query, listed)[offset:wanted]
+    else:
+        return None
+    metrics.histogram("memory_search_seconds").observe(time.perf_counter() - start, mode=mode)
+    return memories
+
+
+def create_memory_search_tool(
+    memory_store: MemoryStoreType,
+    namespace: tuple,
+    hybrid: bool = True,
+    scan_max: int = 10,
+    name: str = "search_memory",
+) -> StructuredTool:
+    """Drop-in replacement for LangMem's search_memory tool
+
+    Keeps the tool name, arguments and output format, so prompts and
+    recorded traffic are unchanged. Empty namespaces are answered without
+    a search and namespaces of at most scan_max memories are listed whole
+    when the store keeps a namespace catalog. Other searches use hybrid
+    search, or LangMem's vector search when hybrid is off; calls with a
+    filter always use vector search, which is the only path that supports
+    it.
+    """
+
+    async def asearch_memory(
+        query: str,
+        *,
+        limit: int = 10,
+        offset: int = 0,
+        filter: Optional[dict] = None,
+    ):
+        if memory_store.catalog is not None:
+            memories = await _catalog_search(memory_store, namespace, query, limit, offset, filter, scan_max)
+            if memories is not None:
+                return utils.dumps([m.dict() for m in memories])
+
+        if filter or not hybrid:
+            memories = await memory_store.store.asearch(
+                namespace, query=query, filter=filter, limit=limit, offset=offset
+            )
+        else:
+            memories = await memory_store.hybrid.search(namespace, query, limit=limit, offset=offset)
+        return utils.dumps([m.dict() for m in memories])
+
+    description = "Search your long-term memories for information relevant to your current context."
+    if hybrid:
+        description += " Exact user IDs and @usernames in the query are matched directly."
+    return StructuredTool.from_function(coroutine=asearch_memory, name=name, description=description)
+
+
+def create_user_recall_tool(
+    user_index: UserMemoryIndex,
+    viewer_id: str,
+    name: str = "recall_user_memories",
+) -> StructuredTool:
+    """Tool recalling what memories say about a user across chats, for a private chat with viewer_id
+
+    Only chats viewer_id is a member of are searched, so nothing from a
+    group reaches someone outside it.
+    """
+
+    async def arecall_user_memories(user_id: str, query: str = "", limit: int = 10):
+        return utils.dumps(await user_index.recall(viewer_id, user_id, query, limit))
+
+    return StructuredTool.from_function(
+        coroutine=arecall_user_memories,
+        name=name,
+        description=(
+            "Recall memories about a user (by numeric user ID) from every group chat you share with the "
+            "person you are talking to. Use it when they ask about something said in another chat; "
+            "query narrows the results to a topic."
+        ),
+    )
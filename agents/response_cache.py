@@ -0,0 +1,186 @@
+"""
+Semantic cache of agent answers, scoped to a chat's memory namespace.
+
+Support-style groups ask the same question in many paraphrases. When an
+incoming question embeds within `threshold` cosine similarity of one the
+agent answered in the same chat, the stored answer is returned instead of
+running the agent (the caller still appends the turn to the thread).
+
+An entry is dropped when:
+
+    - it is older than ttl_seconds
+    - any memory in its namespace is written or deleted through this
+      process's memory store (the answer may no longer match what the bot knows)
+
+Answers from turns that wrote memories are not cached, and neither are
+questions about the asker ("what do I ...?"). An answer that names the
+user who asked is only served back to that user.
+
+The cache is in-process: memory writes made by another process are only
+picked up through the TTL.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from operator import mul
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+from config.settings import Settings
+from storage.hybrid_search import tokenize
+from utils.logger import setup_logger
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+    from storage.backends import MemoryWrites
+
+logger = setup_logger()
+
+# Questions about the asker have a different answer for every user
+_PERSONAL_WORDS = frozenset("i im me my mine myself".split())
+
+
+@dataclass
+class CachedResponse:
+    """A question the agent answered and its answer"""
+
+    question: str
+    vector: List[float]
+    response: str
+    user_id: str
+    user_names: Tuple[str, ...]
+    created_at: float
+    agent_seconds: float
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+def _names(user_metadata: Dict[str, Any]) -> Tuple[str, ...]:
+    names = (user_metadata.get("username"), user_metadata.get("full_name"))
+    return tuple(name.lower() for name in names if name and name != "N/A" and len(name) >= 3)
+
+
+class ResponseCache:
+    """Per-namespace semantic cache of agent responses with write invalidation"""
+
+    def __init__(
+        self,
+        embedder: "Embeddings",
+        threshold: float = 0.9,
+        ttl_seconds: float = 3600,
+        max_entries: int = 100,
+        max_chats: int = 10_000,
+    ):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_chats = max_chats
+        self._entries: "OrderedDict[tuple, List[CachedResponse]]" = OrderedDict()
+        # Bumped on every memory write; a turn that saw its namespace change is not cached
+        self._generations: Dict[tuple, int] = {}
+        self._lookups = metrics.counter("response_cache_lookups_total", "Response cache lookups by result")
+        self._saved = metrics.counter("response_cache_saved_seconds_total", "Agent time avoided by cache hits")
+        self._invalidations = metrics.counter("response_cache_invalidations_total", "Cache entries dropped by memory writes")
+
+    async def on_memory_write(self, namespace: tuple, key: str, value: Optional[Dict[str, Any]], previous=None):
+        """Invalidate a namespace whenever a memory in it is written through the store's write path"""
+        self.invalidate(namespace)
+
+    def invalidate(self, namespace: tuple):
+        """Drop every cached answer in a namespace"""
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+        dropped = self._entries.pop(namespace, None)
+        if dropped:
+            self._invalidations.inc(len(dropped))
+
+    def generation(self, namespace: tuple) -> int:
+        """Memory write counter of a namespace, to detect writes during a turn"""
+        return self._generations.get(namespace, 0)
+
+    @staticmethod
+    def cacheable(question: str) -> bool:
+        """Whether the answer to a question could be reused for other askers"""
+        tokens = tokenize(question.replace("'", ""))
+        return bool(tokens) and not _PERSONAL_WORDS.intersection(tokens)
+
+    async def embed(self, question: str) -> List[float]:
+        """Normalized embedding of a question"""
+        return _normalize(await self.embedder.aembed_query(question))
+
+    def lookup(self, namespace: tuple, vector: List[float], user_id: str) -> Optional[CachedResponse]:
+        """Most similar live answer in the namespace, if above the threshold"""
+        entries = self._entries.get(namespace)
+        if not entries:
+            self._lookups.inc(result="miss")
+            return None
+
+        now = time.time()
+        entries[:] = [entry for entry in entries if now - entry.created_at < self.ttl_seconds]
+        best, best_score = None, self.threshold
+        for entry in entries:
+            # Vectors are normalized, so the dot product is the cosine similarity
+            score = sum(map(mul, vector, entry.vector))
+            if score >= best_score and (entry.user_id == user_id or not self._personal(entry)):
+                best, best_score = entry, score
+
+        self._lookups.inc(result="hit" if best else "miss")
+        if best:
+            self._entries.move_to_end(namespace)
+            logger.debug("Response cache hit ({:.3f}) for {!r} ~ {!r}", best_score, best.question[:60], namespace)
+        return best
+
+    @staticmethod
+    def _personal(entry: CachedResponse) -> bool:
+        response = entry.response.lower()
+        return any(name in response for name in entry.user_names)
+
+    def record_hit(self, entry: CachedResponse, seconds: float):
+        """Account agent time avoided by serving a cached answer"""
+        self._saved.inc(max(entry.agent_seconds - seconds, 0.0))
+
+    def store(
+        self,
+        namespace: tuple,
+        question: str,
+        vector: List[float],
+        response: str,
+        user_id: str,
+        user_metadata: Dict[str, Any],
+        agent_seconds: float,
+    ):
+        """Cache an answer the agent just produced"""
+        entries = self._entries.setdefault(namespace, [])
+        entries.append(CachedResponse(
+            question=question,
+            vector=vector,
+            response=response,
+            user_id=user_id,
+            user_names=_names(user_metadata),
+            created_at=time.time(),
+            agent_seconds=agent_seconds,
+        ))
+        del entries[:-self.max_entries]
+        self._entries.move_to_end(namespace)
+        while len(self._entries) > self.max_chats:
+            self._entries.popitem(last=False)
+
+
+def create_response_cache(settings: Settings, embedder: "Embeddings", writes: "MemoryWrites") -> Optional[ResponseCache]:
+    """Create the response cache, hooked into the memory store's writes, or None when disabled"""
+    if not settings.response_cache_enabled:
+        return None
+    cache = ResponseCache(
+        embedder,
+        threshold=settings.response_cache_threshold,
+        ttl_seconds=settings.response_cache_ttl_seconds,
+        max_entries=settings.response_cache_max_entries,
+        max_chats=settings.response_cache_max_chats,
+    )
+    writes.add(cache)
+    logger.info(f"✅ Response cache enabled (similarity ≥ {cache.threshold}, TTL {cache.ttl_seconds:.0f}s)")
+    return cache
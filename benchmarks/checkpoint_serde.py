@@ -0,0 +1,143 @@
+"""
+Compare checkpoint serializers on document size, CPU time and load latency.
+
+Builds checkpoints shaped like the bot's (context header, search_memory
+tool calls and results, replies) for several history lengths and measures
+the current format (JsonPlusSerializer / msgpack) against the compressed
+serializer. Also checks that checkpoints in the current format still load
+through the compressed serializer.
+
+With --mongo-uri each checkpoint is written through MongoDBSaver and
+loaded with aget_tuple, as at the start of every agent turn.
+
+Usage:
+    python -m benchmarks.checkpoint_serde
+    python -m benchmarks.checkpoint_serde --mongo-uri mongodb://localhost:27017/?directConnection=true
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Dict, List
+import bson
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from storage.serde import CompressedSerializer
+from benchmarks.reporting import summarize, format_row
+
+TOPICS = ["pizza", "coffee", "meetings", "deadline", "python", "travel", "music", "budget"]
+
+
+def build_checkpoint(turns: int) -> dict:
+    """Checkpoint holding `turns` agent turns, each with a memory search"""
+    checkpoint = empty_checkpoint()
+    messages = []
+    for i in range(turns):
+        topic = TOPICS[i % len(TOPICS)]
+        user_id = 100_000 + i % 7
+        messages.append(HumanMessage(content=(
+            f"Context:\n- Time: Monday, October 19, 2026 at 10:{i % 60:02d} AM\n"
+            f"- User: Member {i % 7} (@member_{i % 7}, ID: {user_id})\n"
+            f"- Chat: Weekend Plans (ID: -1001234567, Type: supergroup)\n\n"
+            f"What do you remember about {topic}? Message {i}."
+        )))
+        call_id = f"call_{uuid.uuid4().hex[:24]}"
+        messages.append(AIMessage(content="", tool_calls=[{
+            "name": "search_memory", "args": {"query": f"{topic} preferences"}, "id": call_id,
+        }]))
+        memories = [
+            {"namespace": ["chat_-1001234567"], "key": str(uuid.uuid4()),
+             "value": {"content": f"Member {j} (@member_{j}, ID: {100_000 + j}) likes {topic} with friends"},
+             "created_at": "2026-10-19T10:00:00+00:00", "updated_at": "2026-10-19T10:00:00+00:00", "score": 0.8}
+            for j in range(3)
+        ]
+        messages.append(ToolMessage(content=json.dumps(memories), tool_call_id=call_id, name="search_memory"))
+        messages.append(AIMessage(content=f"Here is what I remember about {topic}: several members enjoy it. " * 2))
+    checkpoint["channel_values"] = {"messages": messages}
+    checkpoint["channel_versions"] = {"messages": 1}
+    return checkpoint
+
+
+def time_ms(func, iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def load_latency(mongo_uri: str, serdes: Dict[str, object], checkpoints: Dict[int, dict], iterations: int):
+    """Write each checkpoint through MongoDBSaver and time aget_tuple"""
+    from pymongo import MongoClient
+    from langgraph.checkpoint.mongodb import MongoDBSaver
+
+    client = MongoClient(mongo_uri)
+    db_name = "telegram_bot_bench"
+    try:
+        for turns, checkpoint in checkpoints.items():
+            for name, serde in serdes.items():
+                saver = MongoDBSaver(client, db_name=db_name, serde=serde)
+                thread_id = f"bench_{uuid.uuid4().hex}"
+                config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+                saved = await saver.aput(config, checkpoint, {"source": "loop", "step": 1}, {"messages": 1})
+                doc_bytes = next(client[db_name]["checkpoints"].aggregate([
+                    {"$match": {"thread_id": thread_id}},
+                    {"$project": {"size": {"$bsonSize": "$$ROOT"}}},
+                ]))["size"]
+                samples = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    await saver.aget_tuple(saved)
+                    samples.append((time.perf_counter() - start) * 1000)
+                await saver.adelete_thread(thread_id)
+                print(format_row(f"{turns} turns {name} load", summarize(samples)) + f"  doc={doc_bytes / 1024:.1f}KiB")
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", default="10,50,200", help="Comma-separated history lengths")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--min-bytes", type=int, default=2048)
+    parser.add_argument("--mongo-uri", help="Also measure MongoDBSaver load latency")
+    args = parser.parse_args()
+
+    serdes = {
+        "current": JsonPlusSerializer(),
+        "zstd": CompressedSerializer(codec="zstd", min_bytes=args.min_bytes),
+        "zlib": CompressedSerializer(codec="zlib", min_bytes=args.min_bytes),
+    }
+    checkpoints = {int(turns): build_checkpoint(int(turns)) for turns in args.turns.split(",")}
+
+    for turns, checkpoint in checkpoints.items():
+        print(f"\n=== {turns} turns ({len(checkpoint['channel_values']['messages'])} messages) ===")
+        baseline = None
+        for name, serde in serdes.items():
+            type_, data = serde.dumps_typed(checkpoint)
+            doc_bytes = len(bson.encode({"type": type_, "checkpoint": data}))
+            baseline = baseline or doc_bytes
+            dumps = summarize(time_ms(lambda: serde.dumps_typed(checkpoint), args.iterations))
+            loads = summarize(time_ms(lambda: serde.loads_typed((type_, data)), args.iterations))
+            print(
+                f"{name:<8} type={type_:<13} size={doc_bytes / 1024:8.1f}KiB ({doc_bytes / baseline:5.1%})  "
+                f"dumps p50={dumps['p50']:6.2f}ms  loads p50={loads['p50']:6.2f}ms"
+            )
+
+    # Checkpoints written before compression must keep loading
+    legacy = serdes["current"].dumps_typed(checkpoints[max(checkpoints)])
+    restored = serdes["zstd"].loads_typed(legacy)
+    assert restored["channel_values"]["messages"] == checkpoints[max(checkpoints)]["channel_values"]["messages"]
+    print("\ncurrent-format checkpoints load through the compressed serializer: ok")
+
+    if args.mongo_uri:
+        print("\n=== MongoDBSaver aget_tuple ===")
+        asyncio.run(load_latency(args.mongo_uri, serdes, checkpoints, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Cross-chat recall for one user: per-user memory index vs searching every chat.
+
+A user belongs to --groups groups (50 by default), each holding --memories
+memories about its members; a few mention the user. Recalling what the
+user said about a topic is measured two ways:
+
+    scan namespaces  look up the user's chats, then search each chat
+                     namespace concurrently (what recall costs without the
+                     index)
+    user index       one bounded query on the per-user memory index
+
+Both are scoped to the chats the user is a member of; --hidden extra
+groups the user is not in also mention them, and must never be returned.
+
+Runs offline against the in-memory backend by default; pass a MongoDB URI
+for the user_memory_index collection and $vectorSearch:
+    python -m benchmarks.cross_chat_recall
+    python -m benchmarks.cross_chat_recall --groups 100 --embedding-latency-ms 80
+    python -m benchmarks.cross_chat_recall --backend mongodb \\
+        --mongo-uri mongodb://localhost:27017/?directConnection=true
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from typing import Dict, List, Set
+from config.settings import Settings
+from storage.backends import create_db_client, create_stores
+from storage.memberships import create_membership_store
+from storage.user_memory_index import create_user_memory_index, rank
+from benchmarks.fakes import FakeEmbeddings
+from benchmarks.reporting import summarize, format_row
+
+TOPICS = ["deadline", "budget", "release", "hiring", "offsite", "pricing", "roadmap", "security"]
+
+
+async def run(args) -> Dict[str, Dict[str, List[float]]]:
+    settings = Settings(
+        telegram_bot_token="benchmark",
+        openai_api_key="",
+        db_name=args.db_name,
+        storage_backend=args.backend,
+        mongo_uri=args.mongo_uri,
+        # Measures searches; the catalog would answer empty chats without one
+        memory_catalog_enabled=False,
+    )
+    # Latency is switched on once the corpus is written
+    embedder = FakeEmbeddings()
+    db_client = await create_db_client(settings)
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:6]
+    user_id = str(rng.randint(10**8, 10**9))
+    who = f"Jordan Lee (@jordan_lee, ID: {user_id})"
+    results: Dict[str, Dict[str, List[float]]] = {}
+
+    try:
+        memory_store, profile_store = await create_stores(settings, db_client, embedder=embedder)
+        membership_store = await create_membership_store(settings, db_client, profile_store)
+        user_index = await create_user_memory_index(
+            settings, db_client, memory_store, profile_store, membership_store
+        )
+        store = memory_store.store
+
+        groups = [f"-100{run_id}{g:04d}" for g in range(args.groups + args.hidden)]
+        visible = set(groups[:args.groups])
+        relevant: Dict[str, Set[tuple]] = {topic: set() for topic in TOPICS}
+        for g, chat_id in enumerate(groups):
+            if chat_id in visible:
+                await membership_store.record_activity(
+                    chat_id, user_id, {"chat_type": "supergroup", "chat_title": f"Group {g}"}, {}
+                )
+            namespace = (f"chat_{chat_id}",)
+            for i in range(args.memories):
+                topic = rng.choice(TOPICS)
+                if rng.random() < args.mention_rate:
+                    content = f"{who} said the {topic} needs another week"
+                    if chat_id in visible:
+                        relevant[topic].add((chat_id, f"mem_{i}"))
+                else:
+                    member = rng.randint(10**8, 10**9)
+                    content = f"Member {i} (@member_{i}, ID: {member}) asked about the {topic}"
+                await store.aput(namespace, f"mem_{i}", {"content": content})
+        if args.backend == "mongodb":
+            # Atlas builds vector indexes asynchronously
+            await asyncio.sleep(args.index_wait)
+        embedder.latency_ms = args.embedding_latency_ms
+
+        async def scan_namespaces(topic: str) -> List[tuple]:
+            chats = await membership_store.get_user_chats(user_id, 500)
+            found = await asyncio.gather(*[
+                memory_store.hybrid.search((f"chat_{chat['chat_id']}",), f"ID: {user_id} {topic}", limit=args.k)
+                for chat in chats
+            ])
+            # Same final ranking as the index, so only the retrieval differs
+            entries = [
+                {"chat_id": item.namespace[0][len("chat_"):], "key": item.key,
+                 "content": item.value["content"], "updated_at": item.updated_at}
+                for items in found for item in items if user_id in item.value["content"]
+            ]
+            return [(entry["chat_id"], entry["key"]) for entry in rank(entries, topic, args.k)]
+
+        async def user_index_recall(topic: str) -> List[tuple]:
+            entries = await user_index.recall(user_id, user_id, topic, limit=args.k)
+            return [(entry["chat_id"], entry["key"]) for entry in entries]
+
+        for mode, recall in (("scan namespaces", scan_namespaces), ("user index", user_index_recall)):
+            samples: Dict[str, List[float]] = {"latency": [], "recall": [], "embeddings": [], "leaked": []}
+            for _ in range(args.rounds):
+                for topic in TOPICS:
+                    calls = embedder.calls
+                    start = time.perf_counter()
+                    found = await recall(topic)
+                    samples["latency"].append((time.perf_counter() - start) * 1000)
+                    samples["embeddings"].append(embedder.calls - calls)
+                    hits = len(set(found) & relevant[topic])
+                    samples["recall"].append(hits / min(args.k, len(relevant[topic])) if relevant[topic] else 1.0)
+                    samples["leaked"].append(sum(1 for chat_id, _ in found if chat_id not in visible))
+            results[mode] = samples
+
+        embedder.latency_ms = 0.0
+        for chat_id in groups:
+            for i in range(args.memories):
+                await store.adelete((f"chat_{chat_id}",), f"mem_{i}")
+        return results
+    finally:
+        if args.backend == "mongodb":
+            db = db_client.sync_client[args.db_name]
+            db["chat_memberships"].delete_many({"user_id": user_id})
+        await db_client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("memory", "mongodb"), default="memory")
+    parser.add_argument("--mongo-uri", default=Settings.mongo_uri)
+    parser.add_argument("--db-name", default="telegram_bot_bench")
+    parser.add_argument("--groups", type=int, default=50, help="Groups the user is a member of")
+    parser.add_argument("--hidden", type=int, default=5, help="Groups mentioning the user that they are not in")
+    parser.add_argument("--memories", type=int, default=100, help="Memories per group")
+    parser.add_argument("--mention-rate", type=float, default=0.05, help="Share of memories about the user")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--embedding-latency-ms", type=float, default=20.0)
+    parser.add_argument("--index-wait", type=float, default=5.0, help="Seconds to wait for Atlas indexes")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    print(f"user in {args.groups} groups, {args.memories} memories per group, recall@{args.k}")
+    for mode, samples in results.items():
+        print(f"\n=== {mode} ===")
+        print(format_row("recall latency", summarize(samples["latency"])))
+        print(f"recall@{args.k}: {sum(samples['recall']) / len(samples['recall']):.3f}  "
+              f"embedding calls per recall: {sum(samples['embeddings']) / len(samples['embeddings']):.1f}  "
+              f"results from groups the user is not in: {int(sum(samples['leaked']))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Deterministic offline stand-ins for OpenAI and Telegram components used by the benchmarks"""
+
+import asyncio
+import hashlib
+import math
+import time
+from types import SimpleNamespace
+from typing import Any, List, Sequence
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class FakeEmbeddings(Embeddings):
+    """Hash-based embeddings with optional simulated latency
+
+    Texts sharing tokens produce similar vectors, so vector search returns
+    meaningful neighbours without calling the OpenAI API.
+    """
+
+    def __init__(self, dims: int = 1536, latency_ms: float = 0.0):
+        self.dims = dims
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dims
+        for token in text.lower().split():
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dims
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+MEMORY_TRIGGERS = ("remember", "i like", "i love", "i prefer", "my name", "i work", "i live")
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic tool-calling chat model with simulated latency
+
+    Mirrors the agent's usual turn shape: a fresh user message triggers a
+    search_memory call (plus manage_memory when the message states a
+    preference), and tool results are answered with a plain reply.
+    """
+
+    latency_ms: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-calling"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "FakeChatModel":
+        return self
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        last = messages[-1]
+        if isinstance(last, ToolMessage):
+            return AIMessage(content=f"Got it. ({len(messages)} messages in context)")
+
+        text = str(last.content).splitlines()[-1] if last.content else ""
+        call_id = hashlib.blake2b(f"{len(messages)}:{text}".encode(), digest_size=6).hexdigest()
+        tool_calls = [{"name": "search_memory", "args": {"query": text}, "id": f"call_s{call_id}"}]
+        if any(trigger in text.lower() for trigger in MEMORY_TRIGGERS):
+            tool_calls.append(
+                {"name": "manage_memory", "args": {"content": text, "action": "create"}, "id": f"call_m{call_id}"}
+            )
+        return AIMessage(content="", tool_calls=tool_calls)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+
+class FakeOpenAIClient:
+    """Drop-in for llm.openai_client.OpenAIClient backed by the fakes above"""
+
+    def __init__(self, llm_latency_ms: float = 0.0, embedding_latency_ms: float = 0.0):
+        self.llm = FakeChatModel(latency_ms=llm_latency_ms)
+        self.embeddings = FakeEmbeddings(latency_ms=embedding_latency_ms)
+
+
+class FakeMessage:
+    """Incoming Telegram message that records replies instead of sending them"""
+
+    def __init__(self, text: str, replies: List[str]):
+        self.text = text
+        self._replies = replies
+
+    async def reply_text(self, text: str, **kwargs):
+        self._replies.append(text)
+
+
+def make_update(update_id: int, chat_id: int, chat_type: str, user_id: int, text: str, replies: List[str]):
+    """Build a minimal synthetic telegram.Update for BotHandlers"""
+    user = SimpleNamespace(id=user_id, username=f"user{user_id}", full_name=f"User {user_id}")
+    title = None if chat_type == "private" else f"Group {abs(chat_id)}"
+    chat = SimpleNamespace(id=chat_id, type=chat_type, title=title)
+    return SimpleNamespace(
+        update_id=update_id, effective_user=user, effective_chat=chat, message=FakeMessage(text, replies)
+    )
@@ -0,0 +1,273 @@
+"""
+Offline load test of the full message path with synthetic Telegram traffic.
+
+Drives BotHandlers.message_handler (agent graph, memory tools, profile and
+chat-context writes) with synthetic updates. The LLM and embeddings are
+deterministic fakes with configurable latency, so no Telegram or OpenAI
+calls are made. Storage is in-process by default, or a real MongoDB when
+--backend mongodb is given (a throwaway database is created and dropped).
+
+Scenarios:
+    many_chats   many private chats, each sending messages in sequence
+    group_burst  groups where several users post at the same moment
+    long_thread  one chat with a long history (checkpoint growth)
+    support_faq  groups where users keep asking paraphrases of a few questions
+                 (run with --response-cache to measure the cache hit rate)
+
+Usage:
+    python -m benchmarks.load_test [--scenario all] [--llm-latency-ms 300] [--concurrency 32]
+    python -m benchmarks.load_test --backend mongodb --mongo-uri mongodb://localhost:27017/?directConnection=true
+    python -m benchmarks.load_test --scenario support_faq --response-cache --llm-latency-ms 300
+    python -m benchmarks.load_test --record traffic.ndjson   # input for benchmarks.replay_traffic
+"""
+
+import argparse
+import asyncio
+import itertools
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+from pymongo import monitoring
+from config.settings import Settings
+from storage.backends import DBClient, create_db_client, create_stores
+from storage.memberships import create_membership_store
+from storage.update_journal import create_update_journal
+from storage.user_memory_index import create_user_memory_index
+from memory.user_manager import UserManager
+from agents.langmem_agent import LangMemAgent
+from bot.handlers import BotHandlers
+from utils.logger import configure_logger, flush_logger
+from utils.metrics import metrics
+from utils.traffic import TrafficRecorder
+from benchmarks.fakes import FakeOpenAIClient, make_update
+from benchmarks.reporting import summarize, format_row
+
+TOPICS = ["pizza", "coffee", "meetings", "deadline", "python", "travel", "music", "budget"]
+ERROR_REPLY = "Sorry, I encountered an error"
+# Shared across scenarios: the update journal skips update IDs it has already completed
+UPDATE_IDS = itertools.count(1)
+FAQ = [
+    ["When is the deadline?", "when is the deadline", "What is the deadline?", "so when is the deadline exactly?"],
+    ["Where is the meeting?", "where is the meeting today", "Where is the meeting held?"],
+    ["What is the budget?", "what's the budget", "What is the budget for this?"],
+]
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts MongoDB commands issued by every client in the process"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        with self._lock:
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def _text(i: int, user_id: int) -> str:
+    topic = TOPICS[(i + user_id) % len(TOPICS)]
+    if i % 4 == 0:
+        return f"Remember that I like {topic}"
+    return f"What do you know about {topic}? (message {i})"
+
+
+def build_scenario(name: str, scale: int) -> List[List[List[dict]]]:
+    """Return streams of batches; streams run concurrently, batch members arrive together"""
+    streams = []
+    if name == "many_chats":
+        for c in range(scale * 10):
+            user_id = 10_000 + c
+            streams.append([
+                [dict(chat_id=user_id, chat_type="private", user_id=user_id, text=_text(i, user_id))]
+                for i in range(5)
+            ])
+    elif name == "group_burst":
+        for g in range(scale):
+            chat_id = -1_000_000 - g
+            users = [20_000 + g * 100 + u for u in range(8)]
+            streams.append([
+                [dict(chat_id=chat_id, chat_type="supergroup", user_id=u, text=_text(b, u)) for u in users]
+                for b in range(5)
+            ])
+    elif name == "long_thread":
+        user_id = 30_000
+        streams.append([
+            [dict(chat_id=user_id, chat_type="private", user_id=user_id, text=_text(i, user_id))]
+            for i in range(scale * 20)
+        ])
+    elif name == "support_faq":
+        for g in range(scale):
+            chat_id = -2_000_000 - g
+            users = [40_000 + g * 100 + u for u in range(6)]
+            streams.append([
+                [dict(chat_id=chat_id, chat_type="supergroup", user_id=users[(b + i) % len(users)],
+                      text=FAQ[(b + i) % len(FAQ)][(b * 2 + i) % len(FAQ[(b + i) % len(FAQ)])])]
+                for b in range(10) for i in range(3)
+            ])
+    else:
+        raise ValueError(f"Unknown scenario: {name}")
+    return streams
+
+
+async def build_handlers(
+    settings: Settings, openai_client, recorder: Optional[TrafficRecorder] = None
+) -> Tuple[BotHandlers, LangMemAgent, DBClient]:
+    """Wire stores, agent and handlers the way main.initialize_app does, around a fake OpenAI client"""
+    db_client = await create_db_client(settings)
+    memory_store, profile_store = await create_stores(settings, db_client, embedder=openai_client.embeddings)
+    membership_store = await create_membership_store(settings, db_client, profile_store)
+    user_memory_index = await create_user_memory_index(
+        settings, db_client, memory_store, profile_store, membership_store
+    )
+    agent = LangMemAgent(settings, db_client, memory_store, openai_client, user_memory_index)
+    await agent.initialize()
+    journal = await create_update_journal(settings, db_client)
+    user_manager = UserManager(profile_store, memory_store, membership_store)
+    handlers = BotHandlers(agent, user_manager, recorder=recorder, journal=journal)
+    return handlers, agent, db_client
+
+
+def _storage_ops() -> int:
+    return (
+        metrics.histogram("store_operation_seconds").total_count()
+        + metrics.histogram("checkpoint_operation_seconds").total_count()
+    )
+
+
+async def run_scenario(
+    name: str,
+    handlers: BotHandlers,
+    openai_client: FakeOpenAIClient,
+    scale: int,
+    concurrency: int,
+    command_counter: Optional[CommandCounter],
+) -> Dict[str, object]:
+    streams = build_scenario(name, scale)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    replies: List[str] = []
+
+    async def handle(message: dict):
+        update = make_update(next(UPDATE_IDS), replies=replies, **message)
+        async with semaphore:
+            start = time.perf_counter()
+            await handlers.message_handler(update, None)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    async def run_stream(batches: List[List[dict]]):
+        for batch in batches:
+            await asyncio.gather(*(handle(message) for message in batch))
+
+    llm_calls, embed_calls = openai_client.llm.calls, openai_client.embeddings.calls
+    storage_ops = _storage_ops()
+    commands = command_counter.count if command_counter else 0
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_stream(stream) for stream in streams))
+    elapsed = time.perf_counter() - start
+
+    total = len(latencies)
+    result = {
+        "messages": total,
+        "seconds": elapsed,
+        "throughput": total / elapsed if elapsed else 0.0,
+        "latency": summarize(latencies),
+        "errors": sum(1 for reply in replies if reply.startswith(ERROR_REPLY)),
+        "llm_calls": (openai_client.llm.calls - llm_calls) / total,
+        "embed_calls": (openai_client.embeddings.calls - embed_calls) / total,
+        "storage_ops": (_storage_ops() - storage_ops) / total,
+        "mongo_commands": (command_counter.count - commands) / total if command_counter else None,
+    }
+    if name == "long_thread":
+        tenth = max(1, total // 10)
+        result["first_decile"] = summarize(latencies[:tenth])
+        result["last_decile"] = summarize(latencies[-tenth:])
+    return result
+
+
+def print_result(name: str, result: Dict[str, object]):
+    print(f"\n== {name}: {result['messages']} messages in {result['seconds']:.2f}s "
+          f"({result['throughput']:.1f} msg/s, {result['errors']} errors)")
+    print(format_row("message latency", result["latency"]))
+    if "first_decile" in result:
+        print(format_row("first 10% of thread", result["first_decile"]))
+        print(format_row("last 10% of thread", result["last_decile"]))
+    per_message = (
+        f"per message: {result['llm_calls']:.2f} LLM calls, {result['embed_calls']:.2f} embedding calls, "
+        f"{result['storage_ops']:.1f} store/checkpoint ops"
+    )
+    if result["mongo_commands"] is not None:
+        per_message += f", {result['mongo_commands']:.1f} MongoDB commands"
+    print(per_message)
+    lookups = metrics.counter("response_cache_lookups_total")
+    hits, misses = lookups.value(result="hit"), lookups.value(result="miss")
+    if hits + misses:
+        saved = metrics.counter("response_cache_saved_seconds_total").value()
+        print(f"response cache (cumulative): {hits / (hits + misses):.0%} hit rate, {saved:.2f}s agent time saved")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="all",
+                        choices=["all", "many_chats", "group_burst", "long_thread", "support_faq"])
+    parser.add_argument("--scale", type=int, default=2, help="Scenario size multiplier")
+    parser.add_argument("--concurrency", type=int, default=32, help="Max in-flight handlers")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0)
+    parser.add_argument("--backend", default="memory", choices=["memory", "mongodb"])
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/?directConnection=true")
+    parser.add_argument("--response-cache", action="store_true", help="Enable the semantic response cache")
+    parser.add_argument("--record", help="Also record the generated traffic to this NDJSON file")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    command_counter = None
+    if args.backend == "mongodb":
+        # Must be registered before the clients are created
+        command_counter = CommandCounter()
+        monitoring.register(command_counter)
+
+    settings = Settings(
+        telegram_bot_token="offline",
+        openai_api_key="offline",
+        mongo_uri=args.mongo_uri,
+        db_name=f"load_test_{uuid.uuid4().hex[:8]}",
+        storage_backend=args.backend,
+        response_cache_enabled=args.response_cache,
+    )
+    scenarios = ["many_chats", "group_burst", "long_thread", "support_faq"] if args.scenario == "all" else [args.scenario]
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        configure_logger(log_dir=log_dir, level=args.log_level)
+
+        openai_client = FakeOpenAIClient(args.llm_latency_ms, args.embedding_latency_ms)
+        recorder = TrafficRecorder(args.record, anonymize=False) if args.record else None
+        handlers, agent, db_client = await build_handlers(settings, openai_client, recorder)
+
+        print(f"backend={args.backend} concurrency={args.concurrency} "
+              f"llm_latency={args.llm_latency_ms}ms embedding_latency={args.embedding_latency_ms}ms")
+        try:
+            for name in scenarios:
+                result = await run_scenario(name, handlers, openai_client, args.scale, args.concurrency, command_counter)
+                print_result(name, result)
+        finally:
+            await agent.close()
+            if args.backend == "mongodb":
+                db_client.sync_client.drop_database(settings.db_name)
+            await db_client.close()
+            if recorder is not None:
+                recorder.close()
+            flush_logger()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""
+Measure event-loop latency added by logging at a fixed message rate.
+
+Simulates the per-message log lines of BotHandlers.message_handler at
+500 messages/second and measures (a) time spent inside logging calls on
+the event loop and (b) event-loop lag seen by a 1ms ticker, comparing
+synchronous sinks (previous setup) with the background log writer.
+
+Both setups run twice: with a console that keeps up, and with one that
+stalls --slow-io-ms on each write (a slow terminal, a full pipe to a
+container log driver, a busy disk). The stalled console is where the
+background writer pays off; with a fast console the two should be close.
+
+Usage:
+    python -m benchmarks.logging_latency [--rate 500] [--seconds 5] [--slow-io-ms 0.5]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from loguru import logger
+from utils.logger import configure_logger, flush_logger
+from benchmarks.reporting import summarize, format_row
+
+
+class _SlowStream:
+    """Discarding stream whose writes take a fixed time"""
+
+    def __init__(self, delay_ms: float):
+        self.delay = delay_ms / 1000
+
+    def write(self, text: str):
+        if self.delay:
+            time.sleep(self.delay)
+
+    def flush(self):
+        pass
+
+
+async def _ticker(stop: asyncio.Event, lags_ms: list):
+    """Record how late 1ms sleeps wake up"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags_ms.append((time.perf_counter() - start - 0.001) * 1000)
+
+
+async def _producer(rate: int, seconds: float, log_ms: list):
+    """Emit the handler's log lines at the given message rate"""
+    interval = 1.0 / rate
+    total = int(rate * seconds)
+    next_at = time.perf_counter()
+    for i in range(total):
+        user_id, chat_id = 100000 + i % 977, -100000 - i % 53
+        start = time.perf_counter()
+        logger.info("Received message from {} (@{}) in chat {} ({})", user_id, f"user{user_id}", chat_id, "group")
+        logger.debug("Response generated for user={}, chat={}", user_id, chat_id)
+        logger.info("Sent response to user {} in chat {}", user_id, chat_id)
+        logger.info("Stored/Updated profile for user {} (@{})", user_id, f"user{user_id}")
+        log_ms.append((time.perf_counter() - start) * 1000)
+
+        next_at += interval
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)
+
+
+async def run_scenario(background: bool, rate: int, seconds: float, log_dir: str, slow_io_ms: float):
+    configure_logger(log_dir=log_dir, level="INFO", background=background, console_stream=_SlowStream(slow_io_ms))
+    stop = asyncio.Event()
+    lags_ms, log_ms = [], []
+    ticker = asyncio.create_task(_ticker(stop, lags_ms))
+    await _producer(rate, seconds, log_ms)
+    stop.set()
+    await ticker
+    flush_logger()
+    return log_ms, lags_ms
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=500, help="Messages per second")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--slow-io-ms", type=float, default=0.5, help="Console write stall of the stalled scenario")
+    args = parser.parse_args()
+
+    consoles = (("fast console", 0.0), (f"console stalls {args.slow_io_ms}ms", args.slow_io_ms))
+    results = {}
+    with tempfile.TemporaryDirectory() as log_dir:
+        for console, slow_io_ms in consoles:
+            for setup, background in (("sync sinks", False), ("background writer", True)):
+                results[console, setup] = await run_scenario(background, args.rate, args.seconds, log_dir, slow_io_ms)
+
+    logger.remove()
+    print(f"\n{args.rate} msg/s for {args.seconds:.0f}s (4 log calls per message)")
+    for console, _ in consoles:
+        print(f"\n{console}")
+        for setup in ("sync sinks", "background writer"):
+            log_ms, lags_ms = results[console, setup]
+            print(format_row(f"{setup}: log calls/msg", summarize(log_ms)))
+            print(format_row(f"{setup}: loop lag", summarize(lags_ms)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,169 @@
+"""
+Compare vector-only and hybrid memory search on a synthetic per-chat corpus.
+
+Each chat holds memories in the bot's "Full Name (@username, ID: ...)"
+format about a handful of members. Queries name a member by @username, by
+ID or by full name, or ask about a topic; recall@k is measured against the
+memories that are actually about that member or topic.
+
+Runs offline against the in-memory backend by default; pass a MongoDB Atlas
+(or atlas-local) URI to include the text index and $vectorSearch:
+    docker run -p 27017:27017 mongodb/mongodb-atlas-local
+
+Usage:
+    python -m benchmarks.memory_retrieval
+    python -m benchmarks.memory_retrieval --chats 50 --members 20 --memories 400
+    python -m benchmarks.memory_retrieval --backend mongodb \\
+        --mongo-uri mongodb://localhost:27017/?directConnection=true
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+from config.settings import Settings
+from storage.backends import create_db_client, create_stores
+from benchmarks.fakes import FakeEmbeddings
+from benchmarks.reporting import summarize, format_row
+
+FIRST_NAMES = ["Aarav", "Priya", "Liam", "Sofia", "Kenji", "Amara", "Mateo", "Chloe", "Ravi", "Elena",
+               "Omar", "Hana", "Lucas", "Zara", "Ivan", "Maya", "Noah", "Leila", "Diego", "Anya"]
+LAST_NAMES = ["Sharma", "Smith", "Garcia", "Tanaka", "Okafor", "Rossi", "Kim", "Novak", "Haddad", "Silva"]
+TOPICS = ["hiking", "sushi", "chess", "jazz", "espresso", "marathons", "pottery", "kubernetes",
+          "gardening", "photography", "salsa", "astronomy", "podcasts", "cycling", "baking", "poetry"]
+TEMPLATES = [
+    "{who} likes {topic} and talks about it often",
+    "{who} asked the group for advice about {topic}",
+    "{who} prefers {topic} over most other things",
+    "{who} mentioned they started {topic} last month",
+    "{who} shared a long story about {topic} with the chat",
+]
+
+Query = Tuple[str, str, Set[str]]
+
+
+def build_corpus(chat_index: int, members: int, memories: int, rng: random.Random):
+    """Memories and labelled queries for one chat"""
+    people = []
+    for m in range(members):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        user_id = str(100_000_000 + chat_index * 1_000 + m)
+        people.append((f"{first} {last}", f"{first.lower()}_{last.lower()}{m}", user_id))
+
+    items: Dict[str, str] = {}
+    by_person: Dict[str, Set[str]] = defaultdict(set)
+    by_topic: Dict[str, Set[str]] = defaultdict(set)
+    for i in range(memories):
+        person = rng.choice(people)
+        topic = rng.choice(TOPICS)
+        key = f"mem_{i}"
+        who = f"{person[0]} (@{person[1]}, ID: {person[2]})"
+        items[key] = rng.choice(TEMPLATES).format(who=who, topic=topic)
+        by_person[person[2]].add(key)
+        by_topic[topic].add(key)
+
+    queries: List[Query] = []
+    for full_name, username, user_id in people:
+        if not by_person[user_id]:
+            continue
+        relevant = by_person[user_id]
+        queries.append(("username", f"What does @{username} enjoy?", relevant))
+        queries.append(("user id", f"Preferences of the user with ID: {user_id}", relevant))
+        queries.append(("full name", f"What do we know about {full_name}?", relevant))
+    for topic, relevant in by_topic.items():
+        queries.append(("topic", f"Who is into {topic}?", relevant))
+    return items, queries
+
+
+async def run(args) -> Dict[str, Dict[str, List[float]]]:
+    settings = Settings(
+        telegram_bot_token="benchmark",
+        openai_api_key="",
+        db_name=args.db_name,
+        storage_backend=args.backend,
+        mongo_uri=args.mongo_uri,
+        memory_search_prefilter_max=args.prefilter_max,
+        # Searches only; the catalog would also answer the smallest chats without searching
+        memory_catalog_enabled=False,
+    )
+    embedder = FakeEmbeddings(latency_ms=args.embedding_latency_ms)
+    db_client = await create_db_client(settings)
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+    # mode -> metric -> samples, where metric is "<query kind> latency" / "<query kind> recall" / "embeddings"
+    results: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+
+    try:
+        memory_store, _ = await create_stores(settings, db_client, embedder=embedder)
+        store = memory_store.store
+        corpora = []
+        for c in range(args.chats):
+            namespace = (f"chat_bench_{run_id}_{c}",)
+            items, queries = build_corpus(c, args.members, args.memories, rng)
+            for key, content in items.items():
+                await store.aput(namespace, key, {"content": content})
+            corpora.append((namespace, items, queries))
+        if args.backend == "mongodb":
+            # Atlas builds vector indexes asynchronously
+            await asyncio.sleep(args.index_wait)
+
+        modes = {
+            "vector": lambda ns, q: store.asearch(ns, query=q, limit=args.k),
+            "hybrid": lambda ns, q: memory_store.hybrid.search(ns, q, limit=args.k),
+        }
+        for mode, search in modes.items():
+            for namespace, _, queries in corpora:
+                for kind, query, relevant in queries:
+                    calls = embedder.calls
+                    start = time.perf_counter()
+                    found = await search(namespace, query)
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    hits = len({item.key for item in found} & relevant)
+                    results[mode][f"{kind} latency"].append(elapsed_ms)
+                    results[mode][f"{kind} recall"].append(hits / min(args.k, len(relevant)))
+                    results[mode]["embeddings"].append(embedder.calls - calls)
+
+        for namespace, items, _ in corpora:
+            for key in items:
+                await store.adelete(namespace, key)
+        return results
+    finally:
+        await db_client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("memory", "mongodb"), default="memory")
+    parser.add_argument("--mongo-uri", default=Settings.mongo_uri)
+    parser.add_argument("--db-name", default="telegram_bot_bench")
+    parser.add_argument("--chats", type=int, default=10)
+    parser.add_argument("--members", type=int, default=15, help="Members mentioned per chat")
+    parser.add_argument("--memories", type=int, default=300, help="Memories per chat")
+    parser.add_argument("--k", type=int, default=10, help="Results per search (recall@k)")
+    parser.add_argument("--prefilter-max", type=int, default=Settings.memory_search_prefilter_max)
+    parser.add_argument("--embedding-latency-ms", type=float, default=20.0)
+    parser.add_argument("--index-wait", type=float, default=5.0, help="Seconds to wait for Atlas indexes")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    for mode, samples in results.items():
+        print(f"\n=== {mode} ===")
+        for label, values in samples.items():
+            if label.endswith("latency"):
+                print(format_row(label, summarize(values)))
+        recalls = "  ".join(
+            f"{label.removesuffix(' recall')}={sum(values) / len(values):.3f}"
+            for label, values in samples.items() if label.endswith("recall")
+        )
+        embeddings = samples["embeddings"]
+        print(f"recall@{args.k}: {recalls}")
+        print(f"embedding calls per search: {sum(embeddings) / len(embeddings):.2f}")
+
+
+if __name__ == "__main__":
+    main()
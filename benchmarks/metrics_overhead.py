@@ -0,0 +1,133 @@
+"""
+Measure the per-call overhead of the metrics instrumentation.
+
+Times each wrapper the message path runs against the bare call it wraps
+and flags any that adds more than the budget per call:
+
+    @timed                  agent and handler entry points
+    metrics.timer           per-stage blocks, with labels
+    instrument_methods      store and checkpointer methods (timer + traffic tracing)
+    Histogram.observe       direct observations with labels
+
+A message turn crosses roughly 20 instrumented calls and spends >100ms in
+upstream I/O, so a 10µs budget keeps instrumentation well under 0.2%.
+check.py runs the same measurement on every host and fails over budget.
+
+Usage:
+    python -m benchmarks.metrics_overhead [--calls 200000] [--budget-us 10]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, Tuple
+from utils.metrics import instrument_methods, metrics, timed
+
+INSTRUMENTED_CALLS_PER_TURN = 20
+RUNS = 5
+
+
+async def _noop():
+    return None
+
+
+@timed("benchmark_overhead_seconds", op="noop")
+async def _timed_noop():
+    return None
+
+
+async def _stage_noop():
+    with metrics.timer("benchmark_overhead_seconds", op="stage", stage="invoke"):
+        await _noop()
+
+
+class _Store:
+    """Stands in for a LangGraph store whose methods get instrumented"""
+
+    async def aget(self):
+        return None
+
+
+def _observe():
+    metrics.histogram("benchmark_overhead_seconds").observe(0.001, op="observe", store="bench")
+
+
+def _bare_sync():
+    return None
+
+
+async def _measure(func, calls: int) -> float:
+    """Return seconds per call (best of RUNS runs)"""
+    best = float("inf")
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        for _ in range(calls):
+            await func()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+def _measure_sync(func, calls: int) -> float:
+    """Return seconds per call (best of RUNS runs)"""
+    best = float("inf")
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+async def measure(calls: int) -> Dict[str, Tuple[float, float]]:
+    """Seconds per call of each wrapper and of the bare call it wraps"""
+    store = instrument_methods(_Store(), ("aget",), "benchmark_overhead_seconds", store="bench")
+    bare = await _measure(_noop, calls)
+    bare_method = await _measure(_Store().aget, calls)
+    bare_sync = _measure_sync(_bare_sync, calls)
+    # Label set each wrapper records under, to confirm every call was observed
+    histogram = metrics.histogram("benchmark_overhead_seconds")
+    labels = {
+        "@timed": {"op": "noop"},
+        "metrics.timer": {"op": "stage", "stage": "invoke"},
+        "instrument_methods": {"op": "aget", "store": "bench"},
+        "Histogram.observe": {"op": "observe", "store": "bench"},
+    }
+    recorded = {label: histogram.count(**label_set) for label, label_set in labels.items()}
+    results = {
+        "@timed": (await _measure(_timed_noop, calls), bare),
+        "metrics.timer": (await _measure(_stage_noop, calls), bare),
+        "instrument_methods": (await _measure(store.aget, calls), bare_method),
+        "Histogram.observe": (_measure_sync(_observe, calls), bare_sync),
+    }
+    for label, label_set in labels.items():
+        samples = histogram.count(**label_set) - recorded[label]
+        assert samples == calls * RUNS, f"{label}: expected {calls * RUNS} samples, got {samples}"
+    return results
+
+
+def overhead_us(instrumented: float, baseline: float) -> float:
+    """Added microseconds per call"""
+    return max(0.0, (instrumented - baseline) * 1e6)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--budget-us", type=float, default=10.0, help="Max overhead per instrumented call")
+    parser.add_argument("--turn-ms", type=float, default=100.0, help="Reference message turn latency")
+    args = parser.parse_args()
+
+    results = await measure(args.calls)
+    print(f"{'wrapper':<20} {'bare':>10} {'wrapped':>10} {'overhead':>10} {'per turn':>10}")
+    for label, (instrumented, baseline) in results.items():
+        added = overhead_us(instrumented, baseline)
+        per_turn_pct = added * INSTRUMENTED_CALLS_PER_TURN / (args.turn_ms * 1000) * 100
+        flag = "  over budget" if added > args.budget_us else ""
+        print(f"{label:<20} {baseline * 1e6:8.3f}µs {instrumented * 1e6:8.3f}µs "
+              f"{added:8.3f}µs {per_turn_pct:9.4f}%{flag}")
+    print(f"\nbudget {args.budget_us} µs per call; per turn = {INSTRUMENTED_CALLS_PER_TURN} calls "
+          f"in a {args.turn_ms:.0f} ms turn")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+"""
+Measure the search_memory tool with and without the namespace catalog.
+
+Builds chats whose memory counts follow the bot's typical spread (many
+empty or near-empty chats, a few busy ones) and runs the agent's
+search_memory tool against each, once on a store without the catalog and
+once with it. Reports search latency and embedding calls by chat size,
+whether both return the same memories, and what the catalog adds to each
+memory write.
+
+Runs offline against the in-memory backend by default; pass a MongoDB URI
+to measure the memory_catalog collection:
+    python -m benchmarks.namespace_catalog
+    python -m benchmarks.namespace_catalog --chats 500 --embedding-latency-ms 80
+    python -m benchmarks.namespace_catalog --backend mongodb \\
+        --mongo-uri mongodb://localhost:27017/?directConnection=true
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+from config.settings import Settings
+from storage.backends import create_db_client, create_stores
+from agents.memory_tools import create_memory_search_tool
+from benchmarks.fakes import FakeEmbeddings
+from benchmarks.reporting import summarize, format_row
+
+TOPICS = ["deadline", "budget", "meetings", "travel", "pizza", "python", "music", "coffee"]
+# (share of chats, memory count range)
+SPREAD = [(0.40, (0, 0)), (0.40, (1, 4)), (0.15, (5, 20)), (0.05, (50, 150))]
+
+
+def size_class(count: int) -> str:
+    if count == 0:
+        return "empty"
+    if count < 5:
+        return "1-4"
+    if count <= 20:
+        return "5-20"
+    return "50+"
+
+
+async def run(args) -> Dict[str, Dict[str, List[float]]]:
+    embedder = FakeEmbeddings(latency_ms=args.embedding_latency_ms)
+    base = dict(telegram_bot_token="benchmark", openai_api_key="", db_name=args.db_name,
+                storage_backend=args.backend, mongo_uri=args.mongo_uri)
+    db_client = await create_db_client(Settings(**base))
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+    counts = []
+    for share, (low, high) in SPREAD:
+        counts += [rng.randint(low, high) for _ in range(round(args.chats * share))]
+    # mode -> metric -> samples
+    results: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+    mismatches = 0
+
+    try:
+        stores = {}
+        for mode, catalog in (("no catalog", False), ("catalog", True)):
+            settings = Settings(**base, memory_catalog_enabled=catalog)
+            stores[mode], _ = await create_stores(settings, db_client, embedder=embedder)
+
+        found: Dict[str, List[set]] = defaultdict(list)
+        for mode, memory_store in stores.items():
+            for c, count in enumerate(counts):
+                namespace = (f"chat_bench_{run_id}_{mode.replace(' ', '_')}_{c}",)
+                for i in range(count):
+                    start = time.perf_counter()
+                    await memory_store.store.aput(namespace, f"mem_{i}", {
+                        "content": f"Member {i % 7} (@member_{i % 7}, ID: {100 + i % 7}) mentioned {TOPICS[i % len(TOPICS)]}"
+                    })
+                    results[mode]["write latency"].append((time.perf_counter() - start) * 1000)
+
+            if args.backend == "mongodb":
+                # Atlas builds vector indexes asynchronously
+                await asyncio.sleep(args.index_wait)
+
+            for c, count in enumerate(counts):
+                namespace = (f"chat_bench_{run_id}_{mode.replace(' ', '_')}_{c}",)
+                tool = create_memory_search_tool(memory_store, namespace, scan_max=args.scan_max)
+                calls = embedder.calls
+                start = time.perf_counter()
+                output = await tool.ainvoke({"query": f"What is the {TOPICS[c % len(TOPICS)]}?"})
+                results[mode][f"{size_class(count)} search latency"].append((time.perf_counter() - start) * 1000)
+                results[mode]["embeddings"].append(embedder.calls - calls)
+                found[mode].append({item["key"] for item in json.loads(output)})
+
+            for c, count in enumerate(counts):
+                namespace = (f"chat_bench_{run_id}_{mode.replace(' ', '_')}_{c}",)
+                for i in range(count):
+                    await memory_store.store.adelete(namespace, f"mem_{i}")
+
+        for count, without, with_catalog in zip(counts, found["no catalog"], found["catalog"]):
+            # Bigger namespaces go through the same search either way
+            if count <= args.scan_max and without != with_catalog:
+                mismatches += 1
+        results["catalog"]["mismatches"].append(mismatches)
+        return results
+    finally:
+        if args.backend == "mongodb":
+            db_client.sync_client[args.db_name]["memory_catalog"].delete_many({"_id": {"$regex": f"^chat_bench_{run_id}_"}})
+        await db_client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("memory", "mongodb"), default="memory")
+    parser.add_argument("--mongo-uri", default=Settings.mongo_uri)
+    parser.add_argument("--db-name", default="telegram_bot_bench")
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--scan-max", type=int, default=Settings.memory_catalog_scan_max)
+    parser.add_argument("--embedding-latency-ms", type=float, default=20.0)
+    parser.add_argument("--index-wait", type=float, default=5.0, help="Seconds to wait for Atlas indexes")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    for mode, samples in results.items():
+        print(f"\n=== {mode} ===")
+        for label in ("empty search latency", "1-4 search latency", "5-20 search latency",
+                      "50+ search latency", "write latency"):
+            if samples.get(label):
+                print(format_row(label, summarize(samples[label])))
+        embeddings = samples["embeddings"]
+        print(f"embedding calls per search: {sum(embeddings) / len(embeddings):.2f}")
+    print(f"\nchats of at most {args.scan_max} memories with different results: "
+          f"{int(results['catalog']['mismatches'][0])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Replay recorded traffic against the current build to catch latency and throughput regressions.
+
+Reads a recording written by utils.traffic.TrafficRecorder (TRAFFIC_RECORD_PATH
+in production, or benchmarks.load_test --record) and feeds every update to
+BotHandlers.message_handler at its recorded arrival offset divided by
+--speed ("max" sends everything at once, limited by --concurrency).
+
+Upstream calls never leave the process:
+    --upstream recorded  the chat model returns each turn's recorded tool
+                         calls and replies with the recorded latency
+                         (anonymized recordings keep tool names and lengths)
+    --upstream stub      deterministic fake model with --llm-latency-ms
+
+Storage is in-process by default, or a throwaway MongoDB database with
+--backend mongodb. Save a report with --save-report and compare a later run
+against it with --baseline; the run fails if p95 latency regresses by more
+than --max-regression percent.
+
+Usage:
+    python -m benchmarks.replay_traffic traffic.ndjson --speed 10 --save-report main.json
+    python -m benchmarks.replay_traffic traffic.ndjson --speed 10 --baseline main.json --max-regression 15
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from config.settings import Settings
+from utils.logger import configure_logger, flush_logger
+from utils.traffic import TrafficRecorder, load_recording
+from benchmarks.fakes import FakeChatModel, FakeOpenAIClient, make_update
+from benchmarks.load_test import build_handlers
+from benchmarks.reporting import summarize, format_row
+
+# Recorded LLM calls still to be served for the turn being replayed
+_llm_script: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("llm_script", default=None)
+
+STAGES = {
+    "llm": "llm",
+    "tool": "tools",
+    "store_operation_seconds": "store",
+    "checkpoint_operation_seconds": "checkpoint",
+}
+
+
+class ReplayChatModel(FakeChatModel):
+    """Serves each turn's recorded LLM calls in order, with their recorded latency"""
+
+    def _replay(self, messages) -> Optional[tuple]:
+        script = _llm_script.get()
+        if not script:
+            return None
+        call = script.pop(0)
+        text = str(messages[-1].content).splitlines()[-1] if messages[-1].content else ""
+        tool_calls = []
+        for i, tool_call in enumerate(call.get("tool_calls") or []):
+            args = tool_call.get("args")
+            if args is None:
+                # Anonymized recording: rebuild plausible arguments from the replayed text
+                args = {"query": text} if tool_call["name"] == "search_memory" else {"content": text, "action": "create"}
+            tool_calls.append({"name": tool_call["name"], "args": args, "id": f"call_{uuid.uuid4().hex[:12]}_{i}"})
+        if tool_calls:
+            message = AIMessage(content="", tool_calls=tool_calls)
+        else:
+            content = call.get("content")
+            message = AIMessage(content=content if content is not None else "x" * call.get("content_chars", 40))
+        return message, call.get("ms", 0.0)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        replayed = self._replay(messages)
+        if replayed is None:
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        self.calls += 1
+        message, latency_ms = replayed
+        await asyncio.sleep(latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def stage_totals(record: Dict[str, Any]) -> Dict[str, float]:
+    """Sum a turn's recorded call time per stage"""
+    totals: Dict[str, float] = defaultdict(float)
+    for call in record.get("calls", []):
+        stage = STAGES.get(call["kind"])
+        if stage:
+            totals[stage] += call["ms"]
+    return totals
+
+
+def build_report(records: List[Dict[str, Any]], e2e_ms: Optional[List[float]] = None, seconds: float = 0.0) -> Dict:
+    report = {"turns": len(records), "handler": summarize([r["handler_ms"] for r in records])}
+    for stage in STAGES.values():
+        report[stage] = summarize([stage_totals(r).get(stage, 0.0) for r in records])
+    if e2e_ms is not None:
+        report["end_to_end"] = summarize(e2e_ms)
+        report["throughput"] = len(records) / seconds if seconds else 0.0
+    return report
+
+
+def print_report(label: str, report: Dict):
+    print(f"\n== {label} ({report['turns']} turns"
+          + (f", {report['throughput']:.1f} msg/s" if "throughput" in report else "") + ")")
+    if "end_to_end" in report:
+        print(format_row("end to end (incl. queueing)", report["end_to_end"]))
+    print(format_row("handler", report["handler"]))
+    for stage in STAGES.values():
+        print(format_row(f"  {stage} per turn", report[stage]))
+
+
+async def replay(records: List[Dict[str, Any]], handlers, speed: Optional[float], concurrency: int) -> tuple:
+    """Dispatch updates at their (scaled) recorded offsets; return end-to-end latencies and wall time"""
+    semaphore = asyncio.Semaphore(concurrency)
+    e2e_ms: List[float] = []
+    replies: List[str] = []
+    t0 = records[0]["ts"]
+
+    async def handle(record: Dict[str, Any], update_id: int, arrived: float):
+        update = make_update(
+            update_id, record["chat_id"], record["chat_type"], record["user_id"], record["text"], replies
+        )
+        llm_calls = [call for call in record.get("calls", []) if call["kind"] == "llm" and not call.get("error")]
+        _llm_script.set(llm_calls)
+        async with semaphore:
+            await handlers.message_handler(update, None)
+        e2e_ms.append((time.perf_counter() - arrived) * 1000)
+
+    start = time.perf_counter()
+    tasks = []
+    for update_id, record in enumerate(records, start=1):
+        if speed:
+            delay = start + (record["ts"] - t0) / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(handle(record, update_id, time.perf_counter())))
+    await asyncio.gather(*tasks)
+    return e2e_ms, time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", help="NDJSON file written by TrafficRecorder")
+    parser.add_argument("--speed", default="1", help="Arrival speed-up factor (1, 10, ...) or 'max'")
+    parser.add_argument("--concurrency", type=int, default=32, help="Max in-flight handlers")
+    parser.add_argument("--upstream", default="recorded", choices=["recorded", "stub"])
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Stub model latency")
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0)
+    parser.add_argument("--limit", type=int, help="Replay only the first N turns")
+    parser.add_argument("--backend", default="memory", choices=["memory", "mongodb"])
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/?directConnection=true")
+    parser.add_argument("--save-report", help="Write the replay report as JSON")
+    parser.add_argument("--baseline", help="Report from an earlier replay to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="Allowed p95 increase in percent")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    records = load_recording(args.recording)[:args.limit]
+    if not records:
+        sys.exit(f"No turns in {args.recording}")
+    speed = None if args.speed == "max" else float(args.speed)
+
+    settings = Settings(
+        telegram_bot_token="offline",
+        openai_api_key="offline",
+        mongo_uri=args.mongo_uri,
+        db_name=f"replay_{uuid.uuid4().hex[:8]}",
+        storage_backend=args.backend,
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        configure_logger(log_dir=tmp_dir, level=args.log_level)
+
+        openai_client = FakeOpenAIClient(args.llm_latency_ms, args.embedding_latency_ms)
+        if args.upstream == "recorded":
+            openai_client.llm = ReplayChatModel()
+        # Record the replay itself to get the same per-stage breakdown as the input
+        replay_path = Path(tmp_dir) / "replay.ndjson"
+        recorder = TrafficRecorder(str(replay_path), anonymize=False)
+        handlers, agent, db_client = await build_handlers(settings, openai_client, recorder)
+
+        print(f"Replaying {len(records)} turns at speed={args.speed} upstream={args.upstream} "
+              f"backend={args.backend} concurrency={args.concurrency}")
+        try:
+            e2e_ms, seconds = await replay(records, handlers, speed, args.concurrency)
+        finally:
+            await agent.close()
+            if args.backend == "mongodb":
+                db_client.sync_client.drop_database(settings.db_name)
+            await db_client.close()
+            recorder.close()
+            flush_logger()
+
+        replayed = load_recording(str(replay_path))
+
+    print_report("recorded", build_report(records))
+    report = build_report(replayed, e2e_ms, seconds)
+    report["speed"] = args.speed
+    print_report("replayed", report)
+
+    if args.save_report:
+        Path(args.save_report).write_text(json.dumps(report, indent=2))
+        print(f"\nReport saved to {args.save_report}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressed = []
+        print(f"\n== vs baseline {args.baseline}")
+        for key in ("end_to_end", "handler"):
+            before, after = baseline[key]["p95"], report[key]["p95"]
+            change = (after - before) / before * 100 if before else 0.0
+            print(f"{key} p95: {before:.1f}ms -> {after:.1f}ms ({change:+.1f}%)")
+            if change > args.max_regression:
+                regressed.append(key)
+        before, after = baseline.get("throughput", 0.0), report["throughput"]
+        print(f"throughput: {before:.1f} -> {after:.1f} msg/s")
+        if regressed:
+            print(f"FAIL: p95 regression above {args.max_regression}% in {', '.join(regressed)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
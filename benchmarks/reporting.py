@@ -0,0 +1,32 @@
+"""Latency summary helpers shared by the benchmark scripts"""
+
+from typing import Dict, List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Return the pct-th percentile (nearest-rank) of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (milliseconds)"""
+    return {
+        "count": len(samples_ms),
+        "mean": sum(samples_ms) / len(samples_ms) if samples_ms else 0.0,
+        "p50": percentile(samples_ms, 50),
+        "p95": percentile(samples_ms, 95),
+        "p99": percentile(samples_ms, 99),
+        "max": max(samples_ms) if samples_ms else 0.0,
+    }
+
+
+def format_row(label: str, stats: Dict[str, float]) -> str:
+    """Format a summary as a fixed-width table row"""
+    return (
+        f"{label:<32} n={stats['count']:<6} mean={stats['mean']:8.2f}ms "
+        f"p50={stats['p50']:8.2f}ms p95={stats['p95']:8.2f}ms p99={stats['p99']:8.2f}ms"
+    )
@@ -0,0 +1,66 @@
+from functools import wraps
+from telegram import Update
+from telegram.ext import ContextTypes
+from config.settings import Settings
+from utils.loop_monitor import LoopLagMonitor
+from utils.profiler import SamplingProfiler, dump_tasks
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+def admin_only(handler):
+    """Ignore the command unless it comes from a configured admin user"""
+
+    @wraps(handler)
+    async def wrapper(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user_id = str(update.effective_user.id)
+        if user_id not in self.settings.admin_user_ids:
+            logger.warning(f"Rejected admin command from non-admin user {user_id}")
+            return
+        return await handler(self, update, context)
+
+    return wrapper
+
+
+class AdminHandlers:
+    """Restricted diagnostics commands (profiling, task dumps, loop stalls)"""
+
+    def __init__(self, settings: Settings, loop_monitor: LoopLagMonitor):
+        self.settings = settings
+        self.loop_monitor = loop_monitor
+        self.profiler = SamplingProfiler(settings.diagnostics_dir)
+
+    @admin_only
+    async def profile_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /debug_profile [seconds] - time-boxed sampling profile"""
+        if self.profiler.is_running:
+            await update.message.reply_text("A profile is already running.")
+            return
+
+        try:
+            seconds = float(context.args[0]) if context.args else 10.0
+        except ValueError:
+            await update.message.reply_text("Usage: /debug_profile [seconds]")
+            return
+
+        await update.message.reply_text(f"Profiling the event loop for {min(seconds, self.profiler.max_seconds):.0f}s...")
+        path = await self.profiler.profile(seconds)
+        await update.message.reply_text(f"Profile written to {path}")
+
+    @admin_only
+    async def tasks_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /debug_tasks - dump running asyncio tasks"""
+        path = dump_tasks(self.settings.diagnostics_dir)
+        await update.message.reply_text(f"Task dump written to {path}")
+
+    @admin_only
+    async def lag_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /debug_lag - show recent event-loop stalls"""
+        stalls = self.loop_monitor.summary()[-10:]
+        if not stalls:
+            await update.message.reply_text("No event-loop stalls recorded.")
+            return
+
+        lines = [f"{s['at']}  {s['duration_ms']:.0f}ms  {s['stack_file'] or '-'}" for s in stalls]
+        await update.message.reply_text("Recent event-loop stalls:\n" + "\n".join(lines))
@@ -1,9 +1,17 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from typing import Callable, Awaitable
+import time
+from contextlib import nullcontext
+from typing import Callable, Awaitable, Optional
 from memory.user_manager import UserManager
 from agents.base_agent import BaseAgent
 from utils.logger import setup_logger
+from utils.metrics import metrics, timed
+from utils.traffic import TrafficRecorder
+from storage.archive import ChatArchiver
+from storage.update_journal import (
+    InMemoryUpdateJournal, UpdateJournal, PROCESSING, GENERATED, SENT, COMPLETED,
+)
 
 logger = setup_logger()
 
@@ -11,9 +19,20 @@ logger = setup_logger()
 class BotHandlers:
     """Telegram bot message handlers"""
     
-    def __init__(self, agent: BaseAgent, user_manager: UserManager):
+    def __init__(
+        self,
+        agent: BaseAgent,
+        user_manager: UserManager,
+        recorder: Optional[TrafficRecorder] = None,
+        journal: Optional[UpdateJournal] = None,
+        archiver: Optional[ChatArchiver] = None,
+    ):
         self.agent = agent
         self.user_manager = user_manager
+        self.recorder = recorder
+        self.journal = journal or InMemoryUpdateJournal()
+        self.archiver = archiver
+        self._awaiting_first_message = True
     
     async def start_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
@@ -55,15 +74,31 @@ class BotHandlers:
             logger.error(f"Error retrieving profile for {user_id}: {e}", exc_info=True)
             await update.message.reply_text("Error retrieving your profile.")
     
+    @timed("message_handler_seconds")
     async def message_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle text messages"""
+        first, self._awaiting_first_message = self._awaiting_first_message, False
+        started = time.perf_counter()
+        async with self.recorder.turn(update) if self.recorder else nullcontext():
+            await self._handle_message(update)
+
+        if first:
+            # Cold-path cost left after startup warm-up
+            elapsed = time.perf_counter() - started
+            metrics.histogram("first_message_seconds", "Latency of the first message after startup").observe(elapsed)
+            logger.info(f"First message handled in {elapsed * 1000:.0f}ms")
+
+    async def _handle_message(self, update: Update):
+        """Generate and send the reply, then update profile and membership records"""
         user = update.effective_user
         chat = update.effective_chat
         user_id = str(user.id)
         chat_id = str(chat.id)
         user_input = update.message.text
+        metrics.counter("messages_total", "Text messages received").inc(chat_type=chat.type)
 
-        logger.info(f"Received message from {user_id} (@{user.username}) in chat {chat_id} ({chat.type})")
+        # Hot path: pass arguments so formatting only happens when the level is enabled
+        logger.info("Received message from {} (@{}) in chat {} ({})", user_id, user.username, chat_id, chat.type)
 
         # Prepare user metadata
         user_metadata = {
@@ -75,19 +110,52 @@ class BotHandlers:
             "chat_title": chat.title if hasattr(chat, 'title') else "Private Chat",
         }
 
+        update_id = update.update_id
         try:
+            # Redelivered updates (e.g. after a restart) skip or resume finished steps
+            previous = await self.journal.begin(update_id, chat_id)
+            state = previous["state"] if previous else None
+            if state == COMPLETED or (state == PROCESSING and previous.get("owner") == self.journal.owner):
+                metrics.counter("updates_deduplicated_total", "Redelivered updates skipped").inc(state=state)
+                logger.info("Skipping duplicate update {} ({})", update_id, state)
+                return
+            if state is not None:
+                metrics.counter("updates_resumed_total", "Interrupted updates resumed").inc(state=state)
+                logger.info("Resuming interrupted update {} from state {}", update_id, state)
+
+            # Archived chats are restored before the agent loads their checkpoint
+            if self.archiver is not None:
+                await self.archiver.ensure_active(chat_id)
+            
             # 1. Get response from agent and send to user first
-            response = await self.agent.get_response(chat_id, user_id, user_input, user_metadata)
-            await update.message.reply_text(response)
-            logger.info(f"Sent response to user {user_id} in chat {chat_id}")
+            if state in (GENERATED, SENT):
+                response = previous.get("response", "")
+            else:
+                # An interrupted turn may already have checkpointed its answer
+                response = await self.agent.find_response(chat_id, update_id) if state == PROCESSING else None
+                if response is None:
+                    response = await self.agent.get_response(chat_id, user_id, user_input, user_metadata, update_id)
+                await self.journal.mark(update_id, GENERATED, response=response)
+
+            if state != SENT:
+                with metrics.timer("telegram_send_seconds"):
+                    await update.message.reply_text(response)
+                await self.journal.mark(update_id, SENT)
+                logger.info("Sent response to user {} in chat {}", user_id, chat_id)
 
             # 2. After sending, store/update user profile, chat context, and interaction tracking
             await self.user_manager.store_user_profile(user_metadata)
             await self.user_manager.store_chat_context(chat_id, user_metadata)
             await self.user_manager.update_interaction_count(user_id)
+            await self.journal.mark(update_id, COMPLETED)
 
         except Exception as e:
             logger.error(f"Error handling message from user {user_id} in chat {chat_id}: {e}", exc_info=True)
             await update.message.reply_text(
                 "Sorry, I encountered an error processing your message. Please try again."
-            )
\ No newline at end of file
+            )
+            # The user was told to retry; do not replay this update
+            try:
+                await self.journal.mark(update_id, COMPLETED)
+            except Exception as e:
+                logger.error(f"Failed to record update {update_id} in the journal: {e}")
\ No newline at end of file
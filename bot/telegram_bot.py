@@ -1,9 +1,16 @@
+from typing import Optional
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters
 from bot.handlers import BotHandlers
+from bot.admin_handlers import AdminHandlers
 from config.settings import Settings
 from agents.base_agent import BaseAgent
 from memory.user_manager import UserManager
+from storage.archive import ChatArchiver
+from storage.update_journal import UpdateJournal
 from utils.logger import setup_logger
+from utils.loop_monitor import LoopLagMonitor
+from utils.startup import StartupTimer
+from utils.traffic import TrafficRecorder
 
 logger = setup_logger()
 
@@ -11,31 +18,71 @@ logger = setup_logger()
 class TelegramBot:
     """Telegram bot application"""
     
-    def __init__(self, settings: Settings, agent: BaseAgent, user_manager: UserManager):
+    def __init__(
+        self,
+        settings: Settings,
+        agent: BaseAgent,
+        user_manager: UserManager,
+        journal: Optional[UpdateJournal] = None,
+        archiver: Optional[ChatArchiver] = None,
+    ):
         self.settings = settings
         self.agent = agent
         self.user_manager = user_manager
-        self.handlers = BotHandlers(agent, user_manager)
-        self.app = ApplicationBuilder().token(settings.telegram_bot_token).build()
+        self.archiver = archiver
+        self.traffic_recorder = None
+        if settings.traffic_record_path:
+            self.traffic_recorder = TrafficRecorder(
+                settings.traffic_record_path,
+                anonymize=settings.traffic_record_anonymize,
+                sample_rate=settings.traffic_record_sample_rate,
+                salt=settings.traffic_record_salt,
+            )
+        self.handlers = BotHandlers(
+            agent, user_manager, recorder=self.traffic_recorder, journal=journal, archiver=archiver
+        )
+        self.loop_monitor = LoopLagMonitor(
+            threshold_ms=settings.loop_lag_threshold_ms,
+            output_dir=settings.diagnostics_dir,
+        )
+        self.admin_handlers = AdminHandlers(settings, self.loop_monitor)
+        self.app = (
+            ApplicationBuilder()
+            .token(settings.telegram_bot_token)
+            .connection_pool_size(settings.telegram_connection_pool_size)
+            .pool_timeout(settings.telegram_pool_timeout)
+            .build()
+        )
         self._register_handlers()
     
     def _register_handlers(self):
         """Register all message handlers"""
         self.app.add_handler(CommandHandler("start", self.handlers.start_handler))
         self.app.add_handler(CommandHandler("profile", self.handlers.profile_handler))
+        
+        # Admin-only diagnostics; non-blocking so a running profile does not hold up updates
+        self.app.add_handler(CommandHandler("debug_profile", self.admin_handlers.profile_handler, block=False))
+        self.app.add_handler(CommandHandler("debug_tasks", self.admin_handlers.tasks_handler))
+        self.app.add_handler(CommandHandler("debug_lag", self.admin_handlers.lag_handler))
         self.app.add_handler(
             MessageHandler(filters.TEXT & ~filters.COMMAND, self.handlers.message_handler)
         )
     
-    async def run(self):
+    async def run(self, startup: Optional[StartupTimer] = None):
         """Start the bot with async/await"""
+        startup = startup or StartupTimer()
+        await self.loop_monitor.start()
+        if self.archiver is not None:
+            await self.archiver.start()
+        with startup.phase("telegram"):
+            await self.app.initialize()
+            await self.app.start()
+            await self.app.updater.start_polling(allowed_updates=["message"])
+        startup.report()
+        
         logger.info("🤖 Telegram bot is running...")
         print("🤖 Telegram bot is running... (Press Ctrl+C to stop)")
         
-        await self.app.initialize()
-        await self.app.start()
-        await self.app.updater.start_polling(allowed_updates=["message"])
-        
         # Keep running until interrupted
         import asyncio
         try:
@@ -50,4 +97,9 @@ class TelegramBot:
             await self.app.stop()
             logger.info("Shutting down application...")
             await self.app.shutdown()
+            await self.loop_monitor.stop()
+            if self.archiver is not None:
+                await self.archiver.stop()
+            if self.traffic_recorder is not None:
+                await asyncio.to_thread(self.traffic_recorder.close)
             logger.info("Bot shutdown complete")
\ No newline at end of file
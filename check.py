@@ -1,57 +1,515 @@
 """
-Script to verify your .env configuration
-Run this before starting the bot to check if all API keys are set correctly
+Preflight check for a bot host: configuration, dependency latency and capacity.
+
+Run it on every new host before putting it into rotation; it exits non-zero
+when a check fails.
+
+    configuration     required variables (masked) and settings validation
+    instrumentation   per-call overhead of the metrics wrappers on the message
+                      path (benchmarks.metrics_overhead) against a budget
+    mongodb           round-trip latency of the sync (pymongo) and async
+                      (motor) clients, and point-read throughput at
+                      increasing concurrency with the configured pool options
+    indexes           Atlas vector index and text index on langmem_store
+    load probe        synthetic messages through BotHandlers, the agent graph
+                      and the configured store (in a throwaway database, or
+                      schema on PostgreSQL) at increasing numbers of
+                      concurrent chats
+    recommendations   pool sizes for the concurrency the host sustains
+
+The load probe uses the deterministic LLM and embeddings of the benchmarks
+by default, so nothing is sent to Telegram or OpenAI; --llm openai runs it
+through the OpenAI API instead (costs tokens).
+
+Usage:
+    python check.py
+    python check.py --levels 1,8,32,64 --duration 10 --llm-latency-ms 800
+    python check.py --llm openai --levels 1,4 --duration 20
+    python check.py --skip-load
+    python check.py --backend memory        # offline, no MongoDB
 """
+
+import argparse
+import asyncio
+import dataclasses
+import math
 import os
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
+from config.settings import Settings
+from storage.hybrid_search import NAMESPACE_FIELD, TEXT_INDEX_NAME
+from utils.logger import configure_logger, flush_logger
+from benchmarks.reporting import summarize, format_row
+
+# Name and dimensions BaseStore configures for the langmem_store vector index
+VECTOR_INDEX_NAME = "embedding"
+VECTOR_DIMS = 1536
+# A level is "enough" once it reaches this share of the best throughput
+KNEE_SHARE = 0.9
+# Pool sizes leave this much room over the peak seen at the recommended concurrency
+HEADROOM = 1.5
+
+
+class Report:
+    """Collects check results and prints them as they come in"""
+
+    def __init__(self):
+        self.failures = 0
+
+    def section(self, title: str):
+        print("\n" + "=" * 60)
+        print(f"🔍 {title}")
+        print("=" * 60)
+
+    def ok(self, message: str):
+        print(f"✅ {message}")
+
+    def warn(self, message: str):
+        print(f"⚠️  {message}")
+
+    def fail(self, message: str):
+        print(f"❌ {message}")
+        self.failures += 1
+
+
+def _mask(value: str) -> str:
+    # Show only first/last few chars for security
+    if len(value) > 20:
+        return f"{value[:8]}...{value[-8:]}"
+    return f"{value[:4]}...{value[-4:]}"
+
+
+def _knee(throughput: Dict[int, float]) -> int:
+    """Lowest concurrency reaching KNEE_SHARE of the best throughput"""
+    best = max(throughput.values())
+    return min(level for level, rate in throughput.items() if rate >= KNEE_SHARE * best)
+
+
+def check_configuration(report: Report, args) -> Optional[Settings]:
+    """Report required variables and load Settings"""
+    report.section("Configuration")
+    backend = (args.backend or os.getenv("STORAGE_BACKEND", "mongodb")).lower()
+    required = ["TELEGRAM_BOT_TOKEN", "OPENAI_API_KEY"]
+    if backend == "mongodb":
+        required.append("MONGO_URI")
+    elif backend == "postgres":
+        required.append("POSTGRES_URI")
+
+    missing = False
+    for key in required:
+        value = os.getenv(key)
+        if value:
+            report.ok(f"{key}: {_mask(value)}")
+        elif key == "MONGO_URI":
+            report.warn(f"{key}: not set, using {Settings.mongo_uri}")
+        else:
+            report.fail(f"{key}: NOT SET")
+            missing = True
+    print(f"   STORAGE_BACKEND={backend}  DB_NAME={os.getenv('DB_NAME', Settings.db_name)}")
+
+    if missing and args.llm == "stub":
+        # Telegram and OpenAI are not called by the stub probe; keep checking the rest
+        os.environ.setdefault("TELEGRAM_BOT_TOKEN", "preflight")
+        os.environ.setdefault("OPENAI_API_KEY", "preflight")
+    try:
+        settings = Settings.from_env()
+    except ValueError as e:
+        report.fail(f"Invalid configuration: {e}")
+        return None
+    if args.backend:
+        settings = dataclasses.replace(settings, storage_backend=backend)
+    if not missing:
+        report.ok("Settings load")
+    return settings
+
+
+async def _async_reads(collection, workers: int, seconds: float, docs: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    deadline = time.perf_counter() + seconds
+
+    async def worker(w: int):
+        i = w
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await collection.find_one({"_id": i % docs})
+            latencies.append((time.perf_counter() - start) * 1000)
+            i += workers
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(workers)))
+    return {"ops": len(latencies) / (time.perf_counter() - start), "latency": summarize(latencies)}
+
+
+def _sync_reads(collection, workers: int, seconds: float, docs: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    deadline = time.perf_counter() + seconds
+
+    def worker(w: int):
+        i = w
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            collection.find_one({"_id": i % docs})
+            latencies.append((time.perf_counter() - start) * 1000)
+            i += workers
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(worker, range(workers)))
+    return {"ops": len(latencies) / (time.perf_counter() - start), "latency": summarize(latencies)}
+
+
+async def check_mongodb(report: Report, settings: Settings, args) -> Dict[str, int]:
+    """Measure round trips and point-read throughput for both clients; returns knee per client"""
+    from pymongo.errors import PyMongoError
+    from storage.mongodb_client import MongoDBClient
+
+    report.section("MongoDB")
+    options = settings.mongo_client_options()
+    print(f"   pool max={options['maxPoolSize']} min={options['minPoolSize']} "
+          f"compressors={options['compressors']}")
+    db_client = MongoDBClient()
+    db_name = f"preflight_{uuid.uuid4().hex[:8]}"
+    knees: Dict[str, int] = {}
+    try:
+        await db_client.initialize(settings.mongo_uri, options)
+    except PyMongoError as e:
+        report.fail(f"Cannot connect to {_mask(settings.mongo_uri)}: {e}")
+        await db_client.close()
+        return knees
+
+    try:
+        async_db = db_client.async_client[db_name]
+        sync_db = db_client.sync_client[db_name]
+
+        rtt = []
+        for _ in range(args.pings):
+            start = time.perf_counter()
+            await async_db.command("ping")
+            rtt.append((time.perf_counter() - start) * 1000)
+        print(format_row("async ping", summarize(rtt)))
+
+        def sync_pings() -> List[float]:
+            samples = []
+            for _ in range(args.pings):
+                start = time.perf_counter()
+                sync_db.command("ping")
+                samples.append((time.perf_counter() - start) * 1000)
+            return samples
+
+        print(format_row("sync ping", summarize(await asyncio.to_thread(sync_pings))))
+
+        collection = async_db["preflight"]
+        await collection.insert_many([{"_id": i, "value": "x" * 256} for i in range(args.docs)])
+        for name in ("async", "sync"):
+            throughput = {}
+            for workers in args.mongo_levels:
+                if name == "async":
+                    result = await _async_reads(collection, workers, args.mongo_seconds, args.docs)
+                else:
+                    result = await asyncio.to_thread(
+                        _sync_reads, sync_db["preflight"], workers, args.mongo_seconds, args.docs
+                    )
+                throughput[workers] = result["ops"]
+                print(f"{format_row(f'{name} reads x{workers}', result['latency'])}  {result['ops']:8.0f} ops/s")
+            knees[name] = _knee(throughput)
+
+        for name, stats in db_client.pool_stats().items():
+            if stats["checkout_failures"]:
+                report.warn(f"{name} pool: {stats['checkout_failures']} checkouts timed out "
+                            f"(MONGO_WAIT_QUEUE_TIMEOUT_MS={settings.mongo_wait_queue_timeout_ms})")
+        report.ok(f"Point reads stop scaling at {knees['async']} concurrent requests (async), "
+                  f"{knees['sync']} (sync)")
+    except PyMongoError as e:
+        report.fail(f"MongoDB probe failed: {e}")
+    finally:
+        try:
+            db_client.sync_client.drop_database(db_name)
+        finally:
+            await db_client.close()
+    return knees
+
+
+async def check_instrumentation(report: Report, args):
+    """Fail if a metrics wrapper adds more than the budget per call on this host"""
+    from benchmarks.metrics_overhead import measure, overhead_us
 
-print("=" * 60)
-print("🔍 Checking Environment Configuration")
-print("=" * 60)
-
-# Load .env file
-load_dotenv()
-
-# Check all required variables
-checks = {
-    "TELEGRAM_BOT_TOKEN": os.getenv("TELEGRAM_BOT_TOKEN"),
-    "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY"),
-    "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY"),
-    "MONGO_URI": os.getenv("MONGO_URI", "mongodb://localhost:27017"),
-    "DB_NAME": os.getenv("DB_NAME", "telegram_bot_langmem"),
-}
-
-all_good = True
-
-for key, value in checks.items():
-    if value:
-        # Show only first/last few chars for security
-        if len(value) > 20:
-            masked = f"{value[:8]}...{value[-8:]}"
+    report.section("Instrumentation overhead")
+    for label, (instrumented, baseline) in (await measure(args.overhead_calls)).items():
+        added = overhead_us(instrumented, baseline)
+        message = f"{label}: {added:.2f}µs per call (budget {args.overhead_budget_us:g}µs)"
+        if added > args.overhead_budget_us:
+            report.fail(message)
         else:
-            masked = f"{value[:4]}...{value[-4:]}"
-        print(f"✅ {key}: {masked}")
+            report.ok(message)
+
+
+def check_indexes(report: Report, settings: Settings):
+    """Check the vector and text indexes of langmem_store in the configured database"""
+    from pymongo import MongoClient
+    from pymongo.errors import OperationFailure, PyMongoError
+
+    report.section("Indexes")
+    client = MongoClient(settings.mongo_uri, serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms)
+    try:
+        collection = client[settings.db_name]["langmem_store"]
+        try:
+            indexes = list(collection.list_search_indexes(VECTOR_INDEX_NAME))
+        except OperationFailure as e:
+            report.fail(f"Vector search is not available on this deployment (Atlas or mongot needed): {e}")
+            indexes = None
+
+        if indexes == []:
+            report.fail(f"Vector index '{VECTOR_INDEX_NAME}' missing on langmem_store; "
+                        "the bot requests it on startup and Atlas builds it asynchronously")
+        elif indexes:
+            index = indexes[0]
+            fields = index.get("latestDefinition", {}).get("fields", [])
+            dims = next((f.get("numDimensions") for f in fields if f.get("type") == "vector"), None)
+            if not index.get("queryable"):
+                report.fail(f"Vector index '{VECTOR_INDEX_NAME}' is {index.get('status', 'not ready')}")
+            elif dims != VECTOR_DIMS:
+                report.fail(f"Vector index '{VECTOR_INDEX_NAME}' has {dims} dimensions, embeddings have {VECTOR_DIMS}")
+            else:
+                query_vector = [1.0] + [0.0] * (VECTOR_DIMS - 1)
+                pipeline = [
+                    {"$vectorSearch": {"index": VECTOR_INDEX_NAME, "path": "embedding",
+                                       "queryVector": query_vector, "numCandidates": 20, "limit": 5}},
+                    {"$project": {"_id": 1}},
+                ]
+                latencies = []
+                for _ in range(5):
+                    start = time.perf_counter()
+                    list(collection.aggregate(pipeline))
+                    latencies.append((time.perf_counter() - start) * 1000)
+                report.ok(f"Vector index '{VECTOR_INDEX_NAME}' ready")
+                print(format_row("vector query", summarize(latencies)))
+
+        text_index = collection.index_information().get(TEXT_INDEX_NAME)
+        if text_index is not None and text_index["key"][0][0] == NAMESPACE_FIELD:
+            report.ok(f"Text index '{TEXT_INDEX_NAME}' present")
+        elif settings.memory_search_mode == "hybrid":
+            problem = "missing" if text_index is None else f"not prefixed by {NAMESPACE_FIELD}"
+            report.fail(f"Text index '{TEXT_INDEX_NAME}' {problem}; run python -m storage.indexes --create")
+    except PyMongoError as e:
+        report.fail(f"Index check failed: {e}")
+    finally:
+        client.close()
+
+
+async def _probe_level(handlers, concurrency: int, seconds: float, first_user: int) -> Dict[str, Any]:
+    """Closed loop: each of `concurrency` private chats sends its next message as soon as it is answered"""
+    from benchmarks.fakes import make_update
+    from benchmarks.load_test import ERROR_REPLY, TOPICS, UPDATE_IDS
+
+    latencies: List[float] = []
+    replies: List[str] = []
+    deadline = time.perf_counter() + seconds
+
+    async def chat(user_id: int):
+        i = 0
+        while time.perf_counter() < deadline:
+            topic = TOPICS[(i + user_id) % len(TOPICS)]
+            text = f"Remember that I like {topic}" if i % 4 == 0 else f"What do you know about {topic}?"
+            update = make_update(next(UPDATE_IDS), chat_id=user_id, chat_type="private",
+                                 user_id=user_id, text=text, replies=replies)
+            start = time.perf_counter()
+            await handlers.message_handler(update, None)
+            latencies.append((time.perf_counter() - start) * 1000)
+            i += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(chat(first_user + c) for c in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "messages": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "latency": summarize(latencies),
+        "errors": sum(1 for reply in replies if reply.startswith(ERROR_REPLY)),
+    }
+
+
+async def _create_postgres_schema(postgres_uri: str, schema: str) -> str:
+    """Create a scratch schema; returns a connection string whose sessions use it"""
+    import psycopg
+    from psycopg.conninfo import make_conninfo
+
+    async with await psycopg.AsyncConnection.connect(postgres_uri, autocommit=True) as conn:
+        await conn.execute(f'CREATE SCHEMA "{schema}"')
+    # public stays on the path for the vector extension's types
+    return make_conninfo(postgres_uri, options=f"-c search_path={schema},public")
+
+
+async def _drop_postgres_schema(postgres_uri: str, schema: str):
+    import psycopg
+
+    async with await psycopg.AsyncConnection.connect(postgres_uri, autocommit=True) as conn:
+        await conn.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+
+
+async def load_probe(report: Report, settings: Settings, args) -> Dict[int, Dict[str, Any]]:
+    """Run the message path at each concurrency level; returns results with pool snapshots"""
+    from benchmarks.fakes import FakeOpenAIClient
+    from benchmarks.load_test import build_handlers
+
+    report.section(f"Load probe ({settings.storage_backend}, {args.llm} LLM)")
+    if args.llm == "stub":
+        openai_client = FakeOpenAIClient(args.llm_latency_ms, args.embedding_latency_ms)
+        print(f"   simulated latency: llm={args.llm_latency_ms}ms embeddings={args.embedding_latency_ms}ms")
+    else:
+        from llm.openai_client import OpenAIClient
+
+        openai_client = OpenAIClient(settings)
+    scratch = f"preflight_{uuid.uuid4().hex[:8]}"
+    postgres_uri = settings.postgres_uri
+    if settings.storage_backend == "postgres":
+        # PostgreSQL ignores db_name (the URI selects the database): isolate the probe in a schema
+        postgres_uri = await _create_postgres_schema(settings.postgres_uri, scratch)
+    probe_settings = dataclasses.replace(
+        settings, db_name=scratch, postgres_uri=postgres_uri, traffic_record_path=None
+    )
+    results: Dict[int, Dict[str, Any]] = {}
+    try:
+        handlers, agent, db_client = await build_handlers(probe_settings, openai_client)
+        try:
+            for level in args.levels:
+                result = await _probe_level(handlers, level, args.duration, first_user=50_000 + level * 1_000)
+                result["db_pool"] = db_client.pool_stats()
+                if args.llm == "openai":
+                    result["http_pool"] = openai_client.http.pool_stats()
+                results[level] = result
+                print(f"{format_row(f'{level} concurrent chats', result['latency'])}  "
+                      f"{result['throughput']:6.2f} msg/s  {result['errors']} errors")
+                if result["errors"]:
+                    report.fail(f"{result['errors']} of {result['messages']} messages failed "
+                                f"at {level} concurrent chats")
+        finally:
+            await agent.close()
+            if probe_settings.storage_backend == "mongodb":
+                db_client.sync_client.drop_database(scratch)
+            await db_client.close()
+    finally:
+        if settings.storage_backend == "postgres":
+            await _drop_postgres_schema(settings.postgres_uri, scratch)
+    return results
+
+
+def recommend(report: Report, settings: Settings, results: Dict[int, Dict[str, Any]], mongo_knees: Dict[str, int]):
+    """Print pool sizes for the concurrency the host sustains"""
+    report.section("Recommendations")
+    healthy = {level: r["throughput"] for level, r in results.items() if not r["errors"]}
+    if not healthy:
+        report.fail("No concurrency level ran without errors")
+        return
+    knee = _knee(healthy)
+    at_knee = results[knee]
+    print(f"Concurrency: {knee} messages in flight "
+          f"({at_knee['throughput']:.2f} msg/s, p95 {at_knee['latency']['p95']:.0f}ms)")
+    if knee == max(results):
+        report.warn("Throughput was still rising at the highest level; probe higher --levels")
+    else:
+        print("   higher levels only add latency")
+
+    rows = []
+    db_pool = at_knee["db_pool"]
+    if settings.storage_backend == "mongodb":
+        peak = max(stats["peak_checked_out"] for stats in db_pool.values())
+        waited = max(stats["wait_ms_max"] for stats in db_pool.values())
+        rows.append(("MONGO_MAX_POOL_SIZE", max(10, math.ceil(peak * HEADROOM)), settings.mongo_max_pool_size))
+        # Enough warm connections for the lowest load probed
+        idle = max(stats["peak_checked_out"] for stats in results[min(results)]["db_pool"].values())
+        rows.append(("MONGO_MIN_POOL_SIZE", max(1, idle), settings.mongo_min_pool_size))
+        print(f"   peak MongoDB connections checked out: {peak} (longest checkout wait {waited:.1f}ms)")
+        if mongo_knees and peak > max(mongo_knees.values()):
+            report.warn(f"The load needs {peak} connections but point reads stop scaling at "
+                        f"{max(mongo_knees.values())}; MongoDB, not the pool, limits throughput")
+    elif settings.storage_backend == "postgres":
+        waiting = db_pool.get("async", {}).get("requests_waiting", 0)
+        # Each in-flight message holds at most one connection at a time
+        rows.append(("POSTGRES_POOL_MAX_SIZE", max(4, math.ceil(knee * HEADROOM)), settings.postgres_pool_max_size))
+        if waiting:
+            report.warn(f"{waiting} requests were waiting for a PostgreSQL connection")
+
+    if "http_pool" in at_knee:
+        peak = max(stats["peak_in_flight"] for stats in at_knee["http_pool"].values())
     else:
-        print(f"❌ {key}: NOT SET")
-        all_good = False
-
-print("=" * 60)
-
-if all_good:
-    print("✨ All environment variables are set correctly!")
-    print("   You can now run: python bot.py")
-else:
-    print("⚠️  Some environment variables are missing!")
-    print("   Please check your .env file and make sure all keys are set.")
-    print("\n📝 Your .env file should look like this:")
-    print("-" * 60)
-    print("""
-TELEGRAM_BOT_TOKEN=1234567890:ABCdefGHIjklMNOpqrsTUVwxyz
-GOOGLE_API_KEY=AIzaSyD_your_key_here
-OPENAI_API_KEY=sk-proj-your_key_here
-MONGO_URI=mongodb://localhost:27017
-DB_NAME=telegram_bot_langmem
-    """)
-    print("-" * 60)
-
-print()
\ No newline at end of file
+        # Stub LLM: each in-flight message has at most one OpenAI request open
+        peak = knee
+    rows.append(("HTTP_MAX_CONNECTIONS", max(10, math.ceil(peak * HEADROOM)), settings.http_max_connections))
+    rows.append(("HTTP_MAX_KEEPALIVE_CONNECTIONS", max(5, peak), settings.http_max_keepalive_connections))
+
+    for name, value, current in rows:
+        note = "" if value == current else f"  (currently {current})"
+        print(f"   {name}={value}{note}")
+
+
+async def run(args) -> int:
+    report = Report()
+    settings = check_configuration(report, args)
+    if settings is None:
+        return report.failures
+
+    await check_instrumentation(report, args)
+
+    mongo_knees: Dict[str, int] = {}
+    if settings.storage_backend == "mongodb":
+        mongo_knees = await check_mongodb(report, settings, args)
+        if mongo_knees:
+            check_indexes(report, settings)
+
+    if not args.skip_load and (settings.storage_backend != "mongodb" or mongo_knees):
+        results = await load_probe(report, settings, args)
+        if results:
+            recommend(report, settings, results, mongo_knees)
+    return report.failures
+
+
+def _levels(value: str) -> List[int]:
+    return sorted({int(level) for level in value.split(",") if level.strip()})
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("mongodb", "postgres", "memory"),
+                        help="Override STORAGE_BACKEND")
+    parser.add_argument("--llm", choices=("stub", "openai"), default="stub",
+                        help="LLM and embeddings for the load probe")
+    parser.add_argument("--levels", type=_levels, default=[1, 4, 16, 64],
+                        help="Concurrent chats for the load probe")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per load probe level")
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0, help="Stub LLM latency")
+    parser.add_argument("--embedding-latency-ms", type=float, default=100.0, help="Stub embedding latency")
+    parser.add_argument("--mongo-levels", type=_levels, default=[1, 8, 32, 64],
+                        help="Concurrent point reads for the MongoDB probe")
+    parser.add_argument("--mongo-seconds", type=float, default=2.0, help="Seconds per MongoDB probe level")
+    parser.add_argument("--pings", type=int, default=20)
+    parser.add_argument("--docs", type=int, default=1000, help="Documents read by the MongoDB probe")
+    parser.add_argument("--overhead-calls", type=int, default=20_000,
+                        help="Calls per wrapper for the instrumentation overhead check")
+    parser.add_argument("--overhead-budget-us", type=float, default=10.0,
+                        help="Max overhead per instrumented call")
+    parser.add_argument("--skip-load", action="store_true", help="Only check configuration and dependencies")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        configure_logger(log_dir=log_dir, level=args.log_level)
+        try:
+            failures = asyncio.run(run(args))
+        finally:
+            flush_logger()
+
+    print("\n" + "=" * 60)
+    if failures:
+        print(f"⚠️  {failures} checks failed; fix them before putting this host into rotation")
+        sys.exit(1)
+    print("✨ All checks passed. Start the bot with: python main.py")
+
+
+if __name__ == "__main__":
+    main()
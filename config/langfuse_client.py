@@ -1,11 +1,20 @@
-from typing import Optional
-from langfuse import Langfuse
-from langfuse.langchain import CallbackHandler
+import asyncio
+import random
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Optional
 from config.settings import Settings
 from utils.logger import setup_logger
+from utils.metrics import metrics
+
+# Langfuse is only imported when tracing is configured
+if TYPE_CHECKING:
+    from langfuse import Langfuse
+    from langfuse.langchain import CallbackHandler
 
 logger = setup_logger()
 
+MAX_CACHED_HANDLERS = 1024
+
 
 class LangfuseClient:
     """Manages Langfuse tracing client and callback handler"""
@@ -21,16 +30,24 @@ class LangfuseClient:
     def _initialize(self, settings: Settings):
         """Initialize Langfuse client"""
         self.settings = settings
-        self._client: Optional[Langfuse] = None
-        self._callback_handler: Optional[CallbackHandler] = None
+        self._client: Optional["Langfuse"] = None
+        self._callback_handler: Optional["CallbackHandler"] = None
+        self._session_handlers: "OrderedDict[str, CallbackHandler]" = OrderedDict()
+        self._traces = metrics.counter("langfuse_traces_total", "Turns exported to Langfuse")
         
         if self._is_configured():
             try:
-                # Initialize Langfuse client
+                from langfuse import Langfuse
+                from langfuse.langchain import CallbackHandler
+
+                # Spans are exported in batches by a background thread;
+                # flush_at/flush_interval bound the batch size and age
                 self._client = Langfuse(
                     secret_key=settings.langfuse_secret_key,
                     public_key=settings.langfuse_public_key,
                     host=settings.langfuse_base_url,
+                    flush_at=settings.langfuse_flush_at,
+                    flush_interval=settings.langfuse_flush_interval,
                 )
                 
                 # Initialize callback handler (reads from environment variables)
@@ -38,6 +55,10 @@ class LangfuseClient:
                 
                 logger.info("✅ Langfuse tracing enabled")
                 logger.info(f"   Host: {settings.langfuse_base_url}")
+                logger.info(
+                    f"   Sampling: {settings.langfuse_sample_rate:.0%} of turns "
+                    f"+ errors + turns slower than {settings.langfuse_slow_turn_ms:.0f}ms"
+                )
             except Exception as e:
                 logger.error(f"Failed to initialize Langfuse: {e}")
                 self._client = None
@@ -54,26 +75,32 @@ class LangfuseClient:
         ])
     
     @property
-    def client(self) -> Optional[Langfuse]:
+    def client(self) -> Optional["Langfuse"]:
         """Get Langfuse client instance"""
         return self._client
     
     @property
-    def callback_handler(self) -> Optional[CallbackHandler]:
+    def callback_handler(self) -> Optional["CallbackHandler"]:
         """Get Langfuse callback handler for LangChain"""
         return self._callback_handler
+
+    def should_sample(self) -> bool:
+        """Head sampling decision for a new turn"""
+        return self.is_enabled() and random.random() < self.settings.langfuse_sample_rate
     
     def create_user_callback_handler(
         self, 
         user_id: str, 
         session_id: str,
         user_metadata: Optional[dict] = None
-    ) -> Optional[CallbackHandler]:
+    ) -> Optional["CallbackHandler"]:
         """
-        Create a user-specific callback handler with user context.
+        Get the callback handler for a session, creating it on first use.
         
-        User identification in Langfuse is done via the CallbackHandler initialization
-        with user_id and session_id parameters, plus additional metadata.
+        Handlers are cached per session (LRU bounded) instead of being built
+        per call. User identification is attached per run through the config
+        metadata returned by trace_metadata(), so a cached handler can serve
+        every user of the session.
         
         Args:
             user_id: Telegram user ID (will be used as Langfuse user_id)
@@ -81,54 +108,101 @@ class LangfuseClient:
             user_metadata: Additional user metadata (username, full_name, etc.)
         
         Returns:
-            CallbackHandler configured with user context
+            CallbackHandler for the session
         """
         if not self.is_enabled():
             return None
         
+        handler = self._session_handlers.get(session_id)
+        if handler is not None:
+            self._session_handlers.move_to_end(session_id)
+            return handler
+
         try:
-            # Prepare user metadata for Langfuse
-            metadata = {
-                "telegram_user_id": user_id,
-                "session_id": session_id,
-            }
+            from langfuse.langchain import CallbackHandler
             
-            if user_metadata:
-                # Add additional user context
-                if "username" in user_metadata:
-                    metadata["username"] = user_metadata["username"]
-                if "full_name" in user_metadata:
-                    metadata["full_name"] = user_metadata["full_name"]
-                if "chat_type" in user_metadata:
-                    metadata["chat_type"] = user_metadata["chat_type"]
-                if "chat_title" in user_metadata:
-                    metadata["chat_title"] = user_metadata["chat_title"]
-                if "chat_id" in user_metadata:
-                    metadata["chat_id"] = user_metadata["chat_id"]
+            handler = CallbackHandler()
+            self._session_handlers[session_id] = handler
+            if len(self._session_handlers) > MAX_CACHED_HANDLERS:
+                self._session_handlers.popitem(last=False)
             
-            # Create callback handler with user_id and session_id
-            handler = CallbackHandler(
-                user_id=user_id,
-                session_id=session_id,
-                metadata=metadata,
-            )
-            
-            logger.debug(
-                f"Created user-specific callback handler: "
-                f"user_id={user_id}, session_id={session_id}"
-            )
+            logger.debug("Created callback handler for session_id={}", session_id)
             return handler
             
         except Exception as e:
             logger.error(f"Error creating user callback handler: {e}")
             return None
     
+    @staticmethod
+    def trace_metadata(
+        user_id: str,
+        session_id: str,
+        user_metadata: Optional[dict] = None
+    ) -> Dict[str, Any]:
+        """Run metadata that Langfuse maps onto the trace's user, session and tags"""
+        metadata = {
+            "langfuse_user_id": user_id,
+            "langfuse_session_id": session_id,
+            "telegram_user_id": user_id,
+        }
+
+        if user_metadata:
+            # Add additional user context
+            for field in ("username", "full_name", "chat_type", "chat_title", "chat_id"):
+                if field in user_metadata:
+                    metadata[field] = user_metadata[field]
+            if "chat_type" in user_metadata:
+                metadata["langfuse_tags"] = [user_metadata["chat_type"]]
+
+        return metadata
+
+    def record_turn(
+        self,
+        user_id: str,
+        session_id: str,
+        user_input: str,
+        duration_ms: float,
+        error: Optional[BaseException] = None,
+        user_metadata: Optional[dict] = None,
+    ):
+        """
+        Tail-capture an unsampled turn that failed or was slow.
+
+        Only a single summary span is recorded (no LLM/tool detail), so the
+        cost stays constant; it is exported by the background batch processor.
+        """
+        if not self.is_enabled():
+            return
+
+        reason = "error" if error is not None else "slow"
+        try:
+            span = self._client.start_span(
+                name="telegram_turn",
+                input=user_input,
+                metadata={
+                    "duration_ms": round(duration_ms, 1),
+                    "sampled": False,
+                    **self.trace_metadata(user_id, session_id, user_metadata),
+                },
+                level="ERROR" if error is not None else "WARNING",
+                status_message=repr(error) if error is not None else f"slow turn ({duration_ms:.0f}ms)",
+            )
+            span.update_trace(user_id=user_id, session_id=session_id, tags=[reason])
+            span.end()
+            self._traces.inc(mode=reason)
+        except Exception as e:
+            logger.error(f"Error recording Langfuse turn: {e}")
+
+    def record_sampled(self):
+        """Count a head-sampled turn"""
+        self._traces.inc(mode="sampled")
+
     def is_enabled(self) -> bool:
         """Check if Langfuse is enabled and ready"""
         return self._client is not None and self._callback_handler is not None
     
     def flush(self):
-        """Flush pending traces to Langfuse"""
+        """Flush pending traces to Langfuse (blocking)"""
         if self._client:
             try:
                 self._client.flush()
@@ -144,4 +218,12 @@ class LangfuseClient:
                 self._client.shutdown()
                 logger.info("Langfuse client shutdown")
             except Exception as e:
-                logger.error(f"Error shutting down Langfuse: {e}")
\ No newline at end of file
+                logger.error(f"Error shutting down Langfuse: {e}")
+
+    async def aflush(self):
+        """Flush pending traces without blocking the event loop"""
+        await asyncio.to_thread(self.flush)
+
+    async def ashutdown(self):
+        """Shutdown Langfuse client without blocking the event loop"""
+        await asyncio.to_thread(self.shutdown)
@@ -1,7 +1,8 @@
 import os
-from typing import Optional
+from importlib.util import find_spec
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -19,10 +20,95 @@ class Settings:
     mongo_uri: str = "mongodb://localhost:27017"
     db_name: str = "telegram_bot"
     
+    # MongoDB Connection Pool Configuration
+    mongo_max_pool_size: int = 50
+    mongo_min_pool_size: int = 2
+    mongo_max_idle_time_ms: int = 300_000
+    mongo_connect_timeout_ms: int = 5_000
+    mongo_server_selection_timeout_ms: int = 10_000
+    mongo_wait_queue_timeout_ms: int = 5_000
+    mongo_compressors: str = "zstd,zlib"
+    
+    # Shared HTTP Client Configuration (OpenAI chat + embeddings)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_timeout: float = 60.0
+    
+    # Telegram Connection Pool Configuration
+    telegram_connection_pool_size: int = 64
+    telegram_pool_timeout: float = 5.0
+    
+    # Metrics Endpoint Configuration (port 0 disables the endpoint)
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 9100
+    
+    # Diagnostics Configuration
+    admin_user_ids: List[str] = field(default_factory=list)
+    loop_lag_threshold_ms: float = 100.0
+    diagnostics_dir: str = "diagnostics"
+    
+    # Startup Configuration (warm-up compiles the graph and opens DB/OpenAI connections before polling)
+    startup_warmup: bool = True
+    
+    # Chat Membership Configuration (memberships idle longer than this expire; 0 keeps them)
+    membership_ttl_days: int = 90
+    
+    # Chat Archive Configuration (chats idle this many days move out of the hot collections; 0 disables)
+    chat_archive_after_days: int = 0
+    chat_archive_tier: str = "collections"
+    chat_archive_dir: str = "archive"
+    chat_archive_interval_seconds: float = 3600.0
+    chat_archive_batch: int = 100
+    
+    # Memory Search Configuration ("hybrid" merges keyword and vector search, "vector" is LangMem's default)
+    memory_search_mode: str = "hybrid"
+    memory_search_prefilter_max: int = 50
+    
+    # Namespace Catalog Configuration (skips searches of empty namespaces, lists tiny ones)
+    memory_catalog_enabled: bool = True
+    memory_catalog_scan_max: int = 10
+    
+    # Cross-Chat Recall Configuration (per-user memory index, recalled in private chats only)
+    cross_chat_recall: bool = True
+    cross_chat_recall_scan_limit: int = 200
+    
+    # Response Cache Configuration (answers repeated questions in a chat without running the agent)
+    response_cache_enabled: bool = False
+    response_cache_threshold: float = 0.9
+    response_cache_ttl_seconds: float = 3600.0
+    response_cache_max_entries: int = 100
+    response_cache_max_chats: int = 10_000
+    
+    # Checkpoint Compression Configuration ("zstd", "zlib" or "none"; smaller values are stored as-is)
+    checkpoint_compression: str = "zstd"
+    checkpoint_compression_min_bytes: int = 2048
+    checkpoint_compression_level: int = 3
+    
+    # Update Journal Configuration (deduplicates redelivered updates)
+    update_journal_ttl_seconds: int = 86_400
+    update_journal_window: int = 10_000
+    
+    # Traffic Recording Configuration (unset path disables recording)
+    traffic_record_path: Optional[str] = None
+    traffic_record_anonymize: bool = True
+    traffic_record_sample_rate: float = 1.0
+    traffic_record_salt: Optional[str] = None
+    
+    # Storage Backend Configuration ("mongodb", "postgres" or "memory")
+    storage_backend: str = "mongodb"
+    postgres_uri: Optional[str] = None
+    postgres_pool_min_size: int = 1
+    postgres_pool_max_size: int = 10
+    
     # Langfuse Configuration
     langfuse_secret_key: Optional[str] = None
     langfuse_public_key: Optional[str] = None
     langfuse_base_url: Optional[str] = None
+    langfuse_sample_rate: float = 0.05
+    langfuse_slow_turn_ms: float = 10_000
+    langfuse_flush_at: int = 100
+    langfuse_flush_interval: float = 5.0
     
     def __post_init__(self):
         """Set environment variables after initialization"""
@@ -37,6 +123,22 @@ class Settings:
         if self.langfuse_base_url:
             os.environ["LANGFUSE_HOST"] = self.langfuse_base_url
     
+    def mongo_client_options(self) -> Dict[str, Any]:
+        """Keyword arguments for MongoClient / AsyncIOMotorClient"""
+        compressors = [name.strip() for name in self.mongo_compressors.split(",") if name.strip()]
+        if "zstd" in compressors and find_spec("zstandard") is None:
+            # pymongo needs the zstandard package for zstd; negotiate the others
+            compressors.remove("zstd")
+        return {
+            "maxPoolSize": self.mongo_max_pool_size,
+            "minPoolSize": self.mongo_min_pool_size,
+            "maxIdleTimeMS": self.mongo_max_idle_time_ms,
+            "connectTimeoutMS": self.mongo_connect_timeout_ms,
+            "serverSelectionTimeoutMS": self.mongo_server_selection_timeout_ms,
+            "waitQueueTimeoutMS": self.mongo_wait_queue_timeout_ms,
+            "compressors": ",".join(compressors),
+        }
+    
     @classmethod
     def from_env(cls) -> 'Settings':
         """Load settings from environment variables"""
@@ -50,13 +152,95 @@ class Settings:
         if not openai_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
         
+        storage_backend = os.getenv("STORAGE_BACKEND", "mongodb").lower()
+        postgres_uri = os.getenv("POSTGRES_URI")
+        
+        if storage_backend not in ("mongodb", "postgres", "memory"):
+            raise ValueError(f"Unsupported STORAGE_BACKEND: {storage_backend}")
+        if storage_backend == "postgres" and not postgres_uri:
+            raise ValueError("POSTGRES_URI not found in environment variables")
+        
+        memory_search_mode = os.getenv("MEMORY_SEARCH_MODE", "hybrid").lower()
+        if memory_search_mode not in ("hybrid", "vector"):
+            raise ValueError(f"Unsupported MEMORY_SEARCH_MODE: {memory_search_mode}")
+        
+        chat_archive_after_days = int(os.getenv("CHAT_ARCHIVE_AFTER_DAYS", "0"))
+        chat_archive_tier = os.getenv("CHAT_ARCHIVE_TIER", "collections").lower()
+        membership_ttl_days = int(os.getenv("MEMBERSHIP_TTL_DAYS", "90"))
+        if chat_archive_tier not in ("collections", "files"):
+            raise ValueError(f"Unsupported CHAT_ARCHIVE_TIER: {chat_archive_tier}")
+        if chat_archive_after_days and membership_ttl_days and chat_archive_after_days >= membership_ttl_days:
+            # Inactivity is read from memberships; once they expire a chat is never archived
+            raise ValueError("CHAT_ARCHIVE_AFTER_DAYS must be lower than MEMBERSHIP_TTL_DAYS")
+        
+        response_cache_threshold = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.9"))
+        if not 0 < response_cache_threshold <= 1:
+            raise ValueError("RESPONSE_CACHE_THRESHOLD must be in (0, 1]")
+        
+        checkpoint_compression = os.getenv("CHECKPOINT_COMPRESSION", "zstd").lower()
+        if checkpoint_compression not in ("zstd", "zlib", "none"):
+            raise ValueError(f"Unsupported CHECKPOINT_COMPRESSION: {checkpoint_compression}")
+        
         return cls(
             telegram_bot_token=telegram_token,
             openai_api_key=openai_key,
             llm_model=os.getenv("LLM_MODEL", "gpt-4o-mini"),
             mongo_uri=os.getenv("MONGO_URI", "mongodb://localhost:27017"),
             db_name=os.getenv("DB_NAME", "telegram_bot"),
+            mongo_max_pool_size=int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+            mongo_min_pool_size=int(os.getenv("MONGO_MIN_POOL_SIZE", "2")),
+            mongo_max_idle_time_ms=int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000")),
+            mongo_connect_timeout_ms=int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+            mongo_server_selection_timeout_ms=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000")),
+            mongo_wait_queue_timeout_ms=int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000")),
+            mongo_compressors=os.getenv("MONGO_COMPRESSORS", "zstd,zlib"),
+            http_max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+            http_max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            http_keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+            http_timeout=float(os.getenv("HTTP_TIMEOUT", "60")),
+            telegram_connection_pool_size=int(os.getenv("TELEGRAM_CONNECTION_POOL_SIZE", "64")),
+            telegram_pool_timeout=float(os.getenv("TELEGRAM_POOL_TIMEOUT", "5")),
+            metrics_host=os.getenv("METRICS_HOST", "127.0.0.1"),
+            metrics_port=int(os.getenv("METRICS_PORT", "9100")),
+            admin_user_ids=[uid.strip() for uid in os.getenv("ADMIN_USER_IDS", "").split(",") if uid.strip()],
+            loop_lag_threshold_ms=float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100")),
+            diagnostics_dir=os.getenv("DIAGNOSTICS_DIR", "diagnostics"),
+            startup_warmup=os.getenv("STARTUP_WARMUP", "true").lower() != "false",
+            membership_ttl_days=membership_ttl_days,
+            chat_archive_after_days=chat_archive_after_days,
+            chat_archive_tier=chat_archive_tier,
+            chat_archive_dir=os.getenv("CHAT_ARCHIVE_DIR", "archive"),
+            chat_archive_interval_seconds=float(os.getenv("CHAT_ARCHIVE_INTERVAL_SECONDS", "3600")),
+            chat_archive_batch=int(os.getenv("CHAT_ARCHIVE_BATCH", "100")),
+            memory_search_mode=memory_search_mode,
+            memory_search_prefilter_max=int(os.getenv("MEMORY_SEARCH_PREFILTER_MAX", "50")),
+            memory_catalog_enabled=os.getenv("MEMORY_CATALOG_ENABLED", "true").lower() != "false",
+            memory_catalog_scan_max=int(os.getenv("MEMORY_CATALOG_SCAN_MAX", "10")),
+            cross_chat_recall=os.getenv("CROSS_CHAT_RECALL", "true").lower() != "false",
+            cross_chat_recall_scan_limit=int(os.getenv("CROSS_CHAT_RECALL_SCAN_LIMIT", "200")),
+            response_cache_enabled=os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true",
+            response_cache_threshold=response_cache_threshold,
+            response_cache_ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600")),
+            response_cache_max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "100")),
+            response_cache_max_chats=int(os.getenv("RESPONSE_CACHE_MAX_CHATS", "10000")),
+            checkpoint_compression=checkpoint_compression,
+            checkpoint_compression_min_bytes=int(os.getenv("CHECKPOINT_COMPRESSION_MIN_BYTES", "2048")),
+            checkpoint_compression_level=int(os.getenv("CHECKPOINT_COMPRESSION_LEVEL", "3")),
+            update_journal_ttl_seconds=int(os.getenv("UPDATE_JOURNAL_TTL_SECONDS", "86400")),
+            update_journal_window=int(os.getenv("UPDATE_JOURNAL_WINDOW", "10000")),
+            traffic_record_path=os.getenv("TRAFFIC_RECORD_PATH") or None,
+            traffic_record_anonymize=os.getenv("TRAFFIC_RECORD_ANONYMIZE", "true").lower() != "false",
+            traffic_record_sample_rate=float(os.getenv("TRAFFIC_RECORD_SAMPLE_RATE", "1.0")),
+            traffic_record_salt=os.getenv("TRAFFIC_RECORD_SALT") or None,
+            storage_backend=storage_backend,
+            postgres_uri=postgres_uri,
+            postgres_pool_min_size=int(os.getenv("POSTGRES_POOL_MIN_SIZE", "1")),
+            postgres_pool_max_size=int(os.getenv("POSTGRES_POOL_MAX_SIZE", "10")),
             langfuse_secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
             langfuse_public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
             langfuse_base_url=os.getenv("LANGFUSE_BASE_URL"),
+            langfuse_sample_rate=float(os.getenv("LANGFUSE_SAMPLE_RATE", "0.05")),
+            langfuse_slow_turn_ms=float(os.getenv("LANGFUSE_SLOW_TURN_MS", "10000")),
+            langfuse_flush_at=int(os.getenv("LANGFUSE_FLUSH_AT", "100")),
+            langfuse_flush_interval=float(os.getenv("LANGFUSE_FLUSH_INTERVAL", "5")),
         )
\ No newline at end of file
@@ -0,0 +1,140 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+import httpx
+from config.settings import Settings
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class _PoolStats:
+    """In-flight request tracking shared by the sync and async transports"""
+
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.queued_requests = 0
+        self.request_seconds_total = 0.0
+
+    def start(self) -> float:
+        with self._lock:
+            # Requests beyond max_connections wait for a free pooled connection
+            if self.in_flight >= self.max_connections:
+                self.queued_requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.requests += 1
+        return time.perf_counter()
+
+    def finish(self, started: float):
+        with self._lock:
+            self.in_flight -= 1
+            self.request_seconds_total += time.perf_counter() - started
+
+
+class _TrackedAsyncTransport(httpx.AsyncHTTPTransport):
+    """Async transport that records pool usage"""
+
+    def __init__(self, pool_stats: _PoolStats, **kwargs):
+        super().__init__(**kwargs)
+        self._pool_stats = pool_stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = self._pool_stats.start()
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            self._pool_stats.finish(started)
+
+
+class _TrackedTransport(httpx.HTTPTransport):
+    """Sync transport that records pool usage"""
+
+    def __init__(self, pool_stats: _PoolStats, **kwargs):
+        super().__init__(**kwargs)
+        self._pool_stats = pool_stats
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = self._pool_stats.start()
+        try:
+            return super().handle_request(request)
+        finally:
+            self._pool_stats.finish(started)
+
+
+class SharedHTTPClient:
+    """Keep-alive HTTP clients shared by every OpenAI chat and embeddings instance"""
+
+    _instance: Optional['SharedHTTPClient'] = None
+
+    def __new__(cls, settings: Settings):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialize(settings)
+        return cls._instance
+
+    def _initialize(self, settings: Settings):
+        """Create sync and async clients with tuned pool limits"""
+        limits = httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        )
+        timeout = httpx.Timeout(settings.http_timeout, connect=10.0)
+
+        # Async client serves chat completions; the sync client serves
+        # embeddings computed inside the MongoDB store's executor threads
+        self._async_stats = _PoolStats(settings.http_max_connections)
+        self._sync_stats = _PoolStats(settings.http_max_connections)
+        self._async_client = httpx.AsyncClient(
+            transport=_TrackedAsyncTransport(self._async_stats, limits=limits),
+            limits=limits,
+            timeout=timeout,
+        )
+        self._sync_client = httpx.Client(
+            transport=_TrackedTransport(self._sync_stats, limits=limits),
+            limits=limits,
+            timeout=timeout,
+        )
+        logger.info(
+            f"✅ Shared HTTP client ready (max={settings.http_max_connections}, "
+            f"keepalive={settings.http_max_keepalive_connections})"
+        )
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """Get shared async HTTP client"""
+        return self._async_client
+
+    @property
+    def sync_client(self) -> httpx.Client:
+        """Get shared sync HTTP client"""
+        return self._sync_client
+
+    def pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Pool utilization per client"""
+        result = {}
+        for name, stats in (("async", self._async_stats), ("sync", self._sync_stats)):
+            result[name] = {
+                "in_flight": stats.in_flight,
+                "peak_in_flight": stats.peak_in_flight,
+                "max_connections": stats.max_connections,
+                "utilization": stats.in_flight / stats.max_connections if stats.max_connections else 0.0,
+                "requests": stats.requests,
+                "queued_requests": stats.queued_requests,
+                "request_ms_avg": stats.request_seconds_total * 1000 / stats.requests if stats.requests else 0.0,
+            }
+        return result
+
+    @classmethod
+    async def close(cls):
+        """Close shared clients"""
+        if cls._instance is not None:
+            await cls._instance._async_client.aclose()
+            cls._instance._sync_client.close()
+            cls._instance = None
+            logger.info("Shared HTTP client closed")
@@ -0,0 +1,103 @@
+import time
+from typing import Any, Dict, List
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from utils.metrics import metrics
+from utils.traffic import record_call
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Records LLM and tool call latency from LangChain callbacks (and on recorded turns)"""
+
+    # Run synchronously in the event loop instead of a thread pool hop
+    run_inline = True
+
+    def __init__(self):
+        self._started: Dict[UUID, float] = {}
+        self._tool_names: Dict[UUID, str] = {}
+        self._llm_seconds = metrics.histogram("llm_call_seconds", "Chat model call latency")
+        self._tool_seconds = metrics.histogram("tool_call_seconds", "Agent tool call latency")
+        self._errors = metrics.counter("agent_callback_errors_total", "Failed LLM/tool calls")
+
+    def _start(self, run_id: UUID):
+        self._started[run_id] = time.perf_counter()
+
+    def _elapsed(self, run_id: UUID) -> float:
+        started = self._started.pop(run_id, None)
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        elapsed = self._elapsed(run_id)
+        self._llm_seconds.observe(elapsed)
+        message = getattr(response.generations[0][0], "message", None) if response.generations else None
+        record_call(
+            "llm", elapsed,
+            tool_calls=[{"name": tc["name"], "args": tc["args"]} for tc in getattr(message, "tool_calls", None) or []],
+            content=getattr(message, "content", None),
+        )
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any):
+        elapsed = self._elapsed(run_id)
+        self._llm_seconds.observe(elapsed)
+        self._errors.inc(kind="llm")
+        record_call("llm", elapsed, error=True)
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+        self._tool_names[run_id] = (serialized or {}).get("name", "unknown")
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any):
+        tool = self._tool_names.pop(run_id, "unknown")
+        elapsed = self._elapsed(run_id)
+        self._tool_seconds.observe(elapsed, tool=tool)
+        record_call("tool", elapsed, tool=tool)
+
+    def on_tool_error(self, error, *, run_id: UUID, **kwargs: Any):
+        tool = self._tool_names.pop(run_id, "unknown")
+        elapsed = self._elapsed(run_id)
+        self._tool_seconds.observe(elapsed, tool=tool)
+        self._errors.inc(kind="tool")
+        record_call("tool", elapsed, tool=tool, error=True)
+
+
+class InstrumentedEmbeddings(Embeddings):
+    """Embeddings wrapper recording embedding call latency"""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self._seconds = metrics.histogram("embedding_call_seconds", "Embedding call latency")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        try:
+            return self.embeddings.embed_documents(texts)
+        finally:
+            self._seconds.observe(time.perf_counter() - start, op="documents")
+
+    def embed_query(self, text: str) -> List[float]:
+        start = time.perf_counter()
+        try:
+            return self.embeddings.embed_query(text)
+        finally:
+            self._seconds.observe(time.perf_counter() - start, op="query")
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        try:
+            return await self.embeddings.aembed_documents(texts)
+        finally:
+            self._seconds.observe(time.perf_counter() - start, op="documents")
+
+    async def aembed_query(self, text: str) -> List[float]:
+        start = time.perf_counter()
+        try:
+            return await self.embeddings.aembed_query(text)
+        finally:
+            self._seconds.observe(time.perf_counter() - start, op="query")
@@ -1,6 +1,7 @@
 from typing import Optional
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from config.settings import Settings
+from llm.http_client import SharedHTTPClient
 from utils.logger import setup_logger
 
 logger = setup_logger()
@@ -11,6 +12,7 @@ class OpenAIClient:
     
     def __init__(self, settings: Settings):
         self.settings = settings
+        self.http = SharedHTTPClient(settings)
         self._llm = None
         self._embeddings = None
     
@@ -21,6 +23,8 @@ class OpenAIClient:
             self._llm = ChatOpenAI(
                 model=self.settings.llm_model,
                 temperature=0.3,
+                http_client=self.http.sync_client,
+                http_async_client=self.http.async_client,
             )
             logger.info(f"✅ Initialized ChatOpenAI with model: {self.settings.llm_model}")
         return self._llm
@@ -30,7 +34,9 @@ class OpenAIClient:
         """Get OpenAI embeddings instance"""
         if self._embeddings is None:
             self._embeddings = OpenAIEmbeddings(
-                model="text-embedding-3-small"
+                model="text-embedding-3-small",
+                http_client=self.http.sync_client,
+                http_async_client=self.http.async_client,
             )
             logger.info("✅ Initialized OpenAI Embeddings (text-embedding-3-small)")
         return self._embeddings
\ No newline at end of file
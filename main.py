@@ -3,48 +3,93 @@
 import asyncio
 import signal
 from config.settings import Settings
-from storage.mongodb_client import MongoDBClient
-from storage.stores import MemoryStore, UserProfileStore
-from memory.user_manager import UserManager
-from agents.langmem_agent import LangMemAgent
-from langchain_openai import OpenAIEmbeddings
-from bot.telegram_bot import TelegramBot
-from utils.logger import setup_logger
+from utils.logger import setup_logger, shutdown_logger
+from utils.metrics import metrics, MetricsServer
+from utils.startup import StartupTimer
 
 
-async def initialize_app():
-    """Initialize all async components"""
+def _import_app_modules():
+    """Import the LangChain/LangGraph/Telegram-heavy modules
+
+    Runs in a worker thread while the database connects, so the ~1-2s of
+    import time overlaps network round trips instead of preceding them.
+    """
+    import agents.langmem_agent  # noqa: F401
+    import bot.telegram_bot  # noqa: F401
+    import llm.instrumentation  # noqa: F401
+    import llm.openai_client  # noqa: F401
+    import memory.user_manager  # noqa: F401
+    import storage.archive  # noqa: F401
+    import storage.memberships  # noqa: F401
+    import storage.update_journal  # noqa: F401
+
+
+async def initialize_app(startup: StartupTimer):
+    """Initialize all async components, overlapping independent phases"""
     logger = setup_logger()
     logger.info("Starting Telegram Bot Application")
     
     try:
         # Load settings
-        settings = Settings.from_env()
+        with startup.phase("settings"):
+            settings = Settings.from_env()
         logger.info(f"Loaded settings - Database: {settings.db_name}")
         
-        # Initialize MongoDB client
-        db_client = MongoDBClient()
-        await db_client.initialize(settings.mongo_uri)
+        # Connect to the database while heavy modules import in the background
+        from storage.backends import create_db_client, create_stores
         
-        # Initialize embeddings
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        db_client, _ = await asyncio.gather(
+            startup.run("database", create_db_client(settings)),
+            startup.run("imports", asyncio.to_thread(_import_app_modules)),
+        )
         
-        # Initialize stores
-        memory_store = MemoryStore(db_client, settings.db_name, embedder=embeddings)
-        await memory_store.initialize()
+        from agents.langmem_agent import LangMemAgent
+        from bot.telegram_bot import TelegramBot
+        from llm.instrumentation import InstrumentedEmbeddings
+        from llm.openai_client import OpenAIClient
+        from memory.user_manager import UserManager
+        from storage.archive import create_chat_archiver
+        from storage.memberships import create_membership_store
+        from storage.update_journal import create_update_journal
+        from storage.user_memory_index import create_user_memory_index
         
-        profile_store = UserProfileStore(db_client, settings.db_name)
-        await profile_store.initialize()
+        # Initialize OpenAI client (chat + embeddings share one keep-alive HTTP pool)
+        openai_client = OpenAIClient(settings)
+        embeddings = InstrumentedEmbeddings(openai_client.embeddings)
+        
+        # Initialize stores (both collections concurrently), the update journal
+        # that makes redelivered updates idempotent and the chat archiver
+        (memory_store, profile_store), journal, archiver = await asyncio.gather(
+            startup.run("stores", create_stores(settings, db_client, embedder=embeddings)),
+            startup.run("journal", create_update_journal(settings, db_client)),
+            startup.run("archiver", create_chat_archiver(settings, db_client)),
+        )
         
         # Initialize user manager
-        user_manager = UserManager(profile_store, memory_store)
+        membership_store = await startup.run(
+            "memberships", create_membership_store(settings, db_client, profile_store)
+        )
+        user_manager = UserManager(profile_store, memory_store, membership_store)
+        user_memory_index = await startup.run(
+            "user_memory_index",
+            create_user_memory_index(settings, db_client, memory_store, profile_store, membership_store),
+        )
         
         # Initialize agent
-        agent = LangMemAgent(settings, db_client, memory_store)
-        await agent.initialize()
+        agent = LangMemAgent(settings, db_client, memory_store, openai_client, user_memory_index)
+        await startup.run("agent", agent.initialize())
         
         # Initialize bot
-        bot = TelegramBot(settings, agent, user_manager)
+        with startup.phase("bot"):
+            bot = TelegramBot(settings, agent, user_manager, journal, archiver)
+        
+        # Move first-message costs (graph compile, connection setup) into startup
+        if settings.startup_warmup:
+            await startup.run("warmup", agent.warm_up())
+        
+        # Expose connection pool gauges alongside latency metrics
+        metrics.register_pool_stats(f"{settings.storage_backend}_pool", db_client.pool_stats)
+        metrics.register_pool_stats("openai_http_pool", openai_client.http.pool_stats)
         
         return bot, db_client
         
@@ -58,10 +103,17 @@ async def main():
     logger = setup_logger()
     db_client = None
     bot = None
+    metrics_server = None
     
     try:
-        bot, db_client = await initialize_app()
-        await bot.run()
+        startup = StartupTimer()
+        bot, db_client = await initialize_app(startup)
+        
+        if bot.settings.metrics_port:
+            metrics_server = MetricsServer(bot.settings.metrics_host, bot.settings.metrics_port)
+            await metrics_server.start()
+        
+        await bot.run(startup)
         
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
@@ -72,9 +124,18 @@ async def main():
         raise
     finally:
         # Cleanup
+        if metrics_server:
+            await metrics_server.stop()
+        if bot:
+            await bot.agent.close()
         if db_client:
+            logger.info(f"Database pool stats: {db_client.pool_stats()}")
             await db_client.close()
+        from llm.http_client import SharedHTTPClient
+        
+        await SharedHTTPClient.close()
         logger.info("Application shutdown complete")
+        await shutdown_logger()
 
 
 if __name__ == "__main__":
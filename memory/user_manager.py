@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import Dict, Optional, Any
-from storage.stores import UserProfileStore, MemoryStore
+from typing import Dict, List, Optional, Any
+from storage.backends import MemoryStoreType, ProfileStoreType
+from storage.memberships import MembershipStore, StoreMembershipStore
 from utils.logger import setup_logger
+from utils.metrics import timed
 
 logger = setup_logger()
 
@@ -9,10 +11,17 @@ logger = setup_logger()
 class UserManager:
     """Manages user profiles and interactions"""
     
-    def __init__(self, profile_store: UserProfileStore, memory_store: MemoryStore):
+    def __init__(
+        self,
+        profile_store: ProfileStoreType,
+        memory_store: MemoryStoreType,
+        membership_store: Optional[MembershipStore] = None,
+    ):
         self.profile_store = profile_store
         self.memory_store = memory_store
+        self.membership_store = membership_store or StoreMembershipStore(profile_store)
     
+    @timed("user_manager_seconds", method="store_user_profile")
     async def store_user_profile(self, user_metadata: Dict[str, Any]) -> None:
         """Store or update user's Telegram profile"""
         try:
@@ -36,45 +45,53 @@ class UserManager:
                 value=profile_memory
             )
             
-            logger.info(f"Stored/Updated profile for user {user_id} (@{user_metadata.get('username')})")
+            logger.info("Stored/Updated profile for user {} (@{})", user_id, user_metadata.get('username'))
             
         except Exception as e:
             logger.error(f"Error storing user profile for {user_metadata.get('user_id')}: {e}", exc_info=True)
     
+    @timed("user_manager_seconds", method="store_chat_context")
     async def store_chat_context(self, chat_id: str, user_metadata: Dict[str, Any]) -> None:
         """Store chat context - track which users participate in which chats"""
         try:
             user_id = user_metadata.get('user_id')
-            chat_type = user_metadata.get('chat_type')
-            chat_title = user_metadata.get('chat_title', 'Unknown Chat')
-            
-            chat_context = {
-                "content": f"User {user_metadata.get('full_name')} (@{user_metadata.get('username')}, ID: {user_id}) is member of {chat_title} (Chat ID: {chat_id}, Type: {chat_type})",
-                "chat_data": {
-                    "chat_id": chat_id,
-                    "chat_type": chat_type,
-                    "chat_title": chat_title,
+            await self.membership_store.record_activity(
+                chat_id,
+                user_id,
+                chat_data={
+                    "chat_type": user_metadata.get('chat_type'),
+                    "chat_title": user_metadata.get('chat_title', 'Unknown Chat'),
                 },
-                "user_data": {
-                    "user_id": user_id,
+                user_data={
                     "username": user_metadata.get('username'),
                     "full_name": user_metadata.get('full_name'),
                 },
-                "last_activity": datetime.now().isoformat(),
-            }
-            
-            namespace = ("chat_memberships",)
-            await self.profile_store.store.aput(
-                namespace=namespace,
-                key=f"chat_{chat_id}_user_{user_id}",
-                value=chat_context
             )
             
-            logger.debug(f"Updated chat context for user {user_id} in chat {chat_id}")
+            logger.debug("Updated chat context for user {} in chat {}", user_id, chat_id)
             
         except Exception as e:
             logger.error(f"Error storing chat context: {e}", exc_info=True)
     
+    @timed("user_manager_seconds", method="get_chat_members")
+    async def get_chat_members(self, chat_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Users active in a chat, most recent first"""
+        try:
+            return await self.membership_store.get_chat_members(chat_id, limit)
+        except Exception as e:
+            logger.error(f"Error retrieving members of chat {chat_id}: {e}", exc_info=True)
+            return []
+    
+    @timed("user_manager_seconds", method="get_user_chats")
+    async def get_user_chats(self, user_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Chats a user is active in, most recent first"""
+        try:
+            return await self.membership_store.get_user_chats(user_id, limit)
+        except Exception as e:
+            logger.error(f"Error retrieving chats of user {user_id}: {e}", exc_info=True)
+            return []
+    
+    @timed("user_manager_seconds", method="get_user_profile")
     async def get_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve user's stored Telegram profile"""
         try:
@@ -89,6 +106,7 @@ class UserManager:
             logger.error(f"Error retrieving user profile for {user_id}: {e}", exc_info=True)
             return None
     
+    @timed("user_manager_seconds", method="update_interaction_count")
     async def update_interaction_count(self, user_id: str) -> None:
         """Track number of interactions with the bot"""
         try:
@@ -115,7 +133,7 @@ class UserManager:
                 value=stats_value
             )
             
-            logger.debug(f"Updated interaction count for user {user_id}: {interaction_count}")
+            logger.debug("Updated interaction count for user {}: {}", user_id, interaction_count)
             
         except Exception as e:
             logger.error(f"Error updating interaction count for {user_id}: {e}", exc_info=True)
\ No newline at end of file
@@ -29,6 +29,12 @@ Memory Tools Available:
    - Before answering questions that might have stored context
    - When personalizing responses based on user history
 
+3. 'recall_user_memories' - For RETRIEVING what was said in OTHER chats (private chats only)
+   Action: Use this tool with a user ID to find memories about that user from the groups you share
+   When to use:
+   - User asks what they or someone else said or decided in a group
+   - search_memory finds nothing and the answer may come from one of their groups
+
 Memory Format Guidelines:
 CRITICAL - Always include user identification in stored memories:
 - For ALL memories: MUST include full name, username (with @), and user ID
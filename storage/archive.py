@@ -0,0 +1,455 @@
+"""
+Tiered archival of inactive chats.
+
+Chats whose most recent membership activity (chat_memberships.last_activity)
+is older than chat_archive_after_days have their checkpoints, checkpoint
+writes and memories moved out of the hot collections, either into
+archive_<collection> collections or into one compressed NDJSON file per chat
+(the storage.transfer format). The archived_chats collection records which
+chats are archived and where:
+
+    {_id: chat_id, state: "archiving" | "archived", tier, location,
+     last_activity, archived_at, documents}
+
+Every message first checks archived_chats by _id; an archived chat is
+restored into the hot collections before the agent loads its checkpoint.
+A chat is only removed from the hot collections after its copy is complete
+and it is still inactive, and restore tolerates documents that are already
+present, so an archive or restore interrupted at any point is finished by
+the next restore.
+"""
+
+import argparse
+import asyncio
+import gzip
+import io
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from bson import json_util
+from config.settings import Settings
+from storage.memberships import COLLECTION_NAME as MEMBERSHIPS
+from storage.namespace_catalog import COLLECTION_NAME as CATALOG
+from utils.logger import setup_logger
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from storage.backends import DBClient
+
+logger = setup_logger()
+
+MARKERS = "archived_chats"
+HOT_COLLECTIONS = ("checkpoints", "checkpoint_writes", "langmem_store")
+WRITE_BATCH = 500
+
+Record = Tuple[str, Dict[str, Any]]
+
+
+def chat_filters(chat_id: str) -> Dict[str, Dict[str, Any]]:
+    """Per-collection filters selecting one chat's hot documents (all served by indexes)"""
+    thread = {"thread_id": f"telegram_chat_{chat_id}"}
+    return {
+        "checkpoints": thread,
+        "checkpoint_writes": thread,
+        "langmem_store": {"namespace": [f"chat_{chat_id}"]},
+    }
+
+
+def insert_ignoring_duplicates(collection, documents: List[Dict[str, Any]]):
+    """insert_many that skips documents already present (from an interrupted earlier attempt)"""
+    from pymongo.errors import BulkWriteError
+
+    if not documents:
+        return
+    try:
+        collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+
+
+class CollectionArchive:
+    """Archive tier in archive_<collection> collections of the same database"""
+
+    name = "collections"
+
+    def __init__(self, db):
+        self.db = db
+
+    def ensure(self):
+        for name in HOT_COLLECTIONS:
+            self.db[f"archive_{name}"].create_index("archived_chat")
+
+    def location(self, chat_id: str) -> str:
+        return ",".join(f"archive_{name}" for name in HOT_COLLECTIONS)
+
+    def write(self, chat_id: str, records: Iterable[Record]) -> int:
+        count = 0
+        batch: List[Dict[str, Any]] = []
+        current = None
+        for collection, document in records:
+            if batch and (collection != current or len(batch) >= WRITE_BATCH):
+                insert_ignoring_duplicates(self.db[f"archive_{current}"], batch)
+                batch = []
+            current = collection
+            batch.append({**document, "archived_chat": chat_id})
+            count += 1
+        if batch:
+            insert_ignoring_duplicates(self.db[f"archive_{current}"], batch)
+        return count
+
+    def read(self, chat_id: str, location: Optional[str] = None) -> Iterator[Record]:
+        for name in HOT_COLLECTIONS:
+            cursor = self.db[f"archive_{name}"].find({"archived_chat": chat_id}, {"archived_chat": 0})
+            for document in cursor.batch_size(WRITE_BATCH):
+                yield name, document
+
+    def drop(self, chat_id: str, location: Optional[str] = None):
+        for name in HOT_COLLECTIONS:
+            self.db[f"archive_{name}"].delete_many({"archived_chat": chat_id})
+
+
+class FileArchive:
+    """Archive tier as one compressed NDJSON file per chat on local disk
+
+    Files use the storage.transfer line format, so they can also be loaded
+    with `python -m storage.transfer import`. Only the host that wrote a
+    file can restore it.
+    """
+
+    name = "files"
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        try:
+            import zstandard
+            self._zstd = zstandard
+        except ImportError:
+            self._zstd = None
+
+    def ensure(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def location(self, chat_id: str) -> str:
+        suffix = ".ndjson.zst" if self._zstd else ".ndjson.gz"
+        return str(self.directory / f"{chat_id}{suffix}")
+
+    def _open(self, path: str, mode: str):
+        if path.endswith(".zst"):
+            if self._zstd is None:
+                raise RuntimeError(f"{path} is zstd-compressed; install zstandard to restore it")
+            return self._zstd.open(path, mode, encoding="utf-8")
+        return io.TextIOWrapper(gzip.open(path, mode.replace("t", "")), encoding="utf-8")
+
+    def write(self, chat_id: str, records: Iterable[Record]) -> int:
+        from storage.transfer import JSON_OPTIONS
+
+        path = self.location(chat_id)
+        count = 0
+        # Write under a temporary name (same suffix, same codec) so a crash never leaves a truncated archive
+        temporary = str(self.directory / f".partial-{Path(path).name}")
+        with self._open(temporary, "wt") as out:
+            for collection, document in records:
+                out.write(json_util.dumps({"collection": collection, "document": document}, json_options=JSON_OPTIONS))
+                out.write("\n")
+                count += 1
+        os.replace(temporary, path)
+        return count
+
+    def read(self, chat_id: str, location: Optional[str] = None) -> Iterator[Record]:
+        from storage.transfer import JSON_OPTIONS
+
+        path = location or self.location(chat_id)
+        if not os.path.exists(path):
+            return
+        with self._open(path, "rt") as source:
+            for line in source:
+                if line.strip():
+                    record = json_util.loads(line, json_options=JSON_OPTIONS)
+                    yield record["collection"], record["document"]
+
+    def drop(self, chat_id: str, location: Optional[str] = None):
+        path = location or self.location(chat_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class ChatArchiver:
+    """Moves inactive chats to an archive tier and restores them on their next message"""
+
+    def __init__(
+        self,
+        db_client: "DBClient",
+        db_name: str,
+        tier: str = "collections",
+        archive_dir: str = "archive",
+        archive_after_days: int = 0,
+        interval_seconds: float = 3600,
+        batch: int = 100,
+    ):
+        self.db = db_client.sync_client[db_name]
+        self.markers = db_client.async_client[db_name][MARKERS]
+        self.memberships = db_client.async_client[db_name][MEMBERSHIPS]
+        self.tiers = {"collections": CollectionArchive(self.db), "files": FileArchive(archive_dir)}
+        self.tier = self.tiers[tier]
+        self.archive_after_days = archive_after_days
+        self.interval_seconds = interval_seconds
+        self.batch = batch
+        # Chats that received a message recently in this process are never archived mid-turn
+        self._touched: "OrderedDict[str, float]" = OrderedDict()
+        # chat_id -> [lock, holders + waiters]; entries are dropped when unused
+        self._locks: Dict[str, List[Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._rehydration_seconds = metrics.histogram(
+            "chat_rehydration_seconds", "Time to restore an archived chat before its turn",
+            buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+        )
+        self._documents = metrics.counter("chat_archive_documents_total", "Documents archived/restored")
+        self._chats = metrics.counter("chat_archive_chats_total", "Chats archived/restored")
+
+    async def initialize(self):
+        """Create the archive tier's indexes or directory"""
+        await asyncio.to_thread(self.tier.ensure)
+        logger.info(
+            f"✅ Chat archiver ready (tier {self.tier.name}, "
+            f"archive after {self.archive_after_days or 'never'} days)"
+        )
+
+    @asynccontextmanager
+    async def _exclusive(self, chat_id: str):
+        """Serialize archive and restore of one chat"""
+        entry = self._locks.get(chat_id)
+        if entry is None:
+            entry = self._locks[chat_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[chat_id]
+
+    def _touch(self, chat_id: str):
+        self._touched[chat_id] = time.monotonic()
+        self._touched.move_to_end(chat_id)
+        grace = max(self.interval_seconds, 3600)
+        while self._touched and time.monotonic() - next(iter(self._touched.values())) > grace:
+            self._touched.popitem(last=False)
+
+    async def ensure_active(self, chat_id: str) -> bool:
+        """Restore the chat if it is archived; True if a restore happened
+
+        Costs one _id lookup for chats that are not archived.
+        """
+        self._touch(chat_id)
+        if await self.markers.find_one({"_id": chat_id}, {"_id": 1}) is None:
+            return False
+        async with self._exclusive(chat_id):
+            return await self._restore(chat_id)
+
+    async def _restore(self, chat_id: str) -> bool:
+        marker = await self.markers.find_one({"_id": chat_id})
+        if marker is None:
+            return False
+        start = time.perf_counter()
+        tier = self.tiers.get(marker.get("tier"), self.tier)
+        count = await asyncio.to_thread(self._restore_sync, chat_id, tier, marker.get("location"))
+        await self.markers.delete_one({"_id": chat_id})
+
+        elapsed = time.perf_counter() - start
+        self._rehydration_seconds.observe(elapsed, tier=tier.name)
+        self._documents.inc(count, op="restored")
+        self._chats.inc(op="restored")
+        logger.info(f"♻️  Restored archived chat {chat_id} ({count} documents) in {elapsed * 1000:.0f}ms")
+        return True
+
+    def _restore_sync(self, chat_id: str, tier, location: Optional[str]) -> int:
+        count = 0
+        batch: List[Dict[str, Any]] = []
+        current = None
+        for collection, document in tier.read(chat_id, location):
+            if batch and (collection != current or len(batch) >= WRITE_BATCH):
+                insert_ignoring_duplicates(self.db[current], batch)
+                batch = []
+            current = collection
+            batch.append(document)
+            count += 1
+        if batch:
+            insert_ignoring_duplicates(self.db[current], batch)
+        self.db[CATALOG].delete_one({"_id": f"chat_{chat_id}"})
+        tier.drop(chat_id, location)
+        return count
+
+    async def inactive_chats(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Chats idle longer than archive_after_days that are not archived yet"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.archive_after_days)
+        pipeline = [
+            # Walks the {chat_id, last_activity} index; $first is each chat's latest activity
+            {"$sort": {"chat_id": 1, "last_activity": -1}},
+            {"$group": {"_id": "$chat_id", "last_activity": {"$first": "$last_activity"}}},
+            {"$match": {"last_activity": {"$lt": cutoff}}},
+            {"$lookup": {"from": MARKERS, "localField": "_id", "foreignField": "_id", "as": "marker"}},
+            {"$match": {"marker": []}},
+            {"$project": {"marker": 0}},
+            {"$limit": limit or self.batch},
+        ]
+        return await self.memberships.aggregate(pipeline).to_list(length=None)
+
+    async def archive_inactive(self) -> int:
+        """Archive one batch of inactive chats; returns how many were archived"""
+        archived = 0
+        for chat in await self.inactive_chats():
+            chat_id = chat["_id"]
+            if chat_id in self._touched:
+                continue
+            async with self._exclusive(chat_id):
+                archived += await self.archive_chat(chat_id, chat["last_activity"])
+        return archived
+
+    async def archive_chat(self, chat_id: str, last_activity: datetime) -> bool:
+        """Move one chat to the archive tier"""
+        from pymongo.errors import DuplicateKeyError
+
+        started = time.monotonic()
+        try:
+            await self.markers.insert_one({
+                "_id": chat_id,
+                "state": "archiving",
+                "tier": self.tier.name,
+                "location": self.tier.location(chat_id),
+                "last_activity": last_activity,
+                "archived_at": datetime.now(timezone.utc),
+            })
+        except DuplicateKeyError:
+            return False
+
+        count = await asyncio.to_thread(self._copy_sync, chat_id)
+        latest = await self.memberships.find_one({"chat_id": chat_id}, {"last_activity": 1}, sort=[("last_activity", -1)])
+        became_active = (
+            self._touched.get(chat_id, 0) >= started
+            or (latest is not None and latest["last_activity"] > last_activity)
+        )
+        if count == 0 or became_active:
+            await asyncio.to_thread(self.tier.drop, chat_id)
+            await self.markers.delete_one({"_id": chat_id})
+            return False
+
+        await asyncio.to_thread(self._delete_hot_sync, chat_id)
+        await self.markers.update_one({"_id": chat_id}, {"$set": {"state": "archived", "documents": count}})
+        self._documents.inc(count, op="archived")
+        self._chats.inc(op="archived")
+        logger.info(f"📦 Archived chat {chat_id} ({count} documents, tier {self.tier.name})")
+        return True
+
+    def _records(self, chat_id: str) -> Iterator[Record]:
+        for name, query in chat_filters(chat_id).items():
+            for document in self.db[name].find(query).batch_size(WRITE_BATCH):
+                yield name, document
+
+    def _copy_sync(self, chat_id: str) -> int:
+        return self.tier.write(chat_id, self._records(chat_id))
+
+    def _delete_hot_sync(self, chat_id: str):
+        for name, query in chat_filters(chat_id).items():
+            self.db[name].delete_many(query)
+        # Memories moved without the store: recount on next use
+        self.db[CATALOG].delete_one({"_id": f"chat_{chat_id}"})
+
+    async def start(self):
+        """Archive inactive chats periodically (no-op when archival is disabled)"""
+        if self.archive_after_days and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="chat-archiver")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                # Keep going while full batches come back, then wait for the next interval
+                while await self.archive_inactive() >= self.batch:
+                    pass
+            except Exception as e:
+                logger.error(f"Chat archival failed: {e}", exc_info=True)
+
+
+async def create_chat_archiver(settings: Settings, db_client: "DBClient") -> Optional[ChatArchiver]:
+    """Create the archiver for MongoDB (other backends do not archive)"""
+    if settings.storage_backend != "mongodb":
+        return None
+    archiver = ChatArchiver(
+        db_client,
+        settings.db_name,
+        tier=settings.chat_archive_tier,
+        archive_dir=settings.chat_archive_dir,
+        archive_after_days=settings.chat_archive_after_days,
+        interval_seconds=settings.chat_archive_interval_seconds,
+        batch=settings.chat_archive_batch,
+    )
+    await archiver.initialize()
+    return archiver
+
+
+async def _cli(args):
+    from storage.mongodb_client import MongoDBClient
+
+    settings = Settings(
+        telegram_bot_token="", openai_api_key="", mongo_uri=args.mongo_uri, db_name=args.db,
+        chat_archive_tier=args.tier, chat_archive_dir=args.dir, chat_archive_after_days=args.days,
+    )
+    db_client = MongoDBClient()
+    await db_client.initialize(settings.mongo_uri)
+    try:
+        archiver = await create_chat_archiver(settings, db_client)
+        if args.restore:
+            for chat_id in args.restore:
+                print(f"{chat_id}: {'restored' if await archiver.ensure_active(chat_id) else 'not archived'}")
+            return
+        candidates = await archiver.inactive_chats(limit=args.limit)
+        for chat in candidates:
+            if args.archive:
+                done = await archiver.archive_chat(chat["_id"], chat["last_activity"])
+                print(f"{chat['_id']}: {'archived' if done else 'skipped'}")
+            else:
+                print(f"{chat['_id']}: idle since {chat['last_activity']:%Y-%m-%d}")
+        print(f"{len(candidates)} chats idle for more than {args.days} days")
+    finally:
+        await db_client.close()
+
+
+def main():
+    """List, archive or restore inactive chats by hand
+
+    The bot archives on its own schedule; archiving from here while the bot
+    runs is safe for idle chats, but a chat that receives a message during
+    its own archival can lose that turn's writes.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.getenv("DB_NAME", "telegram_bot"))
+    parser.add_argument("--days", type=int, default=int(os.getenv("CHAT_ARCHIVE_AFTER_DAYS") or 30))
+    parser.add_argument("--tier", choices=("collections", "files"), default=os.getenv("CHAT_ARCHIVE_TIER", "collections"))
+    parser.add_argument("--dir", default=os.getenv("CHAT_ARCHIVE_DIR", "archive"))
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--archive", action="store_true", help="Archive the listed chats (default: only list them)")
+    parser.add_argument("--restore", action="append", metavar="CHAT_ID", help="Restore an archived chat")
+    asyncio.run(_cli(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+from config.settings import Settings
+from utils.logger import setup_logger
+
+# Backend modules pull in their drivers (motor/pymongo, psycopg, LangGraph
+# stores); only the configured one is imported at runtime
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+    from storage.mongodb_client import MongoDBClient
+    from storage.postgres_client import PostgresClient
+    from storage.memory_backend import InMemoryClient, InMemoryMemoryStore, InMemoryUserProfileStore
+    from storage.stores import MemoryStore, UserProfileStore
+    from storage.postgres_stores import PostgresMemoryStore, PostgresUserProfileStore
+
+logger = setup_logger()
+
+DBClient = Union["MongoDBClient", "PostgresClient", "InMemoryClient"]
+MemoryStoreType = Union["MemoryStore", "PostgresMemoryStore", "InMemoryMemoryStore"]
+ProfileStoreType = Union["UserProfileStore", "PostgresUserProfileStore", "InMemoryUserProfileStore"]
+
+
+class MemoryWrites:
+    """The memory store's single write path
+
+    Wraps the store's aput/adelete once. After each successful write, every
+    registered hook's on_memory_write(namespace, key, value, previous) runs
+    in registration order (value None: deleted). Components that keep data
+    derived from memories (text index prefix, namespace catalog, user memory
+    index, response cache) register here instead of wrapping the store.
+
+    previous is the memory's value before the write. It costs one read and
+    is only fetched when a hook sets needs_previous; writes to the same
+    memory are then serialized in this process so it stays accurate. If it
+    cannot be read, those hooks get invalidate(namespace) instead.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._hooks: List[Any] = []
+        self._needs_previous = False
+        # (namespace, key) -> [lock, holders + waiters]; entries are dropped when unused
+        self._locks: Dict[tuple, List[Any]] = {}
+        self._put, self._delete = store.aput, store.adelete
+        store.aput, store.adelete = self.aput, self.adelete
+
+    def add(self, hook):
+        """Register a hook (None is ignored, for disabled components)"""
+        if hook is not None:
+            self._hooks.append(hook)
+            self._needs_previous = self._needs_previous or getattr(hook, "needs_previous", False)
+        return hook
+
+    async def aput(self, namespace, key, value, *args, **kwargs):
+        return await self._write(namespace, key, value, lambda: self._put(namespace, key, value, *args, **kwargs))
+
+    async def adelete(self, namespace, key, *args, **kwargs):
+        return await self._write(namespace, key, None, lambda: self._delete(namespace, key, *args, **kwargs))
+
+    async def _write(self, namespace, key: str, value, write):
+        namespace = tuple(namespace)
+        if not self._needs_previous:
+            result = await write()
+            await self._notify(namespace, key, value, None, previous_known=True)
+            return result
+
+        async with self._exclusive((namespace, key)):
+            try:
+                item = await self.store.aget(namespace, key)
+                previous, previous_known = (item.value if item is not None else None), True
+            except Exception as e:
+                logger.warning(f"Could not read {namespace}/{key} before writing it: {e}")
+                previous, previous_known = None, False
+            result = await write()
+            await self._notify(namespace, key, value, previous, previous_known)
+        return result
+
+    async def _notify(self, namespace: tuple, key: str, value, previous, previous_known: bool):
+        for hook in self._hooks:
+            try:
+                if previous_known or not getattr(hook, "needs_previous", False):
+                    await hook.on_memory_write(namespace, key, value, previous)
+                else:
+                    await hook.invalidate(namespace)
+            except Exception as e:
+                # The memory write succeeded; derived data is repaired by its own rebuild or refresh
+                logger.warning(f"{type(hook).__name__} not updated for {namespace}/{key}: {e}")
+
+    @asynccontextmanager
+    async def _exclusive(self, memory: tuple):
+        entry = self._locks.get(memory)
+        if entry is None:
+            entry = self._locks[memory] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[memory]
+
+
+async def create_db_client(settings: Settings) -> DBClient:
+    """Create and initialize the database client for the configured backend"""
+    if settings.storage_backend == "postgres":
+        from storage.postgres_client import PostgresClient
+
+        db_client = PostgresClient()
+        await db_client.initialize(
+            settings.postgres_uri,
+            min_size=settings.postgres_pool_min_size,
+            max_size=settings.postgres_pool_max_size,
+        )
+    elif settings.storage_backend == "memory":
+        from storage.memory_backend import InMemoryClient
+
+        db_client = InMemoryClient()
+        await db_client.initialize()
+    else:
+        from storage.mongodb_client import MongoDBClient
+
+        db_client = MongoDBClient()
+        await db_client.initialize(settings.mongo_uri, settings.mongo_client_options())
+
+    logger.info(f"Storage backend: {settings.storage_backend}")
+    return db_client
+
+
+async def create_stores(
+    settings: Settings,
+    db_client: DBClient,
+    embedder: Optional["Embeddings"] = None
+) -> Tuple[MemoryStoreType, ProfileStoreType]:
+    """Create and initialize the memory and profile stores for the configured backend"""
+    if settings.storage_backend == "postgres":
+        from storage.postgres_stores import PostgresMemoryStore, PostgresUserProfileStore
+
+        memory_store = PostgresMemoryStore(
+            db_client, settings.db_name, embedder=embedder,
+            prefilter_max=settings.memory_search_prefilter_max,
+            catalog=settings.memory_catalog_enabled,
+        )
+        profile_store = PostgresUserProfileStore(db_client, settings.db_name)
+    elif settings.storage_backend == "memory":
+        from storage.memory_backend import InMemoryMemoryStore, InMemoryUserProfileStore
+
+        memory_store = InMemoryMemoryStore(
+            db_client, settings.db_name, embedder=embedder,
+            prefilter_max=settings.memory_search_prefilter_max,
+            catalog=settings.memory_catalog_enabled,
+        )
+        profile_store = InMemoryUserProfileStore(db_client, settings.db_name)
+    else:
+        from storage.stores import MemoryStore, UserProfileStore
+
+        memory_store = MemoryStore(
+            db_client, settings.db_name, embedder=embedder,
+            prefilter_max=settings.memory_search_prefilter_max,
+            catalog=settings.memory_catalog_enabled,
+        )
+        profile_store = UserProfileStore(db_client, settings.db_name)
+
+    # Index checks for the two collections are independent
+    await asyncio.gather(memory_store.initialize(), profile_store.initialize())
+    return memory_store, profile_store
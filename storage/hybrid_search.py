@@ -0,0 +1,294 @@
+"""
+Hybrid lexical + vector retrieval for LangMem memories.
+
+Memories are written as "Full Name (@username, ID: 123) ...", so many
+searches name a user exactly. Vector similarity alone blurs those tokens,
+so a search is answered in one of three ways:
+
+    prefilter         the query names a user (ID: 123 / @username) and few
+                      memories mention them: return those, no embedding call
+    prefilter_ranked  up to prefilter_max memories mention them: rank just
+                      those by keyword score and vector similarity (exact
+                      cosine over stored embeddings on MongoDB, no ANN)
+    hybrid            otherwise: run keyword and vector search concurrently
+                      and merge the two rankings with reciprocal rank fusion
+
+MongoDB serves the keyword side from a text index on value.content,
+prefixed by the memory's namespace so a search only reads the text
+matches of its own chat; other backends score a bounded namespace listing
+in process.
+"""
+
+import asyncio
+import math
+import re
+import time
+from collections import Counter as TermCounter
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+from langgraph.store.base import SearchItem
+from utils.logger import setup_logger
+from utils.metrics import instrument_methods, metrics
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+logger = setup_logger()
+
+TEXT_INDEX_NAME = "memory_text"
+# Scalar copy of the namespace: namespace and namespace_prefix are arrays,
+# which a text index cannot take as prefix keys
+NAMESPACE_FIELD = "namespace_path"
+RRF_K = 60
+
+_ID_PATTERN = re.compile(r"\bID:\s*-?(\d+)", re.IGNORECASE)
+_USERNAME_PATTERN = re.compile(r"@(\w{3,32})")
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Keyword search only; identity tokens are matched separately
+_STOP_WORDS = frozenset(
+    "a an and are as at be by did do does for from has have i in is it me my of on or "
+    "the their they this to was what when where which who whom why with you your".split()
+)
+
+Hit = Tuple[SearchItem, Optional[List[float]]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens (underscores kept, so usernames stay whole)"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def identity_tokens(query: str) -> List[str]:
+    """User IDs and usernames named in a query, in order of appearance"""
+    tokens = _ID_PATTERN.findall(query) + [name.lower() for name in _USERNAME_PATTERN.findall(query)]
+    return list(dict.fromkeys(tokens))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[SearchItem]], k: int = RRF_K) -> List[SearchItem]:
+    """Merge rankings by summing 1 / (k + rank); the fused score replaces each item's score"""
+    scores: Dict[Tuple[tuple, str], float] = {}
+    items: Dict[Tuple[tuple, str], SearchItem] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            key = (item.namespace, item.key)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            items.setdefault(key, item)
+
+    fused = []
+    for key in sorted(scores, key=scores.get, reverse=True):
+        item = items[key]
+        fused.append(SearchItem(
+            namespace=item.namespace,
+            key=item.key,
+            value=item.value,
+            created_at=item.created_at,
+            updated_at=item.updated_at,
+            score=scores[key],
+        ))
+    return fused
+
+
+def cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    """Cosine similarity of two vectors"""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _content(value: Dict[str, Any]) -> str:
+    content = value.get("content", "")
+    return content if isinstance(content, str) else str(content)
+
+
+class MongoTextIndex:
+    """Keyword search over memories through a MongoDB text index on (namespace_path, value.content)"""
+
+    def __init__(self, collection, embedding_key: str = "embedding", separator: str = "/"):
+        # Async (motor) collection; the LangGraph store keeps its own sync handle
+        self.collection = collection
+        self.embedding_key = embedding_key
+        self.separator = separator
+
+    async def initialize(self):
+        """Create the namespace-prefixed text index, replacing an unprefixed one"""
+        from pymongo.errors import OperationFailure
+
+        try:
+            indexes = await self.collection.index_information()
+            current = indexes.get(TEXT_INDEX_NAME)
+            if current is None or current["key"][0][0] != NAMESPACE_FIELD:
+                # Memories written before the prefix existed must carry it before the index is used
+                await self.backfill()
+                if current is not None:
+                    # A collection can only have one text index
+                    await self.collection.drop_index(TEXT_INDEX_NAME)
+                await self.collection.create_index(
+                    [(NAMESPACE_FIELD, 1), ("value.content", "text")], name=TEXT_INDEX_NAME
+                )
+                logger.info(f"✅ Memory text index {TEXT_INDEX_NAME} created on ({NAMESPACE_FIELD}, value.content)")
+        except OperationFailure as e:
+            logger.warning(f"Memory text index not created: {e}")
+        instrument_methods(self, ("search", "lookup"), "store_operation_seconds", store=self.__class__.__name__)
+
+    async def backfill(self) -> int:
+        """Set namespace_path on memories written without it; returns memories updated"""
+        result = await self.collection.update_many(
+            {NAMESPACE_FIELD: {"$exists": False}, "namespace_prefix": {"$exists": True}},
+            # The last prefix is the whole namespace joined with the separator
+            [{"$set": {NAMESPACE_FIELD: {"$arrayElemAt": ["$namespace_prefix", -1]}}}],
+        )
+        return result.modified_count
+
+    async def on_memory_write(self, namespace: tuple, key: str, value: Optional[Dict[str, Any]], previous=None):
+        """Set namespace_path on a memory written through the store's write path"""
+        if value is not None:
+            # Kept across overwrites: the store $sets its own fields only
+            await self.collection.update_one(
+                {"namespace": list(namespace), "key": key},
+                {"$set": {NAMESPACE_FIELD: self.separator.join(namespace)}},
+            )
+
+    async def _find(self, namespace: tuple, terms: str, limit: int, with_vectors: bool) -> List[Hit]:
+        projection = {"_id": 0, "namespace": 1, "key": 1, "value": 1, "created_at": 1, "updated_at": 1,
+                      "score": {"$meta": "textScore"}}
+        if with_vectors:
+            projection[self.embedding_key] = 1
+        cursor = self.collection.find(
+            {NAMESPACE_FIELD: self.separator.join(namespace), "$text": {"$search": terms}},
+            projection,
+        ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+
+        hits = []
+        async for doc in cursor:
+            hits.append((
+                SearchItem(
+                    namespace=tuple(doc["namespace"]),
+                    key=doc["key"],
+                    value=doc["value"],
+                    created_at=doc["created_at"],
+                    updated_at=doc["updated_at"],
+                    score=doc.get("score"),
+                ),
+                doc.get(self.embedding_key),
+            ))
+        return hits
+
+    async def search(self, namespace: tuple, query: str, limit: int) -> List[SearchItem]:
+        """Memories matching any query term, best text score first"""
+        terms = " ".join(token for token in tokenize(query) if token not in _STOP_WORDS)
+        if not terms:
+            return []
+        return [item for item, _ in await self._find(namespace, terms, limit, with_vectors=False)]
+
+    async def lookup(self, namespace: tuple, tokens: List[str], limit: int) -> List[Hit]:
+        """Memories mentioning any of the tokens, with their stored embeddings"""
+        # Unquoted terms are ORed ("phrases" would be ANDed); the text index stems
+        # terms, so keep only memories that contain one of the tokens verbatim
+        wanted = set(tokens)
+        hits = await self._find(namespace, " ".join(tokens), limit, with_vectors=True)
+        return [(item, vector) for item, vector in hits if wanted.intersection(tokenize(_content(item.value)))]
+
+
+class ScanTextIndex:
+    """Keyword search by scoring a bounded namespace listing in process
+
+    Used by backends without a text index (in-memory, PostgreSQL). Memories
+    beyond scan_limit in a namespace are not seen by the keyword side.
+    """
+
+    def __init__(self, store, scan_limit: int = 1000):
+        self.store = store
+        self.scan_limit = scan_limit
+
+    async def initialize(self):
+        """Nothing to prepare"""
+        pass
+
+    async def _scan(self, namespace: tuple) -> List[Tuple[SearchItem, TermCounter]]:
+        items = await self.store.asearch(namespace, limit=self.scan_limit)
+        return [(item, TermCounter(tokenize(_content(item.value)))) for item in items]
+
+    async def search(self, namespace: tuple, query: str, limit: int) -> List[SearchItem]:
+        """Memories matching any query term, ranked by tf-idf"""
+        terms = {token for token in tokenize(query) if token not in _STOP_WORDS}
+        if not terms:
+            return []
+        scanned = await self._scan(namespace)
+        document_frequency = {term: sum(1 for _, counts in scanned if term in counts) for term in terms}
+
+        scored = []
+        for item, counts in scanned:
+            score = sum(
+                (1 + math.log(counts[term])) * math.log(1 + len(scanned) / document_frequency[term])
+                for term in terms if counts[term]
+            )
+            if score:
+                scored.append((score, item))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return [item for _, item in scored[:limit]]
+
+    async def lookup(self, namespace: tuple, tokens: List[str], limit: int) -> List[Hit]:
+        """Memories mentioning any of the tokens (stored embeddings are not exposed)"""
+        wanted = set(tokens)
+        hits = [(item, None) for item, counts in await self._scan(namespace) if wanted & counts.keys()]
+        return hits[:limit]
+
+
+class HybridSearch:
+    """Keyword + vector memory search with identity pre-filtering"""
+
+    def __init__(
+        self,
+        store,
+        embedder: Optional["Embeddings"],
+        text_index,
+        prefilter_max: int = 50,
+        candidates: int = 20,
+    ):
+        self.store = store
+        self.embedder = embedder
+        self.text_index = text_index
+        self.prefilter_max = prefilter_max
+        self.candidates = candidates
+        self._seconds = metrics.histogram("memory_search_seconds", "Memory search latency by retrieval mode")
+
+    async def initialize(self):
+        """Prepare the keyword index"""
+        await self.text_index.initialize()
+
+    async def search(self, namespace: tuple, query: str, limit: int = 10, offset: int = 0) -> List[SearchItem]:
+        """Search memories in a namespace, merging keyword and vector rankings"""
+        start = time.perf_counter()
+        mode, items = await self._search(namespace, query, limit + offset)
+        self._seconds.observe(time.perf_counter() - start, mode=mode)
+        return items[offset:offset + limit]
+
+    async def _search(self, namespace: tuple, query: str, wanted: int) -> Tuple[str, List[SearchItem]]:
+        tokens = identity_tokens(query)
+        hits = await self.text_index.lookup(namespace, tokens, self.prefilter_max + 1) if tokens else []
+        if hits and len(hits) <= wanted:
+            return "prefilter", [item for item, _ in hits]
+        if hits and len(hits) <= self.prefilter_max:
+            candidates = [item for item, _ in hits]
+            if not self.embedder:
+                return "prefilter_ranked", candidates[:wanted]
+            if all(vector is not None for _, vector in hits):
+                query_vector = await self.embedder.aembed_query(query)
+                ranked = sorted(hits, key=lambda hit: cosine(query_vector, hit[1]), reverse=True)
+                by_similarity = [item for item, _ in ranked]
+            else:
+                # Backend does not expose stored vectors: keep the vector ranking of the candidates
+                keys = {item.key for item in candidates}
+                vector = await self.store.asearch(namespace, query=query, limit=max(self.candidates, len(hits)))
+                by_similarity = [item for item in vector if item.key in keys]
+            return "prefilter_ranked", reciprocal_rank_fusion([candidates, by_similarity])[:wanted]
+
+        size = max(self.candidates, wanted)
+        if self.embedder:
+            keyword, vector = await asyncio.gather(
+                self.text_index.search(namespace, query, size),
+                self.store.asearch(namespace, query=query, limit=size),
+            )
+        else:
+            keyword, vector = await self.text_index.search(namespace, query, size), []
+        return "hybrid", reciprocal_rank_fusion([keyword, vector])[:wanted]
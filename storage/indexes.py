@@ -0,0 +1,224 @@
+"""
+Create and verify the indexes behind the bot's hot MongoDB queries.
+
+Runs `explain` on each query the message path issues (membership lookups,
+profile and memory reads, checkpoint loads, update journal claims) and
+reports the winning plan with keys/documents examined. Exits non-zero if a
+query falls back to a collection scan or an in-memory sort, or needs an
+index that does not exist (the memory text index behind hybrid search).
+
+Usage:
+    python -m storage.indexes                          # verify
+    python -m storage.indexes --create                 # create missing indexes first
+    python -m storage.indexes --migrate-memberships    # copy legacy memberships from user_profiles
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import OperationFailure
+from config.settings import Settings
+from storage.archive import ChatArchiver
+from storage.hybrid_search import NAMESPACE_FIELD, MongoTextIndex
+from storage.user_memory_index import MongoUserMemoryIndex
+from storage.memberships import COLLECTION_NAME, MongoMembershipStore
+from storage.mongodb_client import MongoDBClient
+from storage.update_journal import MongoUpdateJournal
+
+OK_STAGES = {"IXSCAN", "IDHACK", "EXPRESS_IXSCAN", "EXPRESS_CLUSTERED_IXSCAN", "EXPRESS_UPDATE", "CLUSTERED_IXSCAN"}
+
+
+def _stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten a (classic or SBE) winning plan into its stages, outermost first"""
+    plan = plan.get("queryPlan", plan)
+    stages = [plan]
+    for key in ("inputStage", "outerStage", "innerStage"):
+        if key in plan:
+            stages.extend(_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_stages(child))
+    return stages
+
+
+def _sample(collection, field: str, default: Any) -> Any:
+    doc = collection.find_one({field: {"$exists": True}}, {field: 1})
+    return doc[field] if doc else default
+
+
+def hot_queries(db) -> List[Tuple[str, Any, Dict[str, Any], Dict[str, Any]]]:
+    """(label, collection, filter, cursor options) for each hot-path query"""
+    memberships = db[COLLECTION_NAME]
+    profiles = db["user_profiles"]
+    memories = db["langmem_store"]
+    checkpoints = db["checkpoints"]
+    writes = db["checkpoint_writes"]
+
+    chat_id = _sample(memberships, "chat_id", "-1001")
+    user_id = _sample(memberships, "user_id", "1001")
+    thread_id = _sample(checkpoints, "thread_id", "telegram_chat_-1001")
+    checkpoint_id = _sample(checkpoints, "checkpoint_id", "")
+    memory_namespace = _sample(memories, "namespace", ["chat_-1001"])
+
+    recent = {"sort": [("last_activity", -1)], "limit": 100}
+    return [
+        ("members of chat", memberships, {"chat_id": chat_id}, recent),
+        ("chats of user", memberships, {"user_id": user_id}, recent),
+        ("membership upsert", memberships, {"_id": f"{chat_id}:{user_id}"}, {}),
+        ("profile get", profiles, {"namespace": ["profiles"], "key": f"profile_{user_id}"}, {}),
+        ("memory get", memories, {"namespace": memory_namespace, "key": "x"}, {}),
+        ("memory namespace stats", memories, {"namespace": memory_namespace}, {}),
+        (
+            "user memory recall", db["user_memory_index"],
+            {"user_id": user_id, "chat_id": {"$in": [chat_id, user_id]}},
+            {"sort": [("updated_at", -1)], "limit": 200},
+        ),
+        ("memory catalog lookup", db["memory_catalog"], {"_id": "/".join(memory_namespace)}, {}),
+        (
+            "memory keyword search", memories,
+            {NAMESPACE_FIELD: "/".join(memory_namespace), "$text": {"$search": "remember"}}, {"limit": 20},
+        ),
+        (
+            "latest checkpoint", checkpoints, {"thread_id": thread_id, "checkpoint_ns": ""},
+            {"sort": [("checkpoint_id", -1)], "limit": 1},
+        ),
+        (
+            "checkpoint writes", writes,
+            {"thread_id": thread_id, "checkpoint_ns": "", "checkpoint_id": checkpoint_id}, {},
+        ),
+        ("update journal claim", db["update_journal"], {"_id": 0}, {}),
+        ("archived chat check", db["archived_chats"], {"_id": chat_id}, {}),
+    ]
+
+
+def explain(collection, query: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    cursor = collection.find(query)
+    if "sort" in options:
+        cursor = cursor.sort(options["sort"])
+    if "limit" in options:
+        cursor = cursor.limit(options["limit"])
+    try:
+        result = cursor.explain()
+    except OperationFailure as e:
+        # $text without a text index fails outright instead of scanning
+        return {"plan": e.details.get("errmsg", str(e)) if e.details else str(e),
+                "keys": 0, "docs": 0, "returned": 0, "ms": 0, "verdict": "NO INDEX"}
+
+    stages = _stages(result["queryPlanner"]["winningPlan"])
+    names = [stage["stage"] for stage in stages]
+    indexes = [stage["indexName"] for stage in stages if "indexName" in stage]
+    stats = result.get("executionStats", {})
+
+    if names == ["EOF"]:
+        verdict = "EMPTY"
+    elif "COLLSCAN" in names:
+        verdict = "COLLSCAN"
+    elif "SORT" in names:
+        verdict = "IN-MEMORY SORT"
+    elif OK_STAGES & set(names):
+        verdict = "OK"
+    else:
+        verdict = "CHECK"
+    return {
+        "plan": ">".join(names) + (f" ({', '.join(indexes)})" if indexes else ""),
+        "keys": stats.get("totalKeysExamined", 0),
+        "docs": stats.get("totalDocsExamined", 0),
+        "returned": stats.get("nReturned", 0),
+        "ms": stats.get("executionTimeMillis", 0),
+        "verdict": verdict,
+    }
+
+
+def migrate_memberships(db) -> int:
+    """Copy memberships stored under the legacy ("chat_memberships",) namespace of user_profiles"""
+    operations = []
+    for doc in db["user_profiles"].find({"namespace": ["chat_memberships"]}):
+        value = doc.get("value", {})
+        chat, user = value.get("chat_data", {}), value.get("user_data", {})
+        chat_id, user_id = chat.get("chat_id"), user.get("user_id")
+        if not chat_id or not user_id:
+            continue
+        try:
+            last_activity = datetime.fromisoformat(value["last_activity"]).astimezone(timezone.utc)
+        except (KeyError, ValueError):
+            last_activity = doc.get("updated_at") or datetime.now(timezone.utc)
+        operations.append(UpdateOne(
+            {"_id": f"{chat_id}:{user_id}"},
+            {
+                # Never overwrite activity recorded by the new code path
+                "$max": {"last_activity": last_activity},
+                "$setOnInsert": {
+                    "chat_id": chat_id,
+                    "user_id": user_id,
+                    "chat_type": chat.get("chat_type"),
+                    "chat_title": chat.get("chat_title"),
+                    "username": user.get("username"),
+                    "full_name": user.get("full_name"),
+                    "joined_at": doc.get("created_at") or last_activity,
+                },
+            },
+            upsert=True,
+        ))
+    if operations:
+        db[COLLECTION_NAME].bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+async def create_indexes(mongo_uri: str, db_name: str, ttl_days: int):
+    """Create the indexes owned by this code base (LangGraph creates its own on first use)"""
+    db_client = MongoDBClient()
+    await db_client.initialize(mongo_uri)
+    try:
+        await MongoMembershipStore(db_client, db_name, ttl_days).initialize()
+        await MongoUpdateJournal(db_client, db_name).initialize()
+        text_index = MongoTextIndex(db_client.async_client[db_name]["langmem_store"])
+        await text_index.initialize()
+        # Memories imported or written by older versions lack the text index prefix
+        print(f"Set {NAMESPACE_FIELD} on {await text_index.backfill()} memories")
+        await ChatArchiver(db_client, db_name).initialize()
+        await MongoUserMemoryIndex(db_client, db_name, membership_store=None).initialize()
+    finally:
+        await db_client.close()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.getenv("DB_NAME", "telegram_bot"))
+    parser.add_argument("--create", action="store_true", help="Create missing indexes before verifying")
+    parser.add_argument("--migrate-memberships", action="store_true", help="Copy legacy membership entries")
+    args = parser.parse_args()
+
+    if args.create:
+        ttl_days = int(os.getenv("MEMBERSHIP_TTL_DAYS", str(Settings.membership_ttl_days)))
+        asyncio.run(create_indexes(args.mongo_uri, args.db, ttl_days))
+
+    client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5_000)
+    db = client[args.db]
+
+    if args.migrate_memberships:
+        print(f"Migrated {migrate_memberships(db)} legacy memberships into {COLLECTION_NAME}")
+
+    failures = 0
+    print(f"{'query':<22} {'verdict':<15} {'keys':>6} {'docs':>6} {'ret':>5} {'ms':>4}  plan")
+    for label, collection, query, options in hot_queries(db):
+        result = explain(collection, query, options)
+        failures += result["verdict"] in ("COLLSCAN", "IN-MEMORY SORT", "NO INDEX")
+        print(
+            f"{label:<22} {result['verdict']:<15} {result['keys']:>6} {result['docs']:>6} "
+            f"{result['returned']:>5} {result['ms']:>4}  {result['plan']}"
+        )
+    client.close()
+
+    if failures:
+        print(f"\n{failures} hot queries are not served by an index; run with --create")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
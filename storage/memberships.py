@@ -0,0 +1,157 @@
+"""
+Chat membership tracking with indexed chat -> users and user -> chats lookups.
+
+MongoDB keeps one document per (chat, user) pair in the chat_memberships
+collection:
+
+    {_id: "<chat_id>:<user_id>", chat_id, user_id, chat_type, chat_title,
+     username, full_name, joined_at, last_activity}
+
+    {chat_id: 1, last_activity: -1}   members of a chat, most recent first
+    {user_id: 1, last_activity: -1}   chats of a user, most recent first
+    {last_activity: 1} TTL            drops memberships idle for membership_ttl_days
+
+Other backends store the same fields through their LangGraph store, once
+under ("chat_memberships", chat_id) and once under ("user_chats", user_id),
+so both lookups are namespace listings; idle entries are filtered on read.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Union
+from config.settings import Settings
+from utils.logger import setup_logger
+from utils.metrics import instrument_methods
+
+if TYPE_CHECKING:
+    from storage.backends import DBClient, ProfileStoreType
+
+logger = setup_logger()
+
+COLLECTION_NAME = "chat_memberships"
+
+
+def _membership(chat_id: str, user_id: str, chat_data: Dict[str, Any], user_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "chat_id": chat_id,
+        "user_id": user_id,
+        "chat_type": chat_data.get("chat_type"),
+        "chat_title": chat_data.get("chat_title"),
+        "username": user_data.get("username"),
+        "full_name": user_data.get("full_name"),
+    }
+
+
+class MongoMembershipStore:
+    """Memberships in a dedicated, indexed MongoDB collection with TTL expiry"""
+
+    def __init__(self, db_client: "DBClient", db_name: str, ttl_days: int = 90):
+        self.collection = db_client.async_client[db_name][COLLECTION_NAME]
+        self.ttl_days = ttl_days
+        self._initialized = False
+
+    async def initialize(self):
+        """Create the lookup and TTL indexes"""
+        if self._initialized:
+            return
+        from pymongo.errors import OperationFailure
+
+        await self.collection.create_index([("chat_id", 1), ("last_activity", -1)], name="chat_members")
+        await self.collection.create_index([("user_id", 1), ("last_activity", -1)], name="user_chats")
+        if self.ttl_days:
+            ttl_seconds = self.ttl_days * 86_400
+            try:
+                await self.collection.create_index("last_activity", name="activity_ttl", expireAfterSeconds=ttl_seconds)
+            except OperationFailure:
+                # Existing TTL index with a different expiry: change it in place
+                await self.collection.database.command(
+                    "collMod", COLLECTION_NAME,
+                    index={"name": "activity_ttl", "expireAfterSeconds": ttl_seconds},
+                )
+
+        instrument_methods(
+            self,
+            ("record_activity", "get_chat_members", "get_user_chats"),
+            "store_operation_seconds",
+            store=self.__class__.__name__,
+        )
+        self._initialized = True
+        logger.info(f"✅ {self.__class__.__name__} initialized (TTL {self.ttl_days or 'off'} days)")
+
+    async def record_activity(
+        self, chat_id: str, user_id: str, chat_data: Dict[str, Any], user_data: Dict[str, Any]
+    ) -> None:
+        """Upsert the membership and bump its last activity"""
+        now = datetime.now(timezone.utc)
+        await self.collection.update_one(
+            {"_id": f"{chat_id}:{user_id}"},
+            {
+                "$set": {**_membership(chat_id, user_id, chat_data, user_data), "last_activity": now},
+                "$setOnInsert": {"joined_at": now},
+            },
+            upsert=True,
+        )
+
+    async def get_chat_members(self, chat_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Members of a chat, most recently active first"""
+        cursor = self.collection.find({"chat_id": chat_id}, {"_id": 0}).sort("last_activity", -1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def get_user_chats(self, user_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Chats a user is active in, most recent first"""
+        cursor = self.collection.find({"user_id": user_id}, {"_id": 0}).sort("last_activity", -1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+
+class StoreMembershipStore:
+    """Memberships kept in a LangGraph store under per-chat and per-user namespaces"""
+
+    def __init__(self, profile_store: "ProfileStoreType", ttl_days: int = 90):
+        self.profile_store = profile_store
+        self.ttl_days = ttl_days
+
+    async def initialize(self):
+        """Nothing to prepare; namespaces are created on write"""
+        pass
+
+    async def record_activity(
+        self, chat_id: str, user_id: str, chat_data: Dict[str, Any], user_data: Dict[str, Any]
+    ) -> None:
+        """Upsert the membership under both lookup namespaces"""
+        value = {
+            **_membership(chat_id, user_id, chat_data, user_data),
+            "last_activity": datetime.now(timezone.utc).isoformat(),
+        }
+        store = self.profile_store.store
+        await store.aput(("chat_memberships", chat_id), user_id, value)
+        await store.aput(("user_chats", user_id), chat_id, value)
+
+    async def _list(self, namespace: tuple, limit: int) -> List[Dict[str, Any]]:
+        items = await self.profile_store.store.asearch(namespace, limit=limit)
+        values = [item.value for item in items]
+        if self.ttl_days:
+            cutoff = (datetime.now(timezone.utc) - timedelta(days=self.ttl_days)).isoformat()
+            values = [value for value in values if value.get("last_activity", "") >= cutoff]
+        return sorted(values, key=lambda value: value.get("last_activity", ""), reverse=True)
+
+    async def get_chat_members(self, chat_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Members of a chat, most recently active first"""
+        return await self._list(("chat_memberships", chat_id), limit)
+
+    async def get_user_chats(self, user_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Chats a user is active in, most recent first"""
+        return await self._list(("user_chats", user_id), limit)
+
+
+MembershipStore = Union[MongoMembershipStore, StoreMembershipStore]
+
+
+async def create_membership_store(
+    settings: Settings, db_client: "DBClient", profile_store: "ProfileStoreType"
+) -> MembershipStore:
+    """Create and initialize the membership store for the configured backend"""
+    if settings.storage_backend == "mongodb":
+        membership_store = MongoMembershipStore(db_client, settings.db_name, settings.membership_ttl_days)
+    else:
+        membership_store = StoreMembershipStore(profile_store, settings.membership_ttl_days)
+    await membership_store.initialize()
+    return membership_store
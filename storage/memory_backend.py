@@ -0,0 +1,149 @@
+from typing import Any, Dict, Optional
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.store.memory import InMemoryStore
+from langchain_core.embeddings import Embeddings
+from storage.backends import MemoryWrites
+from storage.hybrid_search import HybridSearch, ScanTextIndex
+from storage.namespace_catalog import NamespaceCatalog
+from utils.logger import setup_logger
+from utils.metrics import instrument_methods
+
+logger = setup_logger()
+
+
+class InMemoryClient:
+    """Process-local stand-in for a database client (development and benchmarks)
+
+    Nothing is persisted; all data is lost when the process exits.
+    """
+
+    async def initialize(self):
+        """Nothing to connect to"""
+        logger.warning("⚠️  Using in-memory storage - data is not persisted")
+
+    def pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """No connection pools"""
+        return {}
+
+    async def create_checkpointer(
+        self, db_name: str, serde: Optional[SerializerProtocol] = None
+    ) -> InMemorySaver:
+        """Create an in-process checkpointer"""
+        return InMemorySaver(serde=serde)
+
+    async def close(self):
+        """Nothing to close"""
+        pass
+
+
+class _InMemoryStore(InMemoryStore):
+    """InMemoryStore without __slots__, so instrument_methods can wrap its methods"""
+
+
+class InMemoryBaseStore:
+    """Base class for in-process stores with the same interface as the MongoDB stores"""
+
+    def __init__(
+        self,
+        db_client: InMemoryClient,
+        db_name: str,
+        collection_name: str,
+        embedder: Optional[Embeddings] = None
+    ):
+        self.db_client = db_client
+        self.db_name = db_name
+        self.collection_name = collection_name
+        self.embedder = embedder
+        self._store: Optional[InMemoryStore] = None
+        self._initialized = False
+
+    async def initialize(self):
+        """Initialize InMemoryStore instance"""
+        if self._initialized:
+            return
+
+        if self.embedder:
+            self._store = _InMemoryStore(
+                index={"dims": 1536, "embed": self.embedder, "fields": ["content"]}
+            )
+        else:
+            self._store = _InMemoryStore()
+
+        instrument_methods(
+            self._store,
+            ("aget", "aput", "asearch", "adelete"),
+            "store_operation_seconds",
+            store=self.__class__.__name__,
+        )
+
+        self._initialized = True
+        logger.info(f"✅ {self.__class__.__name__} initialized (in-memory)")
+
+    @property
+    def store(self) -> InMemoryStore:
+        """Get InMemoryStore instance"""
+        if not self._initialized or self._store is None:
+            raise RuntimeError(f"{self.__class__.__name__} not initialized. Call initialize() first.")
+        return self._store
+
+
+class InMemoryMemoryStore(InMemoryBaseStore):
+    """In-process store for LangMem memories"""
+
+    def __init__(
+        self,
+        db_client: InMemoryClient,
+        db_name: str,
+        embedder: Optional[Embeddings] = None,
+        prefilter_max: int = 50,
+        catalog: bool = True
+    ):
+        super().__init__(db_client, db_name, "langmem_store", embedder)
+        self.prefilter_max = prefilter_max
+        self.use_catalog = catalog
+        self._hybrid: Optional[HybridSearch] = None
+        self._catalog: Optional[NamespaceCatalog] = None
+        self._writes: Optional[MemoryWrites] = None
+
+    async def initialize(self):
+        """Initialize the store, hybrid search and namespace catalog over it (keywords scored in process)"""
+        if self._initialized:
+            return
+        await super().initialize()
+
+        self._writes = MemoryWrites(self._store)
+        self._hybrid = HybridSearch(self._store, self.embedder, ScanTextIndex(self._store), self.prefilter_max)
+        await self._hybrid.initialize()
+        if self.use_catalog:
+            self._catalog = NamespaceCatalog(self._store)
+            await self._catalog.initialize()
+            self._writes.add(self._catalog)
+
+    @property
+    def hybrid(self) -> HybridSearch:
+        """Get hybrid (keyword + vector) search over this store"""
+        if self._hybrid is None:
+            raise RuntimeError(f"{self.__class__.__name__} not initialized. Call initialize() first.")
+        return self._hybrid
+
+    @property
+    def writes(self) -> MemoryWrites:
+        """Get the write path that keeps derived data in step with memory writes"""
+        if self._writes is None:
+            raise RuntimeError(f"{self.__class__.__name__} not initialized. Call initialize() first.")
+        return self._writes
+
+    @property
+    def catalog(self) -> Optional[NamespaceCatalog]:
+        """Get the namespace catalog (None when disabled)"""
+        if not self._initialized:
+            raise RuntimeError(f"{self.__class__.__name__} not initialized. Call initialize() first.")
+        return self._catalog
+
+
+class InMemoryUserProfileStore(InMemoryBaseStore):
+    """In-process store for user profiles"""
+
+    def __init__(self, db_client: InMemoryClient, db_name: str):
+        super().__init__(db_client, db_name, "user_profiles")
@@ -1,8 +1,12 @@
-from typing import Optional
+import asyncio
+from typing import Any, Dict, Optional
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
 from pymongo.synchronous.database import Database
 from pymongo.synchronous.collection import Collection
+from langgraph.checkpoint.mongodb import MongoDBSaver
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from storage.pool_monitor import MongoPoolMonitor
 from utils.logger import setup_logger
 
 logger = setup_logger()
@@ -14,25 +18,59 @@ class MongoDBClient:
     _instance: Optional['MongoDBClient'] = None
     _async_client: Optional[AsyncIOMotorClient] = None
     _sync_client: Optional[MongoClient] = None
+    _pool_monitors: Dict[str, MongoPoolMonitor] = {}
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
     
-    async def initialize(self, mongo_uri: str):
-        """Initialize both sync and async MongoDB clients"""
+    async def initialize(self, mongo_uri: str, client_options: Optional[Dict[str, Any]] = None):
+        """Initialize both sync and async MongoDB clients
+        
+        Args:
+            mongo_uri: MongoDB connection string
+            client_options: Pool sizes, timeouts and compressors (see Settings.mongo_client_options)
+        """
+        client_options = client_options or {}
+        max_pool_size = client_options.get("maxPoolSize", 100)
+        
+        pings = []
         if self._async_client is None:
             # Async client for most operations
-            self._async_client = AsyncIOMotorClient(mongo_uri)
-            await self._async_client.admin.command('ping')
-            logger.info("✅ Connected to MongoDB (async)")
+            monitor = MongoPoolMonitor("async", max_pool_size)
+            self._async_client = AsyncIOMotorClient(
+                mongo_uri, event_listeners=[monitor], **client_options
+            )
+            self._pool_monitors["async"] = monitor
+            pings.append(self._ping_async())
         
         if self._sync_client is None:
             # Sync client for LangGraph components
-            self._sync_client = MongoClient(mongo_uri)
-            self._sync_client.admin.command('ping')
-            logger.info("✅ Connected to MongoDB (sync)")
+            monitor = MongoPoolMonitor("sync", max_pool_size)
+            self._sync_client = MongoClient(
+                mongo_uri, event_listeners=[monitor], **client_options
+            )
+            self._pool_monitors["sync"] = monitor
+            pings.append(self._ping_sync())
+        
+        # Both clients discover the topology and handshake independently; do it concurrently
+        await asyncio.gather(*pings)
+        
+        if client_options:
+            logger.info(
+                f"   Pool: max={max_pool_size}, min={client_options.get('minPoolSize', 0)}, "
+                f"compressors={client_options.get('compressors', 'none')}"
+            )
+    
+    async def _ping_async(self):
+        await self._async_client.admin.command('ping')
+        logger.info("✅ Connected to MongoDB (async)")
+    
+    async def _ping_sync(self):
+        # Blocking call: keep it off the event loop
+        await asyncio.to_thread(self._sync_client.admin.command, 'ping')
+        logger.info("✅ Connected to MongoDB (sync)")
     
     @property
     def async_client(self) -> AsyncIOMotorClient:
@@ -52,6 +90,23 @@ class MongoDBClient:
         """Get a synchronous collection for LangGraph stores"""
         return self.sync_client[db_name][collection_name]
     
+    def pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Connection pool utilization and wait times per client"""
+        return {name: monitor.stats() for name, monitor in self._pool_monitors.items()}
+    
+    async def create_checkpointer(
+        self, db_name: str, serde: Optional[SerializerProtocol] = None
+    ) -> MongoDBSaver:
+        """Create a LangGraph checkpointer using the sync client"""
+        # The constructor checks and creates indexes with blocking calls
+        return await asyncio.to_thread(
+            MongoDBSaver,
+            client=self.sync_client,
+            db_name=db_name,
+            checkpoint_collection_name="checkpoints",
+            serde=serde,
+        )
+
     async def close(self):
         """Close MongoDB connections"""
         if self._async_client is not None:
@@ -62,4 +117,6 @@ class MongoDBClient:
         if self._sync_client is not None:
             self._sync_client.close()
             logger.info("MongoDB sync client connection closed")
-            self._sync_client = None
\ No newline at end of file
+            self._sync_client = None
+        
+        self._pool_monitors.clear()
\ No newline at end of file
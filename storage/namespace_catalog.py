@@ -0,0 +1,192 @@
+"""
+Per-namespace memory statistics: count, total size and last write.
+
+Every chat has its own namespace and the agent searches it on every turn,
+but most chats hold only a handful of memories. The catalog lets the
+search tool answer without an embedding call or vector query when a
+namespace is empty, and list a tiny namespace outright.
+
+Writes through the memory store's write path (storage.backends.MemoryWrites)
+adjust the statistics incrementally from the size of the memory's value
+before and after the write, so a write costs the same in a large
+namespace as in a small one. A namespace is only listed in full on first
+use (namespaces written before the catalog existed) and after its entry
+was dropped: writes that bypass the store (imports, chat archival) and
+failed updates drop it.
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from utils.logger import setup_logger
+from utils.metrics import instrument_methods
+
+logger = setup_logger()
+
+COLLECTION_NAME = "memory_catalog"
+
+
+@dataclass
+class NamespaceStats:
+    """Memories in a namespace"""
+
+    count: int
+    bytes: int
+    last_write: Optional[datetime] = None
+
+
+class NamespaceCatalog:
+    """Namespace statistics computed by listing the store, kept in process
+
+    Used by backends without a catalog collection (in-memory, PostgreSQL).
+    Namespaces larger than scan_limit are reported with count scan_limit.
+    """
+
+    # MemoryWrites reads the memory's previous value for on_memory_write
+    needs_previous = True
+
+    def __init__(self, store, scan_limit: int = 1000):
+        self.store = store
+        self.scan_limit = scan_limit
+        self._stats: Dict[tuple, NamespaceStats] = {}
+
+    async def initialize(self):
+        """Instrument the statistics lookup"""
+        instrument_methods(self, ("stats",), "store_operation_seconds", store=self.__class__.__name__)
+
+    async def on_memory_write(self, namespace: tuple, key: str, value: Optional[Dict[str, Any]],
+                              previous: Optional[Dict[str, Any]]):
+        """Adjust a namespace's statistics for one memory written (value None: deleted)"""
+        before = self._measure(previous) if previous is not None else None
+        after = self._measure(value) if value is not None else None
+        try:
+            await self._apply(namespace, before, after)
+        except Exception:
+            # A stale entry only costs a search; recompute it on next use
+            await self.invalidate(namespace)
+            raise
+
+    def _measure(self, value: Dict[str, Any]) -> int:
+        """Size of one memory's value; _compute sums the same measure"""
+        return len(json.dumps(value, default=str))
+
+    async def _apply(self, namespace: tuple, before: Optional[int], after: Optional[int]):
+        """Adjust cached statistics for one memory changing size (None: absent)"""
+        # No await between reading and replacing the entry, so concurrent writes cannot interleave
+        stats = self._stats.get(namespace)
+        if stats is None:
+            # Computed in full on first use
+            return
+        self._stats[namespace] = NamespaceStats(
+            count=stats.count + (after is not None) - (before is not None),
+            bytes=stats.bytes + (after or 0) - (before or 0),
+            last_write=datetime.now(timezone.utc),
+        )
+
+    async def _compute(self, namespace: tuple) -> NamespaceStats:
+        items = await self.store.asearch(namespace, limit=self.scan_limit)
+        return NamespaceStats(
+            count=len(items),
+            bytes=sum(self._measure(item.value) for item in items),
+            last_write=max((item.updated_at for item in items), default=None),
+        )
+
+    async def stats(self, namespace: tuple) -> NamespaceStats:
+        """Statistics of a namespace, computed on first use"""
+        stats = self._stats.get(namespace)
+        if stats is None:
+            # A refresh that finished meanwhile is newer: keep it
+            stats = self._stats.setdefault(namespace, await self._compute(namespace))
+        return stats
+
+    async def refresh(self, namespace: tuple):
+        """Recompute a namespace's statistics in full"""
+        stats = await self._compute(namespace)
+        stats.last_write = datetime.now(timezone.utc)
+        self._stats[namespace] = stats
+
+    async def invalidate(self, namespace: tuple):
+        """Forget a namespace's statistics"""
+        self._stats.pop(namespace, None)
+
+
+class MongoNamespaceCatalog(NamespaceCatalog):
+    """Namespace statistics in the memory_catalog collection, shared across processes"""
+
+    def __init__(self, store, memories, catalog, separator: str = "/"):
+        # Async (motor) collections; the LangGraph store keeps its own sync handle
+        super().__init__(store)
+        self.memories = memories
+        self.catalog = catalog
+        self.separator = separator
+
+    def _id(self, namespace: tuple) -> str:
+        return self.separator.join(namespace)
+
+    async def _compute(self, namespace: tuple) -> NamespaceStats:
+        # Served by the store's unique (namespace, key) index
+        cursor = self.memories.aggregate([
+            {"$match": {"namespace": list(namespace)}},
+            {"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "bytes": {"$sum": {"$bsonSize": "$value"}},
+                "last_write": {"$max": "$updated_at"},
+            }},
+        ])
+        result = await cursor.to_list(length=1)
+        if not result:
+            return NamespaceStats(count=0, bytes=0)
+        return NamespaceStats(result[0]["count"], result[0]["bytes"], result[0]["last_write"])
+
+    def _measure(self, value: Dict[str, Any]) -> int:
+        # BSON size of the value, as $bsonSize in _compute
+        import bson
+
+        return len(bson.encode(value))
+
+    async def _apply(self, namespace: tuple, before: Optional[int], after: Optional[int]):
+        # No upsert: a namespace without an entry is computed in full on first use
+        await self.catalog.update_one(
+            {"_id": self._id(namespace)},
+            {
+                "$inc": {"count": (after is not None) - (before is not None), "bytes": (after or 0) - (before or 0)},
+                "$max": {"last_write": datetime.now(timezone.utc)},
+            },
+        )
+
+    async def _save(self, namespace: tuple, stats: NamespaceStats, overwrite: bool = True):
+        from pymongo.errors import DuplicateKeyError
+
+        fields = {"count": stats.count, "bytes": stats.bytes, "last_write": stats.last_write,
+                  "computed_at": datetime.now(timezone.utc)}
+        try:
+            await self.catalog.update_one(
+                {"_id": self._id(namespace)},
+                {"$set" if overwrite else "$setOnInsert": fields},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Concurrent first use of the same namespace; the other entry is as fresh
+            pass
+
+    async def stats(self, namespace: tuple) -> NamespaceStats:
+        """Statistics of a namespace, computed and stored on first use"""
+        doc = await self.catalog.find_one({"_id": self._id(namespace)})
+        if doc is not None:
+            return NamespaceStats(doc["count"], doc["bytes"], doc.get("last_write"))
+        stats = await self._compute(namespace)
+        # A refresh that finished meanwhile is newer: keep it
+        await self._save(namespace, stats, overwrite=False)
+        return stats
+
+    async def refresh(self, namespace: tuple):
+        """Recompute a namespace's statistics in full"""
+        stats = await self._compute(namespace)
+        stats.last_write = datetime.now(timezone.utc)
+        await self._save(namespace, stats)
+
+    async def invalidate(self, namespace: tuple):
+        """Forget a namespace's statistics"""
+        await self.catalog.delete_one({"_id": self._id(namespace)})
@@ -0,0 +1,86 @@
+import threading
+from typing import Any, Dict
+from pymongo import monitoring
+
+
+class MongoPoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks MongoDB connection pool utilization and checkout wait times"""
+
+    def __init__(self, name: str, max_pool_size: int):
+        self.name = name
+        self.max_pool_size = max_pool_size
+        self._lock = threading.Lock()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool counters"""
+        with self._lock:
+            return {
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "max_pool_size": self.max_pool_size,
+                "utilization": self.checked_out / self.max_pool_size if self.max_pool_size else 0.0,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "wait_ms_total": self.wait_seconds_total * 1000,
+                "wait_ms_avg": self.wait_seconds_total * 1000 / self.checkouts if self.checkouts else 0.0,
+                "wait_ms_max": self.wait_seconds_max * 1000,
+            }
+
+    # Pool lifecycle events are not needed for utilization tracking
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+            self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(0, self.open_connections - 1)
+            self.connections_closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+            self.wait_seconds_total += event.duration or 0.0
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+            self.checkouts += 1
+            duration = event.duration or 0.0
+            self.wait_seconds_total += duration
+            self.wait_seconds_max = max(self.wait_seconds_max, duration)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
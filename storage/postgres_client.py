@@ -0,0 +1,85 @@
+from typing import Any, Dict, Optional
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class PostgresClient:
+    """PostgreSQL client backed by a shared async connection pool"""
+
+    _instance: Optional['PostgresClient'] = None
+    _pool: Optional[AsyncConnectionPool] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    async def initialize(self, postgres_uri: str, min_size: int = 1, max_size: int = 10):
+        """Open the async connection pool and verify connectivity"""
+        if self._pool is not None:
+            return
+
+        # LangGraph's Postgres components expect autocommit connections
+        # returning dict rows, without server-side prepared statements
+        self._pool = AsyncConnectionPool(
+            conninfo=postgres_uri,
+            min_size=min_size,
+            max_size=max_size,
+            kwargs={
+                "autocommit": True,
+                "prepare_threshold": 0,
+                "row_factory": dict_row,
+            },
+            open=False,
+        )
+        await self._pool.open(wait=True)
+
+        async with self._pool.connection() as conn:
+            await conn.execute("SELECT 1")
+        logger.info(f"✅ Connected to PostgreSQL (pool {min_size}-{max_size})")
+
+    @property
+    def pool(self) -> AsyncConnectionPool:
+        """Get async connection pool instance"""
+        if self._pool is None:
+            raise RuntimeError("PostgreSQL pool not initialized. Call initialize() first.")
+        return self._pool
+
+    def pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Connection pool utilization and wait times"""
+        if self._pool is None:
+            return {}
+        stats = self._pool.get_stats()
+        return {
+            "async": {
+                "open_connections": stats.get("pool_size", 0),
+                "available": stats.get("pool_available", 0),
+                "max_pool_size": self._pool.max_size,
+                "utilization": (stats.get("pool_size", 0) - stats.get("pool_available", 0)) / self._pool.max_size,
+                "requests_waiting": stats.get("requests_waiting", 0),
+                "checkouts": stats.get("requests_num", 0),
+                "wait_ms_total": stats.get("requests_wait_ms", 0),
+            }
+        }
+
+    async def create_checkpointer(
+        self, db_name: str, serde: Optional[SerializerProtocol] = None
+    ) -> AsyncPostgresSaver:
+        """Create a LangGraph checkpointer sharing the connection pool"""
+        # The database is selected by the connection URI; db_name is accepted
+        # for interface parity with MongoDBClient
+        checkpointer = AsyncPostgresSaver(conn=self.pool, serde=serde)
+        await checkpointer.setup()
+        return checkpointer
+
+    async def close(self):
+        """Close the connection pool"""
+        if self._pool is not None:
+            await self._pool.close()
+            logger.info("PostgreSQL connection pool closed")
+            self._pool = None
@@ -0,0 +1,135 @@
+from typing import Optional
+from langgraph.store.postgres import AsyncPostgresStore
+from langchain_core.embeddings import Embeddings
+from storage.postgres_client import PostgresClient
+from storage.backends import MemoryWrites
+from storage.hybrid_search import HybridSearch, ScanTextIndex
+from storage.namespace_catalog import NamespaceCatalog
+from utils.logger import setup_logger
+from utils.metrics import instrument_methods
+
+logger = setup_logger()
+
+
+class PostgresBaseStore:
+    """Base class for PostgreSQL (pgvector) stores with async initialization"""
+
+    def __init__(
+        self,
+        db_client: PostgresClient,
+        db_name: str,
+        collection_name: str,
+        embedder: Optional[Embeddings] = None
+    ):
+        self.db_client = db_client
+        self.db_name = db_name
+        # AsyncPostgresStore keeps all items in a single table; the name is
+        # kept for logging and interface parity with the MongoDB stores
+        self.collection_name = collection_name
+        self.embedder = embedder
+        self._store: Optional[AsyncPostgresStore] = None
+        self._initialized = False
+
+    async def initialize(self):
+        """Initialize AsyncPostgresStore instance and run its migrations"""
+        if self._initialized:
+            return
+
+        # Configure pgvector index if embedder is available
+        if self.embedder:
+            self._store = AsyncPostgresStore(
+                conn=self.db_client.pool,
+                index={
+                    "dims": 1536,
+                    "embed": self.embedder,
+                    "fields": ["content"],
+                    "distance_type": "cosine",
+                },
+            )
+            logger.info(f"pgvector index configured for {self.__class__.__name__}")
+        else:
+            self._store = AsyncPostgresStore(conn=self.db_client.pool)
+
+        # Creates tables (and the vector extension/index) if missing
+        await self._store.setup()
+
+        # Time store calls made by the memory tools and UserManager
+        instrument_methods(
+            self._store,
+            ("aget", "aput", "asearch", "adelete"),
+            "store_operation_seconds",
+            store=self.__class__.__name__,
+        )
+
+        self._initialized = True
+        logger.info(f"✅ {self.__class__.__name__} initialized")
+        logger.info(f"   Namespace group: {self.collection_name}")
+        logger.info(f"   Embedder: {'Enabled' if self.embedder else 'Disabled'}")
+
+    @property
+    def store(self) -> AsyncPostgresStore:
+        """Get AsyncPostgresStore instance"""
+        if not self._initialized or self._store is None:
+            raise RuntimeError(f"{self.__class__.__name__} not initialized. Call initialize() first.")
+        return self._store
+
+
+class PostgresMemoryStore(PostgresBaseStore):
+    """PostgreSQL store for LangMem memories"""
+
+    def __init__(
+        self,
+        db_client: PostgresClient,
+        db_name: str,
+        embedder: Optional[Embeddings] = None,
+        prefilter_max: int = 50,
+        catalog: bool = True
+    ):
+        super().__init__(db_client, db_name, "langmem_store", embedder)
+        self.prefilter_max = prefilter_max
+        self.use_catalog = catalog
+        self._hybrid: Optional[HybridSearch] = None
+        self._catalog: Optional[NamespaceCatalog] = None
+        self._writes: Optional[MemoryWrites] = None
+
+    async def initialize(self):
+        """Initialize the store, hybrid search and namespace catalog over it (keywords scored in process)"""
+        if self._initialized:
+            return
+        await super().initialize()
+
+        self._writes = MemoryWrites(self._store)
+        self._hybrid = HybridSearch(self._store, self.embedder, ScanTextIndex(self._store), self.prefilter_max)
+        await self._hybrid.initialize()
+        if self.use_catalog:
+            self._catalog = NamespaceCatalog(self._store)
+            await self._catalog.initialize()
+            self._writes.add(self._catalog)
+
+    @property
+    def hybrid(self) -> HybridSearch:
+        """Get hybrid (keyword + vector) search over this store"""
+        if self._hybrid is None:
+            raise RuntimeError(f"{self.__class__.__name__} not initialized. Call initialize() first.")
+        return self._hybrid
+
+    @property
+    def writes(self) -> MemoryWrites:
+        """Get the write path that keeps derived data in step with memory writes"""
+        if self._writes is None:
+            raise RuntimeError(f"{self.__class__.__name__} not initialized. Call initialize() first.")
+        return self._writes
+
+    @property
+    def catalog(self) -> Optional[NamespaceCatalog]:
+        """Get the namespace catalog (None when disabled)"""
+        if not self._initialized:
+            raise RuntimeError(f"{self.__class__.__name__} not initialized. Call initialize() first.")
+        return self._catalog
+
+
+class PostgresUserProfileStore(PostgresBaseStore):
+    """PostgreSQL store for user profiles"""
+
+    def __init__(self, db_client: PostgresClient, db_name: str):
+        super().__init__(db_client, db_name, "user_profiles")
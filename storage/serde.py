@@ -0,0 +1,89 @@
+"""
+Checkpoint serializer that compresses large payloads.
+
+Wraps LangGraph's JsonPlusSerializer (msgpack) and compresses serialized
+values of at least min_bytes, marking them by suffixing the type tag:
+
+    ("msgpack", b"...")         small values, stored as before
+    ("msgpack+zstd", b"...")    compressed values
+
+Values without a codec suffix are handed to the wrapped serializer, so
+checkpoints written before compression was enabled still load. Metadata
+leaves are serialized through the same serializer but stay below the
+threshold, so metadata filters keep matching.
+"""
+
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from config.settings import Settings
+from utils.logger import setup_logger
+from utils.metrics import metrics
+
+logger = setup_logger()
+
+Codec = Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]
+
+
+def _codecs(level: int) -> Dict[str, Codec]:
+    codecs: Dict[str, Codec] = {
+        "zlib": (lambda data: zlib.compress(data, min(level, 9)), zlib.decompress),
+    }
+    try:
+        import zstandard
+    except ImportError:
+        return codecs
+    codecs["zstd"] = (lambda data: zstandard.compress(data, level), zstandard.decompress)
+    return codecs
+
+
+class CompressedSerializer(SerializerProtocol):
+    """Serializer that compresses values above a size threshold"""
+
+    def __init__(
+        self,
+        serde: Optional[SerializerProtocol] = None,
+        codec: str = "zstd",
+        min_bytes: int = 2048,
+        level: int = 3,
+    ):
+        self.serde = serde or JsonPlusSerializer()
+        self.min_bytes = min_bytes
+        self._codecs = _codecs(level)
+        if codec not in self._codecs and codec != "none":
+            logger.warning(f"⚠️  Checkpoint codec {codec!r} unavailable (install zstandard), using zlib")
+            codec = "zlib"
+        self.codec = codec
+        self._bytes = metrics.counter("checkpoint_serialized_bytes_total", "Checkpoint bytes before/after compression")
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        """Serialize with the wrapped serializer, compressing large results"""
+        type_, data = self.serde.dumps_typed(obj)
+        if self.codec == "none" or len(data) < self.min_bytes:
+            return type_, data
+
+        compressed = self._codecs[self.codec][0](data)
+        self._bytes.inc(len(data), stage="raw")
+        self._bytes.inc(len(compressed), stage="stored")
+        return f"{type_}+{self.codec}", compressed
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        """Decompress if tagged with a codec, then deserialize"""
+        type_, payload = data
+        base, _, codec = type_.rpartition("+")
+        if not base or codec not in ("zstd", "zlib"):
+            # Uncompressed (or another wrapper's tag): written before compression or below the threshold
+            return self.serde.loads_typed(data)
+        if codec not in self._codecs:
+            raise RuntimeError(f"Checkpoint compressed with {codec}, which is not installed (pip install zstandard)")
+        return self.serde.loads_typed((base, self._codecs[codec][1](payload)))
+
+
+def create_checkpoint_serializer(settings: Settings) -> SerializerProtocol:
+    """Create the checkpoint serializer for the configured compression"""
+    return CompressedSerializer(
+        codec=settings.checkpoint_compression,
+        min_bytes=settings.checkpoint_compression_min_bytes,
+        level=settings.checkpoint_compression_level,
+    )
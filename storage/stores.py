@@ -1,8 +1,13 @@
+import asyncio
 from typing import Optional
 from langgraph.store.mongodb import MongoDBStore, create_vector_index_config
 from langchain_core.embeddings import Embeddings
+from storage.backends import MemoryWrites
+from storage.hybrid_search import HybridSearch, MongoTextIndex
 from storage.mongodb_client import MongoDBClient
+from storage.namespace_catalog import COLLECTION_NAME as CATALOG_COLLECTION, MongoNamespaceCatalog, NamespaceCatalog
 from utils.logger import setup_logger
+from utils.metrics import instrument_methods
 
 logger = setup_logger()
 
@@ -43,15 +48,25 @@ class BaseStore:
                 name="embedding",
                 relevance_score_fn="cosine"
             )
-            self._store = MongoDBStore(
+            # The constructor lists and creates indexes with blocking calls
+            self._store = await asyncio.to_thread(
+                MongoDBStore,
                 collection=collection,
                 index_config=index_config,
                 auto_index_timeout=0
             )
             logger.info(f"Vector index configured for {self.__class__.__name__}")
         else:
-            self._store = MongoDBStore(collection=collection)
+            self._store = await asyncio.to_thread(MongoDBStore, collection=collection)
             logger.info(f"⚠️  Vector index must be created manually in MongoDB Atlas")
+
+        # Time store calls made by the memory tools and UserManager
+        instrument_methods(
+            self._store,
+            ("aget", "aput", "asearch", "adelete"),
+            "store_operation_seconds",
+            store=self.__class__.__name__,
+        )
         
         self._initialized = True
         logger.info(f"✅ {self.__class__.__name__} initialized")
@@ -74,9 +89,59 @@ class MemoryStore(BaseStore):
         self, 
         db_client: MongoDBClient, 
         db_name: str,
-        embedder: Optional[Embeddings] = None
+        embedder: Optional[Embeddings] = None,
+        prefilter_max: int = 50,
+        catalog: bool = True
     ):
         super().__init__(db_client, db_name, "langmem_store", embedder)
+        self.prefilter_max = prefilter_max
+        self.use_catalog = catalog
+        self._hybrid: Optional[HybridSearch] = None
+        self._catalog: Optional[NamespaceCatalog] = None
+        self._writes: Optional[MemoryWrites] = None
+    
+    async def initialize(self):
+        """Initialize MongoDBStore instance, the text index for hybrid search and the namespace catalog"""
+        if self._initialized:
+            return
+        await super().initialize()
+        
+        self._writes = MemoryWrites(self._store)
+        text_index = self._writes.add(MongoTextIndex(
+            self.db_client.async_client[self.db_name][self.collection_name],
+            separator=self._store.sep,
+        ))
+        self._hybrid = HybridSearch(self._store, self.embedder, text_index, self.prefilter_max)
+        await self._hybrid.initialize()
+        
+        if self.use_catalog:
+            db = self.db_client.async_client[self.db_name]
+            self._catalog = MongoNamespaceCatalog(
+                self._store, db[self.collection_name], db[CATALOG_COLLECTION], separator=self._store.sep
+            )
+            await self._catalog.initialize()
+            self._writes.add(self._catalog)
+    
+    @property
+    def hybrid(self) -> HybridSearch:
+        """Get hybrid (keyword + vector) search over this store"""
+        if self._hybrid is None:
+            raise RuntimeError(f"{self.__class__.__name__} not initialized. Call initialize() first.")
+        return self._hybrid
+
+    @property
+    def writes(self) -> MemoryWrites:
+        """Get the write path that keeps derived data in step with memory writes"""
+        if self._writes is None:
+            raise RuntimeError(f"{self.__class__.__name__} not initialized. Call initialize() first.")
+        return self._writes
+
+    @property
+    def catalog(self) -> Optional[NamespaceCatalog]:
+        """Get the namespace catalog (None when disabled)"""
+        if not self._initialized:
+            raise RuntimeError(f"{self.__class__.__name__} not initialized. Call initialize() first.")
+        return self._catalog
 
 
 class UserProfileStore(BaseStore):
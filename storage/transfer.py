@@ -0,0 +1,350 @@
+"""
+Stream memories, profiles and checkpoints between MongoDB clusters as NDJSON.
+
+Export writes one line per document, {"collection": ..., "document": ...}
+in MongoDB Extended JSON, reading with batched cursors so memory stays
+constant regardless of collection size. Output ending in .gz is gzipped;
+"-" writes to stdout, so an export can be piped straight into an import.
+
+Import upserts in unordered bulk batches keyed on each collection's natural
+key (so re-running is safe) and records the last committed line in
+<input>.progress; --resume continues from there after an interruption.
+Memory embeddings are carried over unless exported with --no-vectors;
+--reembed recomputes missing ones with OpenAI instead.
+
+Archived chats (storage.archive) are exported with them: the archive_*
+collections and the archived_chats markers are copied as they are, and
+chats archived to files are read from --archive-dir and written as
+archive_* documents, so the target restores them from its own database.
+Export fails if such a file is missing on this host rather than leaving
+the chat out.
+
+Usage:
+    python -m storage.transfer export backup.ndjson.gz
+    python -m storage.transfer export chat.ndjson --chat -1001234567 --chat 42
+    python -m storage.transfer export - --mongo-uri $SOURCE | \\
+        python -m storage.transfer import - --mongo-uri $TARGET
+    python -m storage.transfer import backup.ndjson.gz --resume
+"""
+
+import argparse
+import gzip
+import io
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+from bson import json_util
+from dotenv import load_dotenv
+from pymongo import MongoClient, ReplaceOne
+from pymongo.errors import BulkWriteError
+from storage.archive import HOT_COLLECTIONS, MARKERS, CollectionArchive, FileArchive
+from storage.hybrid_search import NAMESPACE_FIELD
+from storage.memberships import COLLECTION_NAME as MEMBERSHIPS
+from storage.namespace_catalog import COLLECTION_NAME as CATALOG
+
+ARCHIVES = tuple(f"archive_{name}" for name in HOT_COLLECTIONS)
+# Markers last, so an interrupted import never has a marker without its archived documents
+COLLECTIONS = ("langmem_store", "user_profiles", "checkpoints", "checkpoint_writes", MEMBERSHIPS, *ARCHIVES, MARKERS)
+
+# Fields identifying a document independently of its _id, so imports merge
+# with documents the target already has instead of conflicting on unique indexes
+NATURAL_KEYS = {
+    "langmem_store": ("namespace", "key"),
+    "user_profiles": ("namespace", "key"),
+    "checkpoints": ("thread_id", "checkpoint_ns", "checkpoint_id"),
+    "checkpoint_writes": ("thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"),
+    MEMBERSHIPS: ("_id",),
+    # archived_chat leads so upserts use the archive collections' only index
+    "archive_langmem_store": ("archived_chat", "namespace", "key"),
+    "archive_checkpoints": ("archived_chat", "thread_id", "checkpoint_ns", "checkpoint_id"),
+    "archive_checkpoint_writes": ("archived_chat", "thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"),
+    MARKERS: ("_id",),
+}
+
+JSON_OPTIONS = json_util.RELAXED_JSON_OPTIONS
+
+
+def _profile_keys(user_ids: List[str]) -> List[str]:
+    return [f"{prefix}_{user_id}" for user_id in user_ids for prefix in ("profile", "stats")]
+
+
+def _archive_filters(chat_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    return {
+        **{name: {"archived_chat": {"$in": chat_ids}} for name in ARCHIVES},
+        MARKERS: {"_id": {"$in": chat_ids}},
+    }
+
+
+def chat_filters(chat_ids: List[str], member_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Per-collection filters selecting the given chats and their members' profiles"""
+    threads = [f"telegram_chat_{chat_id}" for chat_id in chat_ids]
+    return {
+        "langmem_store": {"namespace.0": {"$in": [f"chat_{chat_id}" for chat_id in chat_ids]}},
+        "checkpoints": {"thread_id": {"$in": threads}},
+        "checkpoint_writes": {"thread_id": {"$in": threads}},
+        MEMBERSHIPS: {"chat_id": {"$in": chat_ids}},
+        "user_profiles": {"namespace": ["profiles"], "key": {"$in": _profile_keys(member_ids)}},
+        **_archive_filters(chat_ids),
+    }
+
+
+def user_filters(user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Per-collection filters selecting the given users' profiles and private chats"""
+    threads = [f"telegram_chat_{user_id}" for user_id in user_ids]
+    return {
+        "langmem_store": {"namespace.0": {"$in": [f"chat_{user_id}" for user_id in user_ids]}},
+        "checkpoints": {"thread_id": {"$in": threads}},
+        "checkpoint_writes": {"thread_id": {"$in": threads}},
+        MEMBERSHIPS: {"user_id": {"$in": user_ids}},
+        "user_profiles": {"namespace": ["profiles"], "key": {"$in": _profile_keys(user_ids)}},
+        **_archive_filters(user_ids),
+    }
+
+
+def build_filters(db, chat_ids: List[str], user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Filters for --chat / --user (a document matching either selection is exported)"""
+    selections = []
+    if chat_ids:
+        members = db[MEMBERSHIPS].distinct("user_id", {"chat_id": {"$in": chat_ids}})
+        selections.append(chat_filters(chat_ids, members))
+    if user_ids:
+        selections.append(user_filters(user_ids))
+    if not selections:
+        return {}
+    return {
+        name: selections[0][name] if len(selections) == 1 else {"$or": [s[name] for s in selections]}
+        for name in COLLECTIONS
+    }
+
+
+def _open(path: str, mode: str) -> TextIO:
+    if path == "-":
+        return sys.stdout if "w" in mode else sys.stdin
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, mode.replace("t", "") + "b"), encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Progress:
+    """Throughput reporting on stderr (stdout may carry the export)"""
+
+    def __init__(self, label: str, every: int = 10_000):
+        self.label = label
+        self.every = every
+        self.count = 0
+        self.started = time.perf_counter()
+
+    def add(self, n: int = 1):
+        before = self.count
+        self.count += n
+        if self.count // self.every != before // self.every:
+            self.report()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.count / elapsed if elapsed else 0.0
+        print(f"{self.label}: {self.count} documents ({rate:.0f}/s)", file=sys.stderr)
+
+
+def _file_archived(db, marker: Dict[str, Any], files: FileArchive, vectors: bool) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """A files-tier chat as archive_* documents plus its marker moved to the collections tier"""
+    chat_id = marker["_id"]
+    location = marker.get("location")
+    if marker.get("state") == "archived" and not (location and os.path.exists(location)):
+        raise SystemExit(f"Archived chat {chat_id} is in {location}, which is not on this host; "
+                         f"export from the host that archived it or restore it first")
+    for name, document in files.read(chat_id, location):
+        if not vectors and name == "langmem_store":
+            document.pop("embedding", None)
+        yield f"archive_{name}", {**document, "archived_chat": chat_id}
+    yield MARKERS, {**marker, "tier": CollectionArchive.name, "location": CollectionArchive(db).location(chat_id)}
+
+
+def export(db, path: str, collections: List[str], filters: Dict[str, Dict[str, Any]],
+           batch_size: int, vectors: bool, archive_dir: str = "archive") -> int:
+    """Stream the selected documents of each collection to an NDJSON file"""
+    progress = Progress("exported")
+    files = FileArchive(archive_dir)
+    out = _open(path, "wt")
+
+    def write(name: str, document: Dict[str, Any]):
+        out.write(json_util.dumps({"collection": name, "document": document}, json_options=JSON_OPTIONS))
+        out.write("\n")
+        progress.add()
+
+    try:
+        for name in collections:
+            projection = None if vectors or name not in ("langmem_store", "archive_langmem_store") else {"embedding": 0}
+            # _id order keeps the cursor on the _id index and the output stable
+            cursor = db[name].find(filters.get(name, {}), projection, batch_size=batch_size).sort("_id", 1)
+            for document in cursor:
+                if name == MARKERS and document.get("tier") == FileArchive.name:
+                    for record in _file_archived(db, document, files, vectors):
+                        write(*record)
+                else:
+                    write(name, document)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+    progress.report()
+    return progress.count
+
+
+def _read(path: str, skip: int) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+    source = _open(path, "rt")
+    try:
+        for line_number, line in enumerate(source, start=1):
+            if line_number <= skip or not line.strip():
+                continue
+            record = json_util.loads(line, json_options=JSON_OPTIONS)
+            yield line_number, record["collection"], record["document"]
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+def _replacement(name: str, document: Dict[str, Any]) -> ReplaceOne:
+    keys = NATURAL_KEYS.get(name, ("_id",))
+    selector = {key: document.get(key) for key in keys}
+    if keys != ("_id",):
+        # The target keeps its own _id for documents it already has
+        document = {key: value for key, value in document.items() if key != "_id"}
+    return ReplaceOne(selector, document, upsert=True)
+
+
+class Importer:
+    """Batched, unordered, idempotent upserts with a resumable progress file"""
+
+    def __init__(self, db, progress_path: Optional[str], batch_size: int, embedder=None):
+        self.db = db
+        self.progress_path = progress_path
+        self.batch_size = batch_size
+        self.embedder = embedder
+        self.pending: Dict[str, List[Dict[str, Any]]] = {}
+        self.pending_count = 0
+        self.errors = 0
+        self.unembedded = 0
+        self.archive_indexes = False
+        self.progress = Progress("imported")
+
+    def add(self, name: str, document: Dict[str, Any]):
+        self.pending.setdefault(name, []).append(document)
+        self.pending_count += 1
+
+    def _embed_missing(self, documents: List[Dict[str, Any]]):
+        missing = [doc for doc in documents if "embedding" not in doc and "content" in doc.get("value", {})]
+        if missing and not self.embedder:
+            self.unembedded += len(missing)
+        elif missing:
+            vectors = self.embedder.embed_documents([str(doc["value"]["content"]) for doc in missing])
+            for doc, vector in zip(missing, vectors):
+                doc["embedding"] = vector
+                doc.setdefault("namespace_prefix", [
+                    "/".join(doc["namespace"][:i]) for i in range(1, len(doc["namespace"]) + 1)
+                ])
+
+    def flush(self, line_number: int):
+        """Write pending documents, then record line_number as committed"""
+        for name, documents in self.pending.items():
+            if name in ARCHIVES and not self.archive_indexes:
+                CollectionArchive(self.db).ensure()
+                self.archive_indexes = True
+            if name in ("langmem_store", "archive_langmem_store"):
+                self._embed_missing(documents)
+                for doc in documents:
+                    # Prefix of the memory text index
+                    doc.setdefault(NAMESPACE_FIELD, "/".join(doc["namespace"]))
+            if name == "langmem_store":
+                # Imported memories bypass the store: recount their namespaces on next use
+                namespaces = list({"/".join(doc["namespace"]) for doc in documents})
+                self.db[CATALOG].delete_many({"_id": {"$in": namespaces}})
+            try:
+                self.db[name].bulk_write([_replacement(name, doc) for doc in documents], ordered=False)
+            except BulkWriteError as e:
+                self.errors += len(e.details.get("writeErrors", []))
+                for error in e.details.get("writeErrors", [])[:3]:
+                    print(f"{name}: {error.get('errmsg')}", file=sys.stderr)
+            self.progress.add(len(documents))
+        self.pending.clear()
+        self.pending_count = 0
+        if self.progress_path:
+            # Replace atomically so a crash never leaves a truncated progress file
+            with open(f"{self.progress_path}.tmp", "w") as f:
+                f.write(str(line_number))
+            os.replace(f"{self.progress_path}.tmp", self.progress_path)
+
+    def run(self, path: str, skip: int) -> int:
+        line_number = skip
+        for line_number, name, document in _read(path, skip):
+            self.add(name, document)
+            if self.pending_count >= self.batch_size:
+                self.flush(line_number)
+        self.flush(line_number)
+        self.progress.report()
+        return self.progress.count
+
+
+def _embedder():
+    from config.settings import Settings
+    from llm.openai_client import OpenAIClient
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise SystemExit("--reembed needs OPENAI_API_KEY")
+    return OpenAIClient(Settings(telegram_bot_token="", openai_api_key=api_key)).embeddings
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("path", help="NDJSON file (.gz for gzip, - for stdout/stdin)")
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.getenv("DB_NAME", "telegram_bot"))
+    parser.add_argument("--collections", default=",".join(COLLECTIONS), help="Comma-separated collections to export")
+    parser.add_argument("--chat", action="append", default=[], help="Only this chat ID (repeatable)")
+    parser.add_argument("--user", action="append", default=[], help="Only this user's profile and private chat (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Cursor batch / bulk write size")
+    parser.add_argument("--no-vectors", action="store_true", help="Export memories without embeddings")
+    parser.add_argument("--reembed", action="store_true", help="Embed imported memories that have no vector")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted import")
+    parser.add_argument("--archive-dir", default=os.getenv("CHAT_ARCHIVE_DIR", "archive"),
+                        help="Directory of the files archive tier (export)")
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5_000)
+    db = client[args.db]
+    try:
+        if args.command == "export":
+            collections = [name.strip() for name in args.collections.split(",") if name.strip()]
+            export(db, args.path, collections, build_filters(db, args.chat, args.user), args.batch_size,
+                   vectors=not args.no_vectors, archive_dir=args.archive_dir)
+            return
+
+        progress_path = None if args.path == "-" else f"{args.path}.progress"
+        skip = 0
+        if args.resume:
+            if not progress_path:
+                raise SystemExit("--resume needs a file, not stdin")
+            if os.path.exists(progress_path):
+                with open(progress_path) as f:
+                    skip = int(f.read().strip() or 0)
+                print(f"Resuming after line {skip}", file=sys.stderr)
+
+        importer = Importer(db, progress_path, args.batch_size, _embedder() if args.reembed else None)
+        importer.run(args.path, skip)
+        if importer.unembedded:
+            print(f"{importer.unembedded} memories have no embedding; re-run with --reembed to make them searchable",
+                  file=sys.stderr)
+        if importer.errors:
+            print(f"{importer.errors} documents failed to import", file=sys.stderr)
+            sys.exit(1)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
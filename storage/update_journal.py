@@ -0,0 +1,214 @@
+"""
+Per-update processing journal for idempotent message handling.
+
+Telegram redelivers updates that were fetched but not confirmed before a
+restart. Each update moves through
+
+    processing -> generated -> sent -> completed
+
+and the journal remembers the state (plus the generated reply until it is
+sent), so a redelivered update is skipped once completed and otherwise
+resumes from the last finished step instead of re-running the LLM.
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+from config.settings import Settings
+from utils.logger import setup_logger
+
+if TYPE_CHECKING:
+    from storage.backends import DBClient
+
+logger = setup_logger()
+
+PROCESSING = "processing"
+GENERATED = "generated"
+SENT = "sent"
+COMPLETED = "completed"
+
+
+class InMemoryUpdateJournal:
+    """Journal kept in a bounded in-process window (does not survive restarts)"""
+
+    def __init__(self, window: int = 10_000, ttl_seconds: float = 86_400):
+        # Identifies this process: a "processing" entry owned by someone else was interrupted
+        self.owner = uuid.uuid4().hex
+        self.window = window
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+
+    async def initialize(self):
+        """Nothing to prepare"""
+        pass
+
+    async def begin(self, update_id: int, chat_id: str) -> Optional[Dict[str, Any]]:
+        """Claim an update; return its previous journal entry, or None if it is new"""
+        now = time.time()
+        previous = self._entries.get(update_id)
+        if previous is not None and now - previous["created_at"] > self.ttl_seconds:
+            previous = None
+
+        entry = dict(previous) if previous else {"chat_id": chat_id, "state": PROCESSING, "created_at": now}
+        entry.update(owner=self.owner, updated_at=now)
+        self._entries[update_id] = entry
+        self._entries.move_to_end(update_id)
+        while len(self._entries) > self.window:
+            self._entries.popitem(last=False)
+        return previous
+
+    async def mark(self, update_id: int, state: str, response: Optional[str] = None):
+        """Record that an update reached a state"""
+        entry = self._entries.get(update_id)
+        if entry is None:
+            return
+        entry.update(state=state, updated_at=time.time())
+        if response is not None:
+            entry["response"] = response
+        elif state == COMPLETED:
+            entry.pop("response", None)
+
+
+class MongoUpdateJournal:
+    """Journal in a MongoDB collection with TTL expiry, shared across restarts"""
+
+    def __init__(self, db_client: "DBClient", db_name: str, ttl_seconds: float = 86_400):
+        from pymongo import ReturnDocument
+
+        self.owner = uuid.uuid4().hex
+        self.ttl_seconds = ttl_seconds
+        self.collection = db_client.async_client[db_name]["update_journal"]
+        self._return_before = ReturnDocument.BEFORE
+
+    async def initialize(self):
+        """Create the TTL index that expires old entries"""
+        await self.collection.create_index("created_at", expireAfterSeconds=int(self.ttl_seconds))
+        logger.info(f"✅ Update journal ready (TTL {self.ttl_seconds / 3600:.0f}h)")
+
+    async def begin(self, update_id: int, chat_id: str) -> Optional[Dict[str, Any]]:
+        """Claim an update; return its previous journal entry, or None if it is new"""
+        now = datetime.now(timezone.utc)
+        return await self.collection.find_one_and_update(
+            {"_id": update_id},
+            {
+                "$setOnInsert": {"chat_id": chat_id, "state": PROCESSING, "created_at": now},
+                "$set": {"owner": self.owner, "updated_at": now},
+            },
+            upsert=True,
+            return_document=self._return_before,
+        )
+
+    async def mark(self, update_id: int, state: str, response: Optional[str] = None):
+        """Record that an update reached a state"""
+        update: Dict[str, Any] = {"$set": {"state": state, "updated_at": datetime.now(timezone.utc)}}
+        if response is not None:
+            update["$set"]["response"] = response
+        elif state == COMPLETED:
+            # Only needed to resend after a crash; keep completed entries compact
+            update["$unset"] = {"response": ""}
+        await self.collection.update_one({"_id": update_id}, update)
+
+
+class PostgresUpdateJournal:
+    """Journal in a PostgreSQL table, shared across restarts; expired rows are purged periodically"""
+
+    def __init__(self, db_client: "DBClient", ttl_seconds: float = 86_400):
+        self.owner = uuid.uuid4().hex
+        self.ttl_seconds = ttl_seconds
+        self.pool = db_client.pool
+        self._purged_at = 0.0
+
+    async def initialize(self):
+        """Create the journal table and drop expired entries"""
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS update_journal (
+                    update_id BIGINT PRIMARY KEY,
+                    chat_id TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    owner TEXT NOT NULL,
+                    response TEXT,
+                    created_at TIMESTAMPTZ NOT NULL,
+                    updated_at TIMESTAMPTZ NOT NULL
+                )
+                """
+            )
+            await conn.execute("CREATE INDEX IF NOT EXISTS update_journal_created_at ON update_journal (created_at)")
+        await self._purge()
+        logger.info(f"✅ Update journal ready (TTL {self.ttl_seconds / 3600:.0f}h)")
+
+    async def _purge(self):
+        """Delete entries older than the TTL (what MongoDB's TTL index does)"""
+        self._purged_at = time.time()
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                "DELETE FROM update_journal WHERE created_at < now() - make_interval(secs => %s)",
+                (self.ttl_seconds,),
+            )
+
+    async def begin(self, update_id: int, chat_id: str) -> Optional[Dict[str, Any]]:
+        """Claim an update; return its previous journal entry, or None if it is new"""
+        if time.time() - self._purged_at > 3600:
+            await self._purge()
+        async with self.pool.connection() as conn, conn.transaction():
+            # Insert new updates (or reset expired ones) and report them as new
+            cursor = await conn.execute(
+                """
+                INSERT INTO update_journal (update_id, chat_id, state, owner, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, now(), now())
+                ON CONFLICT (update_id) DO UPDATE
+                SET chat_id = EXCLUDED.chat_id, state = EXCLUDED.state, owner = EXCLUDED.owner,
+                    response = NULL, created_at = EXCLUDED.created_at, updated_at = EXCLUDED.updated_at
+                WHERE update_journal.created_at < now() - make_interval(secs => %s)
+                """,
+                (update_id, chat_id, PROCESSING, self.owner, self.ttl_seconds),
+            )
+            if cursor.rowcount:
+                return None
+
+            cursor = await conn.execute(
+                "SELECT chat_id, state, owner, response, created_at FROM update_journal WHERE update_id = %s FOR UPDATE",
+                (update_id,),
+            )
+            previous = await cursor.fetchone()
+            await conn.execute(
+                "UPDATE update_journal SET owner = %s, updated_at = now() WHERE update_id = %s",
+                (self.owner, update_id),
+            )
+        return previous
+
+    async def mark(self, update_id: int, state: str, response: Optional[str] = None):
+        """Record that an update reached a state"""
+        if response is not None:
+            query = "UPDATE update_journal SET state = %s, response = %s, updated_at = now() WHERE update_id = %s"
+            params: tuple = (state, response, update_id)
+        elif state == COMPLETED:
+            query = "UPDATE update_journal SET state = %s, response = NULL, updated_at = now() WHERE update_id = %s"
+            params = (state, update_id)
+        else:
+            query = "UPDATE update_journal SET state = %s, updated_at = now() WHERE update_id = %s"
+            params = (state, update_id)
+        async with self.pool.connection() as conn:
+            await conn.execute(query, params)
+
+
+UpdateJournal = Union[InMemoryUpdateJournal, MongoUpdateJournal, PostgresUpdateJournal]
+
+
+async def create_update_journal(settings: Settings, db_client: "DBClient") -> UpdateJournal:
+    """Create the journal for the configured backend
+
+    MongoDB (TTL collection) and PostgreSQL (table) keep the journal so it
+    survives restarts; the in-memory backend uses the in-process window.
+    """
+    if settings.storage_backend == "mongodb":
+        journal = MongoUpdateJournal(db_client, settings.db_name, settings.update_journal_ttl_seconds)
+    elif settings.storage_backend == "postgres":
+        journal = PostgresUpdateJournal(db_client, settings.update_journal_ttl_seconds)
+    else:
+        journal = InMemoryUpdateJournal(settings.update_journal_window, settings.update_journal_ttl_seconds)
+    await journal.initialize()
+    return journal
@@ -0,0 +1,269 @@
+"""
+Per-user secondary index over chat memories, for cross-chat recall.
+
+Memories live under ("chat_<chat_id>",) and name the users they are about
+as "Full Name (@username, ID: 123)". On every write through the memory
+store, each user ID a memory mentions gets an index entry holding a copy
+of the memory and the chat it came from; deletes and rewrites remove
+stale entries. Recalling a user across chats is then one bounded query
+instead of a search of every chat namespace.
+
+MongoDB keeps entries in the user_memory_index collection:
+
+    {_id: "<user_id>|<namespace>|<key>", user_id, chat_id, namespace, key,
+     content, updated_at}
+
+    {user_id: 1, updated_at: -1}       a user's entries, most recent first
+    {namespace: 1, key: 1}             entries of one memory, for rewrites
+
+Other backends keep the same entries in their LangGraph store under
+("user_memories", user_id), plus the users of each memory under
+("user_memory_refs",) so rewrites can drop stale entries.
+
+Privacy: entries are only returned for chats the viewer is an active
+member of (chat_memberships) plus the viewer's own private chat, so a
+group's memories never reach someone outside it and a private chat's
+memories never reach anyone else.
+
+Memories written before the index existed, or imported with
+storage.transfer, are indexed with:
+    python -m storage.user_memory_index --rebuild
+"""
+
+import argparse
+import os
+import re
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+from config.settings import Settings
+from storage.hybrid_search import tokenize
+from utils.logger import setup_logger
+from utils.metrics import instrument_methods
+
+if TYPE_CHECKING:
+    from storage.backends import DBClient, MemoryStoreType, ProfileStoreType
+    from storage.memberships import MembershipStore
+
+logger = setup_logger()
+
+COLLECTION_NAME = "user_memory_index"
+NAMESPACE = "user_memories"
+REFS = ("user_memory_refs",)
+
+# User IDs, not "Chat ID: -100..." (group IDs are negative, user IDs positive)
+_USER_ID_PATTERN = re.compile(r"(?<!chat )\bID:\s*(\d+)", re.IGNORECASE)
+
+
+def mentioned_users(content: str) -> List[str]:
+    """User IDs a memory is about, in order of appearance"""
+    return list(dict.fromkeys(_USER_ID_PATTERN.findall(content)))
+
+
+def chat_of(namespace: tuple) -> Optional[str]:
+    """Chat ID of a per-chat memory namespace, None for any other namespace"""
+    if len(namespace) == 1 and namespace[0].startswith("chat_"):
+        return namespace[0][len("chat_"):]
+    return None
+
+
+def _content(value: Optional[Dict[str, Any]]) -> str:
+    content = (value or {}).get("content", "")
+    return content if isinstance(content, str) else str(content)
+
+
+def rank(entries: List[Dict[str, Any]], query: str, limit: int) -> List[Dict[str, Any]]:
+    """Entries matching most query terms first, then most recent"""
+    terms = set(tokenize(query))
+    entries = sorted(entries, key=lambda entry: str(entry["updated_at"]), reverse=True)
+    if terms:
+        entries.sort(key=lambda entry: len(terms.intersection(tokenize(entry["content"]))), reverse=True)
+    return entries[:limit]
+
+
+class _IndexBase:
+    """Write tracking and privacy-scoped recall shared by both index implementations"""
+
+    def __init__(self, membership_store: "MembershipStore", scan_limit: int = 200, visible_chats: int = 500):
+        self.membership_store = membership_store
+        self.scan_limit = scan_limit
+        self.visible_chats = visible_chats
+
+    async def on_memory_write(self, namespace: tuple, key: str, value: Optional[Dict[str, Any]], previous=None):
+        """Re-index a memory written or deleted through the store's write path
+
+        A failure is logged by the write path; the memory write succeeded
+        and a rebuild repairs the index.
+        """
+        await self.index(namespace, key, value)
+
+    async def index(self, namespace: tuple, key: str, value: Optional[Dict[str, Any]]):
+        """Point each user a memory mentions at it (value None: the memory was deleted)"""
+        chat_id = chat_of(namespace)
+        if chat_id is None:
+            return
+        content = _content(value)
+        users = mentioned_users(content) if value is not None else []
+        await self._replace(namespace, key, chat_id, users, content)
+
+    async def recall(self, viewer_id: str, user_id: str, query: str = "", limit: int = 10) -> List[Dict[str, Any]]:
+        """What memories say about user_id, across the chats viewer_id may see"""
+        memberships = await self.membership_store.get_user_chats(viewer_id, self.visible_chats)
+        titles = {str(m["chat_id"]): m.get("chat_title") for m in memberships}
+        titles.setdefault(str(viewer_id), "private chat")
+        entries = await self._entries(user_id, list(titles))
+        for entry in entries:
+            entry["chat_title"] = titles.get(entry["chat_id"])
+        return rank(entries, query, limit)
+
+
+class MongoUserMemoryIndex(_IndexBase):
+    """Index entries in an indexed MongoDB collection"""
+
+    def __init__(self, db_client: "DBClient", db_name: str, membership_store: "MembershipStore", **kwargs):
+        super().__init__(membership_store, **kwargs)
+        self.collection = db_client.async_client[db_name][COLLECTION_NAME]
+
+    async def initialize(self):
+        """Create the lookup indexes"""
+        await self.collection.create_index([("user_id", 1), ("updated_at", -1)], name="user_entries")
+        await self.collection.create_index([("namespace", 1), ("key", 1)], name="memory_entries")
+        instrument_methods(self, ("index", "recall"), "store_operation_seconds", store=self.__class__.__name__)
+
+    async def _replace(self, namespace: tuple, key: str, chat_id: str, users: List[str], content: str):
+        from pymongo import ReplaceOne
+
+        memory = {"namespace": list(namespace), "key": key}
+        ids = [f"{user_id}|{'/'.join(namespace)}|{key}" for user_id in users]
+        await self.collection.delete_many({**memory, "_id": {"$nin": ids}})
+        if users:
+            now = datetime.now(timezone.utc)
+            await self.collection.bulk_write([
+                ReplaceOne({"_id": _id}, {**memory, "user_id": user_id, "chat_id": chat_id,
+                                          "content": content, "updated_at": now}, upsert=True)
+                for _id, user_id in zip(ids, users)
+            ], ordered=False)
+
+    async def _entries(self, user_id: str, chat_ids: List[str]) -> List[Dict[str, Any]]:
+        # One query on {user_id, updated_at}, bounded by scan_limit
+        cursor = self.collection.find(
+            {"user_id": str(user_id), "chat_id": {"$in": chat_ids}},
+            {"_id": 0, "chat_id": 1, "key": 1, "content": 1, "updated_at": 1},
+        ).sort("updated_at", -1).limit(self.scan_limit)
+        return await cursor.to_list(length=self.scan_limit)
+
+
+class StoreUserMemoryIndex(_IndexBase):
+    """Index entries in a LangGraph store under ("user_memories", user_id)"""
+
+    def __init__(self, profile_store: "ProfileStoreType", membership_store: "MembershipStore", **kwargs):
+        super().__init__(membership_store, **kwargs)
+        self.profile_store = profile_store
+
+    async def initialize(self):
+        """Nothing to prepare; namespaces are created on write"""
+        instrument_methods(self, ("index", "recall"), "store_operation_seconds", store=self.__class__.__name__)
+
+    async def _replace(self, namespace: tuple, key: str, chat_id: str, users: List[str], content: str):
+        store = self.profile_store.store
+        entry_key = f"{'/'.join(namespace)}|{key}"
+        previous = await store.aget(REFS, entry_key)
+        for user_id in set(previous.value["users"] if previous else []) - set(users):
+            await store.adelete((NAMESPACE, user_id), entry_key)
+        now = datetime.now(timezone.utc).isoformat()
+        for user_id in users:
+            await store.aput((NAMESPACE, user_id), entry_key, {
+                "chat_id": chat_id, "key": key, "content": content, "updated_at": now,
+            }, index=False)
+        if users:
+            await store.aput(REFS, entry_key, {"users": users}, index=False)
+        elif previous:
+            await store.adelete(REFS, entry_key)
+
+    async def _entries(self, user_id: str, chat_ids: List[str]) -> List[Dict[str, Any]]:
+        items = await self.profile_store.store.asearch((NAMESPACE, str(user_id)), limit=self.scan_limit)
+        visible = set(chat_ids)
+        return [dict(item.value) for item in items if item.value.get("chat_id") in visible]
+
+
+def rebuild(db) -> int:
+    """Index every chat memory in a MongoDB database; returns new entries"""
+    from pymongo import ReplaceOne
+
+    count = 0
+    batch = []
+    now = datetime.now(timezone.utc)
+    cursor = db["langmem_store"].find(
+        {"namespace.0": {"$regex": "^chat_"}, "namespace.1": {"$exists": False}},
+        {"namespace": 1, "key": 1, "value": 1, "updated_at": 1},
+    )
+    for doc in cursor:
+        content = _content(doc.get("value"))
+        for user_id in mentioned_users(content):
+            batch.append(ReplaceOne(
+                {"_id": f"{user_id}|{'/'.join(doc['namespace'])}|{doc['key']}"},
+                {"namespace": doc["namespace"], "key": doc["key"], "user_id": user_id,
+                 "chat_id": chat_of(tuple(doc["namespace"])), "content": content,
+                 "updated_at": doc.get("updated_at", now)},
+                upsert=True,
+            ))
+        if len(batch) >= 1000:
+            count += db[COLLECTION_NAME].bulk_write(batch, ordered=False).upserted_count
+            batch = []
+    if batch:
+        count += db[COLLECTION_NAME].bulk_write(batch, ordered=False).upserted_count
+    return count
+
+
+UserMemoryIndex = Union[MongoUserMemoryIndex, StoreUserMemoryIndex]
+
+
+async def create_user_memory_index(
+    settings: Settings,
+    db_client: "DBClient",
+    memory_store: "MemoryStoreType",
+    profile_store: "ProfileStoreType",
+    membership_store: "MembershipStore",
+) -> Optional[UserMemoryIndex]:
+    """Create the user memory index, hooked into the memory store's writes, or None when disabled"""
+    if not settings.cross_chat_recall:
+        return None
+    if settings.storage_backend == "mongodb":
+        user_index = MongoUserMemoryIndex(
+            db_client, settings.db_name, membership_store, scan_limit=settings.cross_chat_recall_scan_limit
+        )
+    else:
+        user_index = StoreUserMemoryIndex(
+            profile_store, membership_store, scan_limit=settings.cross_chat_recall_scan_limit
+        )
+    await user_index.initialize()
+    memory_store.writes.add(user_index)
+    return user_index
+
+
+def main():
+    """Index existing chat memories (MongoDB backend)"""
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.getenv("DB_NAME", "telegram_bot"))
+    parser.add_argument("--rebuild", action="store_true", help="Index every chat memory")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5_000)
+    try:
+        db = client[args.db]
+        db[COLLECTION_NAME].create_index([("user_id", 1), ("updated_at", -1)], name="user_entries")
+        db[COLLECTION_NAME].create_index([("namespace", 1), ("key", 1)], name="memory_entries")
+        print(f"Indexed {rebuild(db)} new user memory entries")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,229 @@
-from loguru import logger
+import asyncio
+import os
+import queue
 import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Optional, TextIO
+from dotenv import load_dotenv
+from loguru import logger
 
+CONSOLE_FORMAT = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+FILE_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+
+_configured = False
+_writer: Optional['BackgroundLogWriter'] = None
+
+
+class DailyLogFile:
+    """Append-only log file rotated at midnight with day-based retention"""
+
+    def __init__(self, log_dir: str, prefix: str = "bot", retention_days: int = 30):
+        self.log_dir = Path(log_dir)
+        self.prefix = prefix
+        self.retention_days = retention_days
+        self._date: Optional[str] = None
+        self._file: Optional[TextIO] = None
+
+    def _rotate(self, date: str):
+        if self._file is not None:
+            self._file.close()
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.log_dir / f"{self.prefix}_{date}.log", "a", encoding="utf-8")
+        self._date = date
+
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        for path in self.log_dir.glob(f"{self.prefix}_*.log"):
+            if path.stem[len(self.prefix) + 1:] < cutoff:
+                path.unlink(missing_ok=True)
+
+    def write(self, text: str):
+        date = datetime.now().strftime("%Y-%m-%d")
+        if date != self._date:
+            self._rotate(date)
+        self._file.write(text)
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BackgroundLogWriter:
+    """Writes formatted log lines to their destinations from a daemon thread
+
+    Loguru still formats records in the calling thread (cheap, and skipped
+    entirely below the configured level); only the I/O moves off the event
+    loop. Unlike loguru's enqueue=True this does not pickle records.
+
+    The queue holds at most max_queued lines; while a destination stalls,
+    further lines are dropped and counted instead of growing memory, and
+    the count is reported on stderr once the writer catches up.
+    """
+
+    def __init__(self, max_queued: int = 10_000):
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queued)
+        self._targets: Dict[str, TextIO] = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self._reported = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def add_target(self, name: str, target) -> Callable[[str], None]:
+        """Register a destination and return a loguru sink feeding it"""
+        self._targets[name] = target
+        put = self._queue.put_nowait
+
+        def sink(message):
+            try:
+                put((name, message))
+            except queue.Full:
+                with self._lock:
+                    self.dropped += 1
+
+        return sink
+
+    def _run(self):
+        while True:
+            name, payload = self._queue.get()
+            if name == "__stop__":
+                self._flush_targets()
+                return
+            if name == "__flush__":
+                self._flush_targets()
+                payload.set()
+                continue
+            try:
+                self._targets[name].write(payload)
+            except Exception as e:
+                sys.__stderr__.write(f"Log writer failed for {name}: {e}\n")
+            if self._queue.empty():
+                self._flush_targets()
+
+    def _report_dropped(self):
+        with self._lock:
+            dropped, self._reported = self.dropped - self._reported, self.dropped
+        if dropped:
+            sys.__stderr__.write(f"Log writer dropped {dropped} lines while a destination was stalled\n")
+
+    def _flush_targets(self):
+        for target in self._targets.values():
+            try:
+                target.flush()
+            except Exception:
+                pass
+        self._report_dropped()
+
+    def flush(self, timeout: float = 5.0):
+        """Block until everything queued so far has been written"""
+        done = threading.Event()
+        try:
+            self._queue.put(("__flush__", done), timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def close(self):
+        """Write remaining lines and stop the writer thread"""
+        try:
+            self._queue.put(("__stop__", None), timeout=5.0)
+        except queue.Full:
+            # The thread is a daemon; a stalled destination must not hang shutdown
+            return
+        self._thread.join(timeout=5.0)
+
+
+def configure_logger(
+    log_dir: str = "logs",
+    level: str = "INFO",
+    json_output: bool = False,
+    background: bool = True,
+    console: bool = True,
+    console_stream: Optional[TextIO] = None,
+):
+    """(Re)configure logger sinks unconditionally
+
+    background=True hands formatted lines to a BackgroundLogWriter so the
+    event loop never blocks on terminal or disk writes. json_output emits
+    one JSON object per line for log shippers.
+    """
+    global _writer
 
-def setup_logger(log_dir: str = "logs"):
-    """Configure application logger"""
-    
-    # Remove default handler
     logger.remove()
-    
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+
+    stream = console_stream or sys.stderr
+
+    if background:
+        _writer = BackgroundLogWriter()
+        console_sink = _writer.add_target("console", stream) if console else None
+        file_sink = _writer.add_target("file", DailyLogFile(log_dir))
+        colorize = bool(getattr(stream, "isatty", lambda: False)())
+
+        if console_sink:
+            logger.add(console_sink, level=level, format=CONSOLE_FORMAT, serialize=json_output, colorize=colorize)
+        logger.add(file_sink, level=level, format=FILE_FORMAT, serialize=json_output)
+        return logger
+
     # Add console handler
-    logger.add(
-        sys.stderr,
-        level="INFO",
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
-    )
-    
+    if console:
+        logger.add(
+            stream,
+            level=level,
+            format=CONSOLE_FORMAT,
+            serialize=json_output,
+        )
+
     # Add file handler
     logger.add(
         f"{log_dir}/bot_{{time:YYYY-MM-DD}}.log",
         rotation="00:00",
         retention="30 days",
-        level="INFO",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+        level=level,
+        format=FILE_FORMAT,
+        serialize=json_output,
     )
-    
-    return logger
\ No newline at end of file
+
+    return logger
+
+
+def setup_logger(log_dir: str = "logs"):
+    """Configure application logger once and return it
+
+    Safe to call from every module at import time; only the first call
+    installs sinks. Level and output format come from LOG_LEVEL and
+    LOG_FORMAT ("text" or "json").
+    """
+    global _configured
+
+    if not _configured:
+        # The first call happens at import time, before Settings.from_env loads .env
+        load_dotenv()
+        configure_logger(
+            log_dir=log_dir,
+            level=os.getenv("LOG_LEVEL", "INFO").upper(),
+            json_output=os.getenv("LOG_FORMAT", "text").lower() == "json",
+        )
+        _configured = True
+
+    return logger
+
+
+def flush_logger():
+    """Block until queued log lines are written"""
+    if _writer is not None:
+        _writer.flush()
+
+
+async def shutdown_logger():
+    """Drain queued log lines before exit without blocking the event loop"""
+    await logger.complete()
+    await asyncio.to_thread(flush_logger)
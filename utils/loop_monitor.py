@@ -0,0 +1,135 @@
+import asyncio
+import queue
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from utils.logger import setup_logger
+from utils.metrics import metrics
+
+logger = setup_logger()
+
+
+class LoopLagMonitor:
+    """Detects event-loop stalls and captures the blocking stack
+
+    A coroutine ticks every interval and records how late it wakes up
+    (the loop lag). A watchdog thread watches the tick heartbeat; when the
+    loop has not ticked for longer than the threshold, it snapshots the
+    loop thread's current stack - i.e. the code that is blocking it - and
+    writes it to the diagnostics directory.
+    """
+
+    def __init__(self, threshold_ms: float = 100.0, interval_ms: float = 50.0, output_dir: str = "diagnostics"):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.output_dir = Path(output_dir)
+        self.recent_stalls: Deque[Dict[str, Any]] = deque(maxlen=50)
+        self._heartbeat = time.monotonic()
+        self._captured_heartbeat: Optional[float] = None
+        # (heartbeat, stack file) handed from the watchdog thread to the ticker
+        self._captures: "queue.SimpleQueue[Tuple[float, Path]]" = queue.SimpleQueue()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._running = False
+        self._lag = metrics.histogram(
+            "event_loop_lag_seconds", "Event loop wake-up delay",
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+        )
+        self._stalls = metrics.counter("event_loop_stalls_total", "Loop stalls above threshold")
+
+    async def start(self):
+        """Start ticking on the running loop and launch the watchdog"""
+        if self._running:
+            return
+        self._running = True
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._tick(), name="loop-lag-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Loop lag monitor started (threshold {self.threshold * 1000:.0f}ms)")
+
+    async def stop(self):
+        """Stop the ticker and watchdog"""
+        self._running = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _tick(self):
+        while self._running:
+            beat = self._heartbeat
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = now - started - self.interval
+            self._lag.observe(lag)
+
+            if lag >= self.threshold:
+                self._stalls.inc()
+                stack_file = self._take_capture(beat)
+                stall = {
+                    "at": datetime.now().isoformat(timespec="seconds"),
+                    "duration_ms": round(lag * 1000, 1),
+                    "stack_file": str(stack_file) if stack_file else None,
+                }
+                self.recent_stalls.append(stall)
+                logger.warning(
+                    "Event loop stalled for {:.0f}ms (stack: {})", lag * 1000, stall["stack_file"] or "not captured"
+                )
+
+    def _take_capture(self, beat: float) -> Optional[Path]:
+        """Stack captured during the stall that started at heartbeat beat, if any"""
+        found = None
+        while True:
+            try:
+                heartbeat, path = self._captures.get_nowait()
+            except queue.Empty:
+                return found
+            if heartbeat == beat:
+                found = path
+            else:
+                # Written after its own stall was reported
+                logger.info("Stack of an earlier event loop stall: {}", path)
+
+    def _watch(self):
+        while self._running:
+            time.sleep(self.interval / 2)
+            heartbeat = self._heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+            if blocked_for < self.threshold or self._captured_heartbeat == heartbeat:
+                continue
+
+            # One capture per stall: remember which heartbeat it belongs to
+            self._captured_heartbeat = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            try:
+                self._captures.put((heartbeat, self._write_stack(frame, blocked_for)))
+            except Exception as e:
+                sys.__stderr__.write(f"Loop lag monitor failed to write stack: {e}\n")
+
+    def _write_stack(self, frame, blocked_for: float) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"stall_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.txt"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"Event loop blocked for at least {blocked_for * 1000:.0f}ms\n")
+            f.write(f"Captured at {datetime.now().isoformat()}\n\n")
+            f.writelines(traceback.format_stack(frame))
+        return path
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Most recent stalls, newest last"""
+        return list(self.recent_stalls)
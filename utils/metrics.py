@@ -0,0 +1,301 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+Counters and histograms are plain Python objects guarded by a lock, so
+recording a sample costs a few hundred nanoseconds and needs no extra
+dependency. Use the module-level ``metrics`` registry:
+
+    @timed("user_manager_seconds", method="store_user_profile")
+    async def store_user_profile(...): ...
+
+    with metrics.timer("telegram_send_seconds"):
+        await update.message.reply_text(response)
+"""
+
+import asyncio
+import bisect
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from utils.logger import setup_logger
+from utils.traffic import traced
+
+logger = setup_logger()
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    """Monotonically increasing counter"""
+
+    def __init__(self, name: str, help_text: str = ""):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values (seconds by convention)"""
+
+    def __init__(self, name: str, help_text: str = "", buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        self.observe_key(value, _label_key(labels))
+
+    def observe_key(self, value: float, key: LabelKey):
+        """Observe with a precomputed label key (hot path)"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def sum(self, **labels) -> float:
+        series = self._series.get(_label_key(labels))
+        return series[-1] if series else 0.0
+
+    def total_count(self) -> int:
+        """Observations across all label sets"""
+        with self._lock:
+            return int(sum(sum(series[:-1]) for series in self._series.values()))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in self._series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, ('le', str(bound)))} {cumulative}")
+                cumulative += series[len(self.buckets)]
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series[-1]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registry of counters, histograms and gauge collectors"""
+
+    def __init__(self):
+        self._counters: Dict[str, Counter] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._collectors: List[Callable[[], Dict[str, float]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        """Get or create a counter"""
+        metric = self._counters.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._counters.setdefault(name, Counter(name, help_text))
+        return metric
+
+    def histogram(self, name: str, help_text: str = "", buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram"""
+        metric = self._histograms.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._histograms.setdefault(name, Histogram(name, help_text, buckets))
+        return metric
+
+    def register_collector(self, collector: Callable[[], Dict[str, float]]):
+        """Register a callable returning gauge values ({"name{labels}": value}) at scrape time"""
+        self._collectors.append(collector)
+
+    def register_pool_stats(self, prefix: str, stats_fn: Callable[[], Dict[str, Dict[str, Any]]]):
+        """Expose numeric pool_stats() fields as gauges labelled by client"""
+
+        def collect() -> Dict[str, float]:
+            gauges = {}
+            for client, stats in stats_fn().items():
+                for field, value in stats.items():
+                    if isinstance(value, (int, float)):
+                        gauges[f'{prefix}_{field}{{client="{client}"}}'] = value
+            return gauges
+
+        self.register_collector(collect)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Time a block and record it in the named histogram"""
+        histogram = self.histogram(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text format"""
+        lines: List[str] = []
+        for metric in list(self._counters.values()) + list(self._histograms.values()):
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                for name, value in collector().items():
+                    lines.append(f"{name} {value}")
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def timed(name: str, **labels):
+    """Decorator recording call duration (and errors) for sync or async callables"""
+
+    def decorator(func):
+        histogram = metrics.histogram(name)
+        errors = metrics.counter(f"{name.removesuffix('_seconds')}_errors_total")
+        key = _label_key(labels)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    errors.inc(**labels)
+                    raise
+                finally:
+                    histogram.observe_key(time.perf_counter() - start, key)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                errors.inc(**labels)
+                raise
+            finally:
+                histogram.observe_key(time.perf_counter() - start, key)
+        return sync_wrapper
+
+    return decorator
+
+
+def instrument_methods(obj: Any, method_names: Iterable[str], name: str, **labels) -> Any:
+    """Wrap methods of an existing instance with timers, keeping its type intact
+
+    Used for third-party objects (LangGraph stores and checkpointers) whose
+    classes must still pass isinstance checks. Calls are also attached to
+    the turn being recorded by utils.traffic, if any.
+    """
+    for method_name in method_names:
+        method = getattr(obj, method_name, None)
+        if method is None or getattr(method, "_instrumented", False):
+            continue
+        wrapper = traced(timed(name, op=method_name, **labels)(method), name, op=method_name, **labels)
+        wrapper._instrumented = True
+        setattr(obj, method_name, wrapper)
+    return obj
+
+
+class MetricsServer:
+    """Minimal asyncio HTTP server exposing /metrics"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9100, registry: MetricsRegistry = metrics):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._routes: Dict[str, Callable[[], Any]] = {"/metrics": self.registry.render}
+
+    def add_route(self, path: str, handler: Callable[[], Any]):
+        """Serve the (sync or async) handler's string result at path"""
+        self._routes[path] = handler
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?", 1)[0] if len(parts) > 1 else "/"
+            # Drain headers
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+
+            handler = self._routes.get(path)
+            if handler is None:
+                status, body = "404 Not Found", "not found\n"
+            else:
+                result = handler()
+                if asyncio.iscoroutine(result):
+                    result = await result
+                status, body = "200 OK", result
+
+            payload = body.encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: close\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.warning(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
+
+    async def start(self):
+        """Start serving"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"📈 Metrics endpoint on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        """Stop serving"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
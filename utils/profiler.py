@@ -0,0 +1,89 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class SamplingProfiler:
+    """Time-boxed sampling profiler for the event-loop thread
+
+    Samples the loop thread's stack from a background thread and writes
+    collapsed stacks ("frame;frame;frame count"), the input format of
+    flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, output_dir: str = "diagnostics", interval_ms: float = 5.0, max_seconds: float = 60.0):
+        self.output_dir = Path(output_dir)
+        self.interval = interval_ms / 1000
+        self.max_seconds = max_seconds
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._lock.locked()
+
+    async def profile(self, seconds: float) -> Path:
+        """Sample the running loop for the given duration and return the output file"""
+        if self.is_running:
+            raise RuntimeError("A profile is already running")
+
+        seconds = max(1.0, min(seconds, self.max_seconds))
+        async with self._lock:
+            target_thread = threading.get_ident()
+            samples: Counter = Counter()
+            stop = threading.Event()
+            sampler = threading.Thread(
+                target=self._sample, args=(target_thread, samples, stop), name="loop-profiler", daemon=True
+            )
+            logger.info(f"Sampling profile started for {seconds:.0f}s")
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                stop.set()
+                await asyncio.to_thread(sampler.join)
+
+            path = await asyncio.to_thread(self._write, samples, seconds)
+            logger.info(f"Sampling profile written to {path} ({sum(samples.values())} samples)")
+            return path
+
+    def _sample(self, thread_id: int, samples: Counter, stop: threading.Event):
+        while not stop.is_set():
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if stack:
+                samples[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def _write(self, samples: Counter, seconds: float) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{seconds:.0f}s.folded"
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+def dump_tasks(output_dir: str = "diagnostics") -> Path:
+    """Write every pending asyncio task and its current stack to a file"""
+    directory = Path(output_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"tasks_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+    tasks = asyncio.all_tasks()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"{len(tasks)} tasks at {datetime.now().isoformat()}\n\n")
+        for task in sorted(tasks, key=lambda t: t.get_name()):
+            f.write(f"=== {task.get_name()} ({task.get_coro()!r})\n")
+            task.print_stack(file=f)
+            f.write("\n")
+    return path
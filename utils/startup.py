@@ -0,0 +1,51 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict, TypeVar
+from utils.logger import setup_logger
+from utils.metrics import metrics
+
+logger = setup_logger()
+
+T = TypeVar("T")
+
+
+class StartupTimer:
+    """Times startup phases, which may overlap, and reports them once the bot is ready"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self._phase_seconds = metrics.histogram(
+            "startup_phase_seconds", "Duration of each startup phase",
+            buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+        )
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block as the named phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._finish(name, start)
+
+    async def run(self, name: str, awaitable: Awaitable[T]) -> T:
+        """Await as the named phase (use with asyncio.gather for concurrent phases)"""
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self._finish(name, start)
+
+    def _finish(self, name: str, start: float):
+        elapsed = time.perf_counter() - start
+        self.phases[name] = elapsed
+        self._phase_seconds.observe(elapsed, phase=name)
+
+    def report(self) -> Dict[str, Any]:
+        """Log total startup time and the per-phase breakdown"""
+        total = time.perf_counter() - self.started
+        self._phase_seconds.observe(total, phase="total")
+        breakdown = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases.items())
+        logger.info(f"🚀 Ready in {total * 1000:.0f}ms ({breakdown})")
+        return {"total_seconds": total, "phases": dict(self.phases)}
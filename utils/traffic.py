@@ -0,0 +1,189 @@
+"""
+Record incoming traffic for replay-based performance testing.
+
+While a message is handled, ``TrafficRecorder.turn`` keeps a per-turn
+record in a context variable; instrumented code appends its timings with
+``record_call`` (LLM and tool calls from the metrics callback, store and
+checkpoint operations from ``instrument_methods``). Finished turns are
+written as one JSON object per line to an append-only file by a
+background thread. ``benchmarks.replay_traffic`` replays the file.
+
+With anonymization on, Telegram IDs are replaced by salted hashes, message
+words by hashed tokens (word count and repetition are preserved), and
+tool-call arguments and model output are dropped.
+"""
+
+import functools
+import hashlib
+import hmac
+import inspect
+import json
+import random
+import secrets
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from utils.logger import BackgroundLogWriter, setup_logger
+
+logger = setup_logger()
+
+FORMAT_VERSION = 1
+
+_current_turn: ContextVar[Optional[Dict[str, Any]]] = ContextVar("traffic_turn", default=None)
+
+
+def record_call(kind: str, seconds: float, **details):
+    """Attach a timed upstream call to the turn being recorded (no-op otherwise)"""
+    turn = _current_turn.get()
+    if turn is not None:
+        turn["calls"].append({"kind": kind, "ms": round(seconds * 1000, 3), **details})
+
+
+def annotate_turn(**fields):
+    """Attach fields to the turn being recorded (no-op otherwise)"""
+    turn = _current_turn.get()
+    if turn is not None:
+        turn.update(fields)
+
+
+def traced(func: Callable, kind: str, **details) -> Callable:
+    """Wrap a function so each call is recorded on the current turn"""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if _current_turn.get() is None:
+                return await func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                record_call(kind, time.perf_counter() - start, **details)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def sync_wrapper(*args, **kwargs):
+        if _current_turn.get() is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record_call(kind, time.perf_counter() - start, **details)
+    return sync_wrapper
+
+
+class TrafficRecorder:
+    """Append-only NDJSON recorder of handled messages and their upstream timings"""
+
+    def __init__(self, path: str, anonymize: bool = True, sample_rate: float = 1.0, salt: Optional[str] = None):
+        self.path = Path(path)
+        self.anonymize = anonymize
+        self.sample_rate = sample_rate
+        # Without a fixed salt, hashed IDs are only stable within one process
+        self._salt = (salt or secrets.token_hex(16)).encode()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._writer = BackgroundLogWriter()
+        self._put = self._writer.add_target("traffic", self._file)
+        self.recorded = 0
+        logger.info(f"📼 Recording traffic to {self.path} (anonymize={anonymize}, sample_rate={sample_rate})")
+
+    @asynccontextmanager
+    async def turn(self, update) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Record the message handled inside this block"""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            yield None
+            return
+
+        user, chat = update.effective_user, update.effective_chat
+        record = {
+            "v": FORMAT_VERSION,
+            "ts": time.time(),
+            "update_id": getattr(update, "update_id", None),
+            "chat_id": chat.id,
+            "chat_type": chat.type,
+            "chat_title": getattr(chat, "title", None),
+            "user_id": user.id,
+            "username": user.username,
+            "full_name": user.full_name,
+            "text": update.message.text,
+            "calls": [],
+        }
+        token = _current_turn.set(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["handler_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            _current_turn.reset(token)
+            self._write(record)
+
+    def _write(self, record: Dict[str, Any]):
+        try:
+            if self.anonymize:
+                record = self._anonymize(record)
+            self._put(json.dumps(record, default=str, separators=(",", ":")) + "\n")
+            self.recorded += 1
+        except Exception as e:
+            logger.warning(f"Failed to record traffic: {e}")
+
+    def _hash_id(self, value: Any) -> int:
+        digest = hmac.new(self._salt, str(value).encode(), hashlib.blake2b).digest()
+        hashed = int.from_bytes(digest[:6], "big")
+        return -hashed if str(value).startswith("-") else hashed
+
+    def _hash_text(self, text: Optional[str]) -> Optional[str]:
+        if text is None:
+            return None
+        return " ".join(
+            "w" + hmac.new(self._salt, word.lower().encode(), hashlib.blake2b).hexdigest()[:6]
+            for word in text.split()
+        )
+
+    def _anonymize(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        user_id = self._hash_id(record["user_id"])
+        chat_id = self._hash_id(record["chat_id"])
+        calls: List[Dict[str, Any]] = []
+        for call in record["calls"]:
+            call = dict(call)
+            if "tool_calls" in call:
+                call["tool_calls"] = [{"name": tc.get("name")} for tc in call["tool_calls"]]
+            if "content" in call:
+                call["content_chars"] = len(call.pop("content") or "")
+            calls.append(call)
+
+        anonymized = dict(record)
+        anonymized.update({
+            "chat_id": chat_id,
+            "chat_title": None if record["chat_title"] is None else f"Chat {abs(chat_id)}",
+            "user_id": user_id,
+            "username": f"user{user_id}",
+            "full_name": f"User {user_id}",
+            "text": self._hash_text(record["text"]),
+            "calls": calls,
+            "anonymized": True,
+        })
+        if "response" in anonymized:
+            anonymized["response_chars"] = len(anonymized.pop("response") or "")
+        return anonymized
+
+    def close(self):
+        """Write pending records and close the file"""
+        self._writer.close()
+        self._file.close()
+        logger.info(f"📼 Recorded {self.recorded} turns to {self.path}")
+
+
+def load_recording(path: str) -> List[Dict[str, Any]]:
+    """Read a recording, skipping a trailing partial line"""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    records.sort(key=lambda record: record["ts"])
+    return records